@@ -6,7 +6,8 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .models import User
 from .serializers import UserSerializer, UserRegistrationSerializer, UserUpdateSerializer
-from audit.models import AuditLog
+from audit.writer import audit_writer
+from hotel_management.pagination import CreatedAtCursorPagination
 import logging
 
 # Set up logging
@@ -24,7 +25,7 @@ class UserRegistrationView(generics.CreateAPIView):
             user = serializer.save()
             
             # Log the action
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='create',
                 model_type='User',
@@ -45,25 +46,17 @@ class LoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
     
     def post(self, request, *args, **kwargs):
-        logger.info("Login request received")
-        logger.info(f"Request data: {request.data}")
-        logger.info(f"Request headers: {dict(request.headers)}")
-        logger.info(f"Content type: {request.content_type}")
-        
         try:
             response = super().post(request, *args, **kwargs)
-            logger.info(f"JWT response status: {response.status_code}")
             
             if response.status_code == status.HTTP_200_OK:
                 try:
                     # Get the user from the request
                     email = request.data.get('email')
-                    logger.info(f"Looking up user with email: {email}")
                     user = User.objects.get(email=email)
                     
                     # Add user role to the response
                     response.data['user_role'] = user.role
-                    logger.info(f"Added user role {user.role} to response")
                     
                     # Add payload field for frontend compatibility
                     response.data['payload'] = {
@@ -71,19 +64,18 @@ class LoginView(TokenObtainPairView):
                         'refresh': response.data['refresh'],
                         'user_role': user.role
                     }
-                    logger.info("Added payload field for frontend compatibility")
                     
                     # Log the action
-                    AuditLog.objects.create(
+                    audit_writer.log(
                         user=user,
                         action='login',
                         model_type='User',
                         object_id=user.id,
                         description=f'User {user.email} logged in'
                     )
-                    logger.info(f"Logged login action for user {user.email}")
+                    logger.info('User %s logged in', user.id)
                 except User.DoesNotExist:
-                    logger.error(f"User with email {email} does not exist")
+                    logger.error('Token issued for an unknown user')
                     # If user doesn't exist, we still return the token but without user_role
                     # This shouldn't happen in normal circumstances since JWT authentication
                     # should have already validated the credentials
@@ -93,20 +85,17 @@ class LoginView(TokenObtainPairView):
                         'refresh': response.data.get('refresh', ''),
                         'user_role': 'guest'
                     }
-                except Exception as e:
-                    logger.error(f"Error during login processing: {str(e)}", exc_info=True)
+                except Exception:
+                    logger.error('Error during login processing', exc_info=True)
                     # Add payload field even in error case
                     response.data['payload'] = {
                         'access': response.data.get('access', ''),
                         'refresh': response.data.get('refresh', ''),
                         'user_role': 'guest'
                     }
-            
-            logger.info(f"Returning response with data keys: {list(response.data.keys()) if hasattr(response, 'data') else 'No data'}")
-            logger.info(f"Response data: {response.data if hasattr(response, 'data') else 'No data'}")
             return response
-        except Exception as e:
-            logger.error(f"Exception in login view: {str(e)}", exc_info=True)
+        except Exception:
+            logger.error('Exception in login view', exc_info=True)
             raise
 
 
@@ -125,7 +114,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         response = super().update(request, *args, **kwargs)
         
         # Log the action
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='update',
             model_type='User',
@@ -141,6 +130,7 @@ class AdminUserListView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [SessionAuthentication]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         # Only admin users can list all users
@@ -175,7 +165,7 @@ class AdminUserDetailView(generics.RetrieveUpdateDestroyAPIView):
             serializer = self.get_serializer(user)
             
             # Log the action
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=self.request.user,
                 action='update',
                 model_type='User',
@@ -189,7 +179,7 @@ class AdminUserDetailView(generics.RetrieveUpdateDestroyAPIView):
             response = super().update(request, *args, **kwargs)
             
             # Log the action
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=self.request.user,
                 action='update',
                 model_type='User',
@@ -217,7 +207,7 @@ class AdminUserDetailView(generics.RetrieveUpdateDestroyAPIView):
         response = super().destroy(request, *args, **kwargs)
         
         # Log the action
-        AuditLog.objects.create(
+        audit_writer.log(
             user=self.request.user,
             action='delete',
             model_type='User',
@@ -0,0 +1,271 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User
+from audit.models import AuditLog
+from bookings.models import Booking, RoomNight
+from payments.models import Payment
+from rooms.models import Room
+from rooms.availability import BLOCKING_STATUSES
+
+# Marks generated rows so repeated runs append instead of colliding
+EMAIL_DOMAIN = 'load.test'
+ROOM_PREFIX = 'L'
+
+ROOM_TYPES = (
+    ('Single Room', 1, Decimal('80.00')),
+    ('Double Room', 2, Decimal('120.00')),
+    ('Deluxe Room', 2, Decimal('180.00')),
+    ('Family Room', 4, Decimal('220.00')),
+    ('Suite', 4, Decimal('350.00')),
+)
+
+# Length of stay in nights and its relative frequency
+STAY_LENGTHS = (1, 2, 3, 4, 5, 7, 10, 14)
+STAY_WEIGHTS = (20, 25, 20, 12, 9, 8, 4, 2)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let generated rows carry historical created_at/updated_at values"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Generate large volumes of realistic rooms, users, bookings, payments and audit logs for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=100)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--audit-logs', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed and anchor date give the same data')
+        parser.add_argument('--anchor-date', type=str, default=None,
+                            help='Date treated as today (YYYY-MM-DD, default today)')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.today = (
+            datetime.strptime(options['anchor_date'], '%Y-%m-%d').date()
+            if options['anchor_date'] else timezone.localdate()
+        )
+
+        started = time.perf_counter()
+        with explicit_timestamps(Room, User, Booking, Payment, AuditLog):
+            rooms = self.timed('rooms', self.create_rooms, options['rooms'])
+            user_ids = self.timed('users', self.create_users, options['users'])
+            booking_ids = self.timed('bookings', self.create_bookings, options['bookings'], rooms, user_ids)
+            self.timed('audit logs', self.create_audit_logs, options['audit_logs'], user_ids, booking_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Load data generated in {time.perf_counter() - started:.1f}s. '
+            'Restart running servers so in-memory indexes and caches pick it up.'
+        ))
+
+    def timed(self, label, step, *args):
+        started = time.perf_counter()
+        result = step(*args)
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.1f}s')
+        return result
+
+    def write(self, model, objects):
+        with transaction.atomic():
+            return model.objects.bulk_create(objects)
+
+    def moment(self, day):
+        """A random time during ``day``"""
+        naive = datetime.combine(day, datetime.min.time()) + timedelta(seconds=self.rng.randint(0, 86399))
+        return timezone.make_aware(naive)
+
+    def create_rooms(self, count):
+        offset = Room.objects.filter(number__startswith=ROOM_PREFIX).count()
+        created = timezone.now()
+        rooms = []
+        batch = []
+
+        def flush():
+            rooms.extend((room.id, room.capacity, room.price_per_night) for room in self.write(Room, batch))
+            batch.clear()
+
+        for i in range(offset, offset + count):
+            name, capacity, price = self.rng.choice(ROOM_TYPES)
+            # Occupied rooms are marked booked once their bookings exist
+            status = 'maintenance' if self.rng.random() < 0.02 else 'dispo'
+            batch.append(Room(
+                number=f'{ROOM_PREFIX}{i:06d}', name=name, floor=i // 50 + 1, capacity=capacity,
+                price_per_night=price, status=status, created_at=created, updated_at=created
+            ))
+            if len(batch) >= self.chunk_size:
+                flush()
+        flush()
+        self.stdout.write(f'Created {count} rooms')
+        return rooms
+
+    def create_users(self, count):
+        offset = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').count()
+        # Hashing is deliberately slow, so every generated user shares one hash
+        password = make_password('loadtest123')
+        admins = max(count // 10000, 1) if count else 0
+        receptionists = max(count // 1000, 1) if count else 0
+        ids = {'admin': [], 'reception': [], 'guest': []}
+        batch = []
+
+        def flush():
+            for user in self.write(User, batch):
+                ids[user.role].append(user.id)
+            batch.clear()
+
+        for i in range(count):
+            role = 'admin' if i < admins else 'reception' if i < admins + receptionists else 'guest'
+            number = offset + i
+            joined = self.moment(self.today - timedelta(days=self.rng.randint(0, 3650)))
+            batch.append(User(
+                username=f'load{number}', email=f'load{number}@{EMAIL_DOMAIN}', password=password,
+                first_name=f'First{number}', last_name=f'Last{number}', role=role,
+                date_joined=joined, created_at=joined, updated_at=joined
+            ))
+            if len(batch) >= self.chunk_size:
+                flush()
+        flush()
+        self.stdout.write(f'Created {count} users ({admins} admins, {receptionists} receptionists)')
+        return ids
+
+    def booking_status(self, check_in, check_out):
+        roll = self.rng.random()
+        if check_out <= self.today:
+            return 'cancelled' if roll < 0.08 else 'checked_out'
+        if check_in <= self.today:
+            return 'checked_in'
+        if roll < 0.05:
+            return 'cancelled'
+        return 'pending' if roll < 0.2 else 'confirmed'
+
+    def create_bookings(self, count, rooms, user_ids):
+        """
+        Bookings walk backwards in time from a few months ahead, one room at
+        a time, so a room's stays never overlap and history spans as many
+        years as the volume requires. Rooms with a guest checked in today are
+        then marked booked, as a check-in would.
+        """
+        guests = user_ids['guest'] or user_ids['reception'] or user_ids['admin']
+        if not count or not rooms or not guests:
+            return []
+
+        per_room, remainder = divmod(count, len(rooms))
+        booking_ids = []
+        occupied = []
+        batch = []
+        for index, (room_id, capacity, price) in enumerate(rooms):
+            day = self.today + timedelta(days=self.rng.randint(30, 180))
+            for _ in range(per_room + (1 if index < remainder else 0)):
+                nights = self.rng.choices(STAY_LENGTHS, STAY_WEIGHTS)[0]
+                check_out = day
+                check_in = check_out - timedelta(days=nights)
+                day = check_in - timedelta(days=self.rng.choice((0, 0, 1, 1, 2, 3, 5, 8)))
+                created = self.moment(check_in - timedelta(days=self.rng.randint(0, 120)))
+                status = self.booking_status(check_in, check_out)
+                if status == 'checked_in':
+                    occupied.append(room_id)
+                updated = self.moment(check_out) if status == 'checked_out' else created
+                batch.append(Booking(
+                    guest_id=self.rng.choice(guests), room_id=room_id, check_in_date=check_in,
+                    check_out_date=check_out, num_guests=self.rng.randint(1, capacity),
+                    total_price=price * nights, status=status, created_at=created, updated_at=updated
+                ))
+                if len(batch) >= self.chunk_size:
+                    booking_ids.extend(self.write_bookings(batch))
+                    batch = []
+        booking_ids.extend(self.write_bookings(batch))
+        self.mark_occupied(occupied)
+        self.stdout.write(f'Created {len(booking_ids)} bookings with payments and room-nights')
+        return booking_ids
+
+    def mark_occupied(self, room_ids):
+        """Give rooms with a checked-in guest the status a check-in sets"""
+        for start in range(0, len(room_ids), self.chunk_size):
+            with transaction.atomic():
+                Room.objects.filter(id__in=room_ids[start:start + self.chunk_size]).update(status='booked')
+
+    def write_bookings(self, bookings):
+        """Insert a chunk of bookings with their payments and held nights"""
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create(bookings)
+            payments = []
+            nights = []
+            for booking in bookings:
+                payment = self.payment_for(booking)
+                if payment is not None:
+                    payments.append(payment)
+                if booking.status in BLOCKING_STATUSES:
+                    nights.extend(
+                        RoomNight(room_id=booking.room_id, date=booking.check_in_date + timedelta(days=i),
+                                  booking_id=booking.id)
+                        for i in range((booking.check_out_date - booking.check_in_date).days)
+                    )
+            Payment.objects.bulk_create(payments)
+            RoomNight.objects.bulk_create(nights)
+        return [booking.id for booking in bookings]
+
+    def payment_for(self, booking):
+        if booking.status == 'pending':
+            return None
+        if booking.status == 'cancelled':
+            if self.rng.random() < 0.5:
+                return None
+            status = 'refunded'
+        elif booking.status == 'confirmed' and self.rng.random() < 0.3:
+            status = 'pending'
+        else:
+            status = 'completed'
+        return Payment(
+            booking_id=booking.id, amount=booking.total_price,
+            payment_method=self.rng.choice(('credit_card', 'debit_card', 'cash', 'bank_transfer')),
+            status=status, transaction_id=f'LOAD-{booking.id}',
+            paid_at=booking.created_at if status != 'pending' else None,
+            created_at=booking.created_at, updated_at=booking.updated_at
+        )
+
+    def create_audit_logs(self, count, user_ids, booking_ids):
+        staff = user_ids['reception'] + user_ids['admin']
+        actors = staff or user_ids['guest']
+        if not count or not actors:
+            return
+        actions = (
+            ('create', 'Booking'), ('booking_status_change', 'Booking'), ('check_in', 'Booking'),
+            ('check_out', 'Booking'), ('room_status_change', 'Room'), ('login', 'User'),
+        )
+        batch = []
+        for _ in range(count):
+            action, model_type = self.rng.choice(actions)
+            object_id = self.rng.choice(booking_ids) if booking_ids and model_type == 'Booking' else self.rng.randint(1, 10000)
+            batch.append(AuditLog(
+                user_id=self.rng.choice(actors), action=action, model_type=model_type,
+                object_id=object_id, description=f'{action.replace("_", " ").capitalize()} on {model_type} {object_id}',
+                ip_address=f'10.{self.rng.randint(0, 255)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}',
+                created_at=self.moment(self.today - timedelta(days=self.rng.randint(0, 365)))
+            ))
+            if len(batch) >= self.chunk_size:
+                self.write(AuditLog, batch)
+                batch = []
+        self.write(AuditLog, batch)
+        self.stdout.write(f'Created {count} audit logs')
@@ -0,0 +1,366 @@
+import http.client
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import subprocess
+import time
+from collections import Counter, deque
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from bookings.models import Booking
+from rooms.models import Room
+
+# Scenario -> relative weight in the default mix
+DEFAULT_MIX = {
+    'search': 40,
+    'guest_create': 10,
+    'reception_create': 10,
+    'check_in_out': 10,
+    'dashboard': 25,
+    'booking_list': 5,
+}
+
+
+class HttpTransport:
+    """Keep-alive HTTP connection to a running server"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f'Unsupported URL: {base_url}')
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.connection = None
+
+    def request(self, method, path, token, body=None):
+        headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.netloc, timeout=60)
+            try:
+                self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                # The server may close idle keep-alive connections; retry once
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+class InProcessTransport:
+    """Call the Django application directly, without a server"""
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+
+    def request(self, method, path, token, body=None):
+        response = self.client.generic(
+            method, path,
+            data=json.dumps(body) if body is not None else '',
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        return response.status_code, response.content
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    # Never share the parent's database connections across processes
+    connections.close_all()
+    # Expected 400s (rooms already taken) would otherwise flood the logs
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+
+def run_worker(job):
+    """Replay the scenario mix until the deadline; returns per-endpoint samples"""
+    rng = random.Random(job['seed'])
+    transport = HttpTransport(job['url']) if job['url'] else InProcessTransport()
+    samples = {}
+    today = timezone.localdate()
+    to_check_in = deque(job['confirmed_bookings'])
+    to_check_out = deque()
+    scenarios = list(job['mix'])
+    weights = [job['mix'][name] for name in scenarios]
+
+    def call(endpoint, method, path, token, body=None):
+        started = time.perf_counter()
+        try:
+            status, _ = transport.request(method, path, token, body)
+        except Exception:
+            status = 0
+        elapsed = time.perf_counter() - started
+        if started < measure_from:
+            return status
+        sample = samples.setdefault(endpoint, {'latencies': [], 'statuses': Counter()})
+        sample['latencies'].append(elapsed)
+        sample['statuses'][status] += 1
+        return status
+
+    def stay(min_ahead, max_ahead):
+        check_in = today + timedelta(days=rng.randint(min_ahead, max_ahead))
+        return str(check_in), str(check_in + timedelta(days=rng.randint(1, 5)))
+
+    # Requests during the warm-up fill caches and indexes and are not recorded
+    measure_from = time.perf_counter() + job['warmup']
+    deadline = measure_from + job['duration']
+    done = 0
+    while time.perf_counter() < deadline and (job['requests'] is None or done < job['requests']):
+        scenario = rng.choices(scenarios, weights)[0]
+        guest_token, guest_email = rng.choice(job['guests'])
+
+        if scenario == 'search':
+            check_in, check_out = stay(1, 180)
+            call('rooms.search', 'GET', f'/api/rooms/?check_in_date={check_in}&check_out_date={check_out}', guest_token)
+        elif scenario == 'guest_create':
+            check_in, check_out = stay(30, 700)
+            call('bookings.guest_create', 'POST', '/api/bookings/guest/create/', guest_token, {
+                'room': rng.choice(job['rooms']), 'check_in_date': check_in,
+                'check_out_date': check_out, 'num_guests': 1
+            })
+        elif scenario == 'reception_create':
+            check_in, check_out = stay(30, 700)
+            call('bookings.reception_create', 'POST', '/api/bookings/reception/create/', job['reception'], {
+                'guest_email': guest_email, 'room': rng.choice(job['rooms']),
+                'check_in_date': check_in, 'check_out_date': check_out, 'num_guests': 1
+            })
+        elif scenario == 'check_in_out':
+            if to_check_out and (not to_check_in or rng.random() < 0.5):
+                booking_id = to_check_out.popleft()
+                call('bookings.check_out', 'PATCH', f'/api/bookings/reception/{booking_id}/status/',
+                     job['reception'], {'status': 'checked_out'})
+            elif to_check_in:
+                booking_id = to_check_in.popleft()
+                status = call('bookings.check_in', 'PATCH', f'/api/bookings/reception/{booking_id}/status/',
+                              job['reception'], {'status': 'checked_in'})
+                if status == 200:
+                    to_check_out.append(booking_id)
+            else:
+                # Nothing left to check in or out
+                continue
+        elif scenario == 'dashboard':
+            call('dashboard.stats', 'GET', '/api/dashboard/stats/', job['reception'])
+            call('dashboard.recent_activity', 'GET', '/api/dashboard/recent-activity/', job['reception'])
+        elif scenario == 'booking_list':
+            call('bookings.reception_list', 'GET', '/api/bookings/reception/', job['reception'])
+        done += 1
+
+    measured = max(time.perf_counter() - measure_from, 0.0)
+    connections.close_all()
+    return {
+        'elapsed': measured,
+        'samples': {
+            endpoint: {'latencies': sample['latencies'], 'statuses': dict(sample['statuses'])}
+            for endpoint, sample in samples.items()
+        },
+    }
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    # The smallest value with at least ``fraction`` of the samples at or below it
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(latencies, statuses, elapsed):
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if int(status) == 0 or int(status) >= 500)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'rps': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a realistic API traffic mix from several worker processes and report '
+        'latency percentiles and throughput per endpoint. Creates and updates bookings, '
+        'so run it against a disposable database (see generate_load_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None,
+                            help='Base URL of a running server; without it requests go through the WSGI stack in-process')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds each worker runs')
+        parser.add_argument('--warmup', type=float, default=0.0,
+                            help='Seconds each worker runs before measuring starts')
+        parser.add_argument('--requests', type=int, default=None, help='Stop each worker after this many scenarios')
+        parser.add_argument('--mix', default=None,
+                            help='Scenario weights, e.g. "search=40,dashboard=25" (default: %s)' % ','.join(
+                                f'{name}={weight}' for name, weight in DEFAULT_MIX.items()))
+        parser.add_argument('--guests', type=int, default=200, help='Distinct guest accounts to act as')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None, help='Write results to this JSON file')
+        parser.add_argument('--compare', default=None, help='Earlier results JSON to compare against')
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['mix'])
+        jobs = self.build_jobs(options, mix)
+
+        self.stdout.write(
+            f'{len(jobs)} workers, {options["duration"]}s, '
+            f'{"HTTP " + options["url"] if options["url"] else "in-process WSGI"}'
+        )
+        # Children must open their own database connections
+        connections.close_all()
+        with multiprocessing.Pool(len(jobs), initializer=init_worker) as pool:
+            results = pool.map(run_worker, jobs)
+
+        report = self.build_report(results, options, mix)
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+        if options['compare']:
+            with open(options['compare']) as previous:
+                self.print_comparison(json.load(previous), report)
+
+    def parse_mix(self, value):
+        if not value:
+            return dict(DEFAULT_MIX)
+        mix = {}
+        for item in value.split(','):
+            name, _, weight = item.partition('=')
+            name = name.strip()
+            if name not in DEFAULT_MIX:
+                raise CommandError(f'Unknown scenario "{name}"; choose from {", ".join(DEFAULT_MIX)}')
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f'Invalid weight for "{name}"')
+        if not any(mix.values()):
+            raise CommandError('At least one scenario needs a positive weight')
+        return mix
+
+    def build_jobs(self, options, mix):
+        reception = User.objects.filter(role='reception').order_by('id').first()
+        guests = list(User.objects.filter(role='guest').order_by('id')[:options['guests']])
+        rooms = list(Room.objects.exclude(status='maintenance').values_list('id', flat=True))
+        if reception is None or not guests or not rooms:
+            raise CommandError('Needs a reception user, guests and rooms; run generate_load_data first')
+
+        reception_token = str(RefreshToken.for_user(reception).access_token)
+        guest_accounts = [(str(RefreshToken.for_user(guest).access_token), guest.email) for guest in guests]
+
+        workers = max(options['workers'], 1)
+        # Bookings ready to be checked in, shared out so workers never collide
+        today = timezone.localdate()
+        confirmed = list(Booking.objects.filter(
+            status='confirmed', check_in_date__gte=today
+        ).order_by('check_in_date', 'id').values_list('id', flat=True)[:workers * 500])
+
+        return [
+            {
+                'seed': options['seed'] + index,
+                'url': options['url'],
+                'duration': options['duration'],
+                'warmup': options['warmup'],
+                'requests': options['requests'],
+                'mix': mix,
+                'reception': reception_token,
+                'guests': guest_accounts,
+                'rooms': rooms,
+                'confirmed_bookings': confirmed[index::workers],
+            }
+            for index in range(workers)
+        ]
+
+    def build_report(self, results, options, mix):
+        # Workers measure concurrently, so throughput is over the longest window
+        elapsed = max(result['elapsed'] for result in results)
+        merged = {}
+        for result in results:
+            for endpoint, sample in result['samples'].items():
+                entry = merged.setdefault(endpoint, {'latencies': [], 'statuses': Counter()})
+                entry['latencies'].extend(sample['latencies'])
+                entry['statuses'].update(sample['statuses'])
+
+        all_latencies = [latency for entry in merged.values() for latency in entry['latencies']]
+        all_statuses = sum((entry['statuses'] for entry in merged.values()), Counter())
+        return {
+            'meta': {
+                'commit': self.current_commit(),
+                'started_at': timezone.now().isoformat(),
+                'target': options['url'] or 'in-process',
+                'workers': options['workers'],
+                'warmup_s': options['warmup'],
+                'duration_s': round(elapsed, 2),
+                'mix': mix,
+                'seed': options['seed'],
+            },
+            'total': summarize(all_latencies, all_statuses, elapsed),
+            'endpoints': {
+                endpoint: summarize(entry['latencies'], entry['statuses'], elapsed)
+                for endpoint, entry in sorted(merged.items())
+            },
+        }
+
+    def current_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"endpoint":<28}{"requests":>10}{"errors":>8}{"rps":>10}'
+            f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+        )
+        rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+        for endpoint, stats in rows:
+            self.stdout.write(
+                f'{endpoint:<28}{stats["requests"]:>10}{stats["errors"]:>8}{stats["rps"]:>10.1f}'
+                f'{stats["p50_ms"]:>10.1f}{stats["p95_ms"]:>10.1f}{stats["p99_ms"]:>10.1f}'
+            )
+
+    def print_comparison(self, previous, current):
+        self.stdout.write(
+            f'\nCompared with {previous["meta"].get("commit") or "previous run"}: '
+            f'{"endpoint":<28}{"rps":>12}{"p95":>12}'
+        )
+
+        def change(old, new):
+            return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+        endpoints = dict(current['endpoints'], TOTAL=current['total'])
+        before = dict(previous['endpoints'], TOTAL=previous['total'])
+        for endpoint, stats in endpoints.items():
+            if endpoint not in before:
+                continue
+            self.stdout.write(
+                f'{endpoint:<28}{change(before[endpoint]["rps"], stats["rps"]):>12}'
+                f'{change(before[endpoint]["p95_ms"], stats["p95_ms"]):>12}'
+            )
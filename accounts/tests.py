@@ -1,3 +1,118 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from datetime import date
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from accounts.models import User
+from audit.models import AuditLog
+from bookings.models import Booking, RoomNight
+from payments.models import Payment
+from rooms.models import Room
+from rooms.availability import BLOCKING_STATUSES, availability_index
+from .management.commands.loadtest import percentile
 
-# Create your tests here.
+
+class GenerateLoadDataTest(TestCase):
+    """Test cases for the generate_load_data command"""
+
+    def generate(self):
+        call_command(
+            'generate_load_data', rooms=4, users=30, bookings=80, audit_logs=25,
+            seed=7, anchor_date='2024-06-01', chunk_size=16, stdout=StringIO()
+        )
+        return list(
+            Booking.objects.order_by('room__number', 'check_in_date').values_list(
+                'room__number', 'check_in_date', 'check_out_date', 'status', 'total_price'
+            )
+        )
+
+    def test_volumes_and_consistency(self):
+        self.generate()
+
+        self.assertEqual(Room.objects.count(), 4)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Booking.objects.count(), 80)
+        self.assertEqual(AuditLog.objects.count(), 25)
+        self.assertLessEqual(Payment.objects.count(), 80)
+
+        for room in Room.objects.all():
+            stays = list(room.bookings.order_by('check_in_date').values_list('check_in_date', 'check_out_date'))
+            for (_, previous_out), (next_in, _) in zip(stays, stays[1:]):
+                self.assertLessEqual(previous_out, next_in)
+
+        held = sum(
+            (check_out - check_in).days
+            for check_in, check_out in Booking.objects.filter(
+                status__in=BLOCKING_STATUSES
+            ).values_list('check_in_date', 'check_out_date')
+        )
+        self.assertEqual(RoomNight.objects.count(), held)
+
+        # Room status agrees with who is staying today
+        occupied = set(Booking.objects.filter(status='checked_in').values_list('room_id', flat=True))
+        self.assertTrue(occupied)
+        self.assertEqual(set(Room.objects.filter(status='booked').values_list('id', flat=True)), occupied)
+
+        # History is back-dated rather than stamped with the run time
+        self.assertLess(Booking.objects.order_by('created_at').first().created_at.date(), date(2024, 3, 1))
+
+    def test_same_seed_gives_same_data(self):
+        first = self.generate()
+        User.objects.all().delete()
+        Room.objects.all().delete()
+        self.assertEqual(self.generate(), first)
+
+
+class PercentileTest(TestCase):
+    """Test cases for the load test's nearest-rank percentile"""
+
+    def test_known_values(self):
+        samples = list(range(1, 101))
+        self.assertEqual([percentile(samples, f) for f in (0.5, 0.95, 0.99, 1.0)], [50, 95, 99, 100])
+        self.assertEqual(percentile(list(range(1, 21)), 0.95), 19)
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 2)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+# The harness talks to the app as localhost, which DEBUG allows outside tests
+@override_settings(ALLOWED_HOSTS=['localhost'])
+class LoadTestCommandTest(TransactionTestCase):
+    """Test cases for the loadtest command (needs committed data for its worker processes)"""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.addCleanup(availability_index.invalidate)
+        call_command(
+            'generate_load_data', rooms=5, users=20, bookings=40, audit_logs=0, seed=3, stdout=StringIO()
+        )
+
+    def test_in_process_run_writes_report(self):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        out = StringIO()
+        call_command('loadtest', workers=2, duration=30, requests=15, output=path, compare=None, stdout=out)
+
+        with open(path) as results:
+            report = json.load(results)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertGreaterEqual(report['total']['requests'], 30)
+        self.assertEqual(set(report['endpoints']['rooms.search']['statuses']), {'200'})
+        for stats in report['endpoints'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+            self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+        self.assertIn('TOTAL', out.getvalue())
+
+        # A second run can be compared against the first
+        out = StringIO()
+        call_command('loadtest', workers=1, duration=30, requests=5, mix='search=1', compare=path, stdout=out)
+        self.assertIn('Compared with', out.getvalue())
+
+    def test_rejects_unknown_scenario(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', mix='search=1,bogus=2', stdout=StringIO())
@@ -15,13 +15,8 @@ logger = logging.getLogger(__name__)
 @csrf_exempt
 def login_view(request):
     """User login view"""
-    logger.info("Template login view accessed")
-    logger.info(f"Request method: {request.method}")
-    logger.info(f"User authenticated: {request.user.is_authenticated}")
-    
     if request.user.is_authenticated:
         # Redirect based on user role
-        logger.info(f"User already authenticated: {request.user.email} with role {request.user.role}")
         if request.user.is_admin():
             return redirect('admin-dashboard')
         elif request.user.is_reception():
@@ -30,35 +25,24 @@ def login_view(request):
             return redirect('bookings:guest-booking')
     
     if request.method == 'POST':
-        logger.info("Processing POST login request")
-        logger.info(f"Request content type: {request.content_type}")
-        logger.info(f"Request body: {request.body}")
-        logger.info(f"Request POST data: {request.POST}")
-        
         try:
             # Parse JSON data from fetch request
             data = json.loads(request.body)
             email = data.get('email')
             password = data.get('password')
-            logger.info(f"Parsed JSON data - Email: {email}")
         except Exception as e:
-            logger.info("Not JSON data, using form data")
             # Handle form data from traditional POST
             email = request.POST.get('email')
             password = request.POST.get('password')
-            logger.info(f"Form data - Email: {email}")
         
         if email and password:
-            logger.info(f"Attempting authentication for email: {email}")
             user = authenticate(email=email, password=password)
-            logger.info(f"Authentication result: {'Success' if user else 'Failed'}")
             
             if user:
                 login(request, user)
-                logger.info(f"User {user.email} logged in successfully")
+                logger.info('User %s logged in', user.id)
                 # Return JSON response for AJAX requests
                 if request.content_type == 'application/json':
-                    logger.info("Returning JSON response for AJAX request")
                     # Determine the correct redirect URL based on user role
                     if user.is_admin():
                         redirect_url = '/dashboards/admin/'
@@ -75,7 +59,6 @@ def login_view(request):
                     })
                 # Redirect for traditional form submissions
                 else:
-                    logger.info("Returning redirect response for form submission")
                     if user.is_admin():
                         return redirect('admin-dashboard')
                     elif user.is_reception():
@@ -83,7 +66,7 @@ def login_view(request):
                     else:
                         return redirect('bookings:guest-booking')
             else:
-                logger.warning(f"Invalid credentials for email: {email}")
+                logger.warning('Failed login attempt')
                 # Return JSON response for AJAX requests
                 if request.content_type == 'application/json':
                     return JsonResponse({
@@ -107,7 +90,6 @@ def login_view(request):
                 messages.error(request, 'Email and password are required')
                 return render(request, 'registration/login.html')
     
-    logger.info("Rendering login template")
     return render(request, 'registration/login.html')
 
 
@@ -2,14 +2,16 @@ from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from .models import AuditLog
 from .serializers import AuditLogSerializer
+from hotel_management.pagination import CreatedAtCursorPagination
 
 class AuditLogListView(generics.ListAPIView):
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         user = self.request.user
-        queryset = AuditLog.objects.all()
+        queryset = AuditLog.objects.select_related('user')
         
         # Only admin should see all logs. Others should see only their own actions?
         # Or maybe Reception can see some? 
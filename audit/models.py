@@ -31,4 +31,8 @@ class AuditLog(models.Model):
         
     class Meta:
         db_table = 'audit_logs'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Cursor-paginated audit log list
+            models.Index(fields=['created_at', 'id'], name='audit_created_idx'),
+        ]
\ No newline at end of file
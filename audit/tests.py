@@ -1,3 +1,126 @@
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from .models import AuditLog
+from .writer import AuditWriter
 
-# Create your tests here.
+User = get_user_model()
+
+
+class AuditLogListTest(TestCase):
+    """Test cases for the audit log API"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            username='admin',
+            password='testpass123',
+            role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_cursor_pagination_walks_every_entry_once(self):
+        # Identical timestamps exercise the id tiebreaker
+        logs = AuditLog.objects.bulk_create([
+            AuditLog(user=self.admin, action='login', model_type='User', object_id=i, description=f'Entry {i}')
+            for i in range(5)
+        ])
+        AuditLog.objects.update(created_at=logs[0].created_at)
+
+        seen = []
+        url = '/api/audit/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(entry['object_id'] for entry in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, [4, 3, 2, 1, 0])
+
+
+class AuditWriterTest(TestCase):
+    """Test cases for the batched audit writer"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        # Long interval so only explicit flushes write
+        self.writer = AuditWriter(batch_size=10, flush_interval=60, asynchronous=True)
+        self.addCleanup(self.writer.close)
+
+    def log(self, object_id):
+        self.writer.log(
+            user=self.user, action='create', model_type='Booking',
+            object_id=object_id, description=f'Created booking {object_id}'
+        )
+
+    def test_entries_are_written_in_one_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                self.log(i)
+
+        self.assertEqual(self.writer.pending(), 5)
+        self.assertFalse(AuditLog.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.writer.flush(), 5)
+        self.assertEqual([q['sql'].split()[0] for q in queries if 'SAVEPOINT' not in q['sql']], ['INSERT'])
+        self.assertEqual(AuditLog.objects.count(), 5)
+        self.assertEqual(self.writer.pending(), 0)
+
+    def test_rolled_back_actions_are_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.log(1)
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(self.writer.pending(), 0)
+
+    def test_bad_entry_is_dropped_after_retries(self):
+        self.writer.max_retries = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            self.log(1)
+            # Violates NOT NULL, so the whole batch fails
+            self.writer.log(user=self.user, action='create', model_type='Booking', object_id=2, description=None)
+            self.log(3)
+
+        with self.assertLogs('audit.writer', 'ERROR') as logs:
+            self.assertEqual(self.writer.flush(), 0)
+            self.assertEqual(self.writer.pending(), 3)
+            # Second failure: written one by one, dropping only the bad entry
+            self.assertEqual(self.writer.flush(), 2)
+        self.assertIn('Dropping audit log entry', logs.output[-1])
+        self.assertEqual(self.writer.pending(), 0)
+        self.assertEqual(sorted(AuditLog.objects.values_list('object_id', flat=True)), [1, 3])
+
+    def test_queue_is_capped(self):
+        self.writer.max_pending = 3
+        with self.assertLogs('audit.writer', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    self.log(i)
+        self.assertEqual(self.writer.pending(), 3)
+        self.assertEqual(self.writer.flush(), 3)
+
+    def test_sync_mode_follows_the_setting(self):
+        writer = AuditWriter(flush_interval=60)
+        self.addCleanup(writer.close)
+        writer.log(user=self.user, action='create', model_type='Booking', object_id=1, description='Synchronous')
+        self.assertTrue(AuditLog.objects.filter(description='Synchronous').exists())
+
+        with override_settings(AUDIT_WRITER_SYNC=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                writer.log(user=self.user, action='create', model_type='Booking', object_id=2, description='Queued')
+        self.assertEqual(writer.pending(), 1)
+        self.assertEqual(writer.flush(), 1)
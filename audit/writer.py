@@ -0,0 +1,154 @@
+"""
+Batched audit log writer.
+
+``audit_writer.log(...)`` takes the ``AuditLog`` fields. Entries are queued
+when the transaction commits and a background thread bulk-inserts them; a
+failing batch is retried, then written row by row. With
+``AUDIT_WRITER_SYNC`` set (as in tests) entries are saved immediately.
+"""
+import atexit
+import logging
+import threading
+from collections import deque
+from functools import partial
+from django.conf import settings
+from django.db import connection, transaction
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    def __init__(self, batch_size=100, flush_interval=1.0, asynchronous=None,
+                 max_retries=3, max_pending=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self._asynchronous = asynchronous
+        self._failures = 0
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def asynchronous(self):
+        """Fixed at construction, or else read from ``AUDIT_WRITER_SYNC`` on every call"""
+        if self._asynchronous is not None:
+            return self._asynchronous
+        return not getattr(settings, 'AUDIT_WRITER_SYNC', False)
+
+    def log(self, **fields):
+        """Record an audit entry; accepts the ``AuditLog`` model fields"""
+        entry = AuditLog(**fields)
+        if not self.asynchronous:
+            entry.save()
+            return
+        # Actions that roll back never reach the log
+        transaction.on_commit(partial(self._enqueue, entry))
+
+    def log_many(self, entries):
+        """Record several entries (dicts of ``AuditLog`` fields) with one INSERT"""
+        entries = [AuditLog(**fields) for fields in entries]
+        if not entries:
+            return
+        if not self.asynchronous:
+            AuditLog.objects.bulk_create(entries)
+            return
+        transaction.on_commit(partial(self._enqueue_many, entries))
+
+    def pending(self):
+        return len(self._pending)
+
+    def _enqueue_many(self, entries):
+        room = self.max_pending - len(self._pending)
+        if room < len(entries):
+            room = max(room, 0)
+            logger.error('Audit log queue is full; dropping %d entries', len(entries) - room)
+            entries = entries[:room]
+        self._pending.extend(entries)
+        self._ensure_thread()
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _enqueue(self, entry):
+        self._enqueue_many([entry])
+
+    def _ensure_thread(self):
+        # Also restarts the worker in a forked child, where the thread is gone
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stopping:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self.flush()
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Write every buffered entry now; returns the number written"""
+        with self._flush_lock:
+            batch = []
+            while self._pending:
+                batch.append(self._pending.popleft())
+            if not batch:
+                return 0
+            try:
+                # Own transaction, so a failure never poisons a surrounding one
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            except Exception:
+                self._failures += 1
+                if self._failures < self.max_retries:
+                    # Keep the entries for the next attempt rather than losing them
+                    logger.exception('Failed to write %d audit log entries; will retry', len(batch))
+                    self._pending.extendleft(reversed(batch))
+                    return 0
+                return self._write_one_by_one(batch)
+            self._failures = 0
+            return len(batch)
+
+    def _write_one_by_one(self, batch):
+        """Last resort for a batch that keeps failing: drop only the bad entries"""
+        self._failures = 0
+        written = 0
+        for entry in batch:
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+                written += 1
+            except Exception:
+                logger.exception(
+                    'Dropping audit log entry that cannot be written: %s %s %s',
+                    entry.action, entry.model_type, entry.object_id
+                )
+        return written
+
+    def close(self):
+        """Stop the background thread and flush what is left"""
+        self._stopping = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+audit_writer = AuditWriter(
+    batch_size=getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 1.0),
+    max_retries=getattr(settings, 'AUDIT_LOG_MAX_RETRIES', 3),
+    max_pending=getattr(settings, 'AUDIT_LOG_MAX_PENDING', 10000),
+)
+atexit.register(audit_writer.close)
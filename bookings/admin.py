@@ -1,10 +1,36 @@
+from django import forms
 from django.contrib import admin
+from rooms.availability import BLOCKING_STATUSES
 from .models import Booking
+from .inventory import room_is_free, sync_room_nights
+
+
+class BookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        room = cleaned_data.get('room')
+        check_in = cleaned_data.get('check_in_date')
+        check_out = cleaned_data.get('check_out_date')
+        if (room and check_in and check_out and cleaned_data.get('status') in BLOCKING_STATUSES
+                and not room_is_free(room, check_in, check_out, exclude_booking=self.instance)):
+            raise forms.ValidationError('Room is not available for the selected dates')
+        return cleaned_data
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = ('id', 'guest', 'room', 'check_in_date', 'check_out_date', 'status', 'total_price', 'created_at')
     list_filter = ('status', 'check_in_date', 'check_out_date')
     search_fields = ('guest__username', 'guest__email', 'room__number')
-    ordering = ('-created_at',)
\ No newline at end of file
+    ordering = ('-created_at',)
+
+    def save_model(self, request, obj, form, change):
+        # Keep the room-night inventory in step, as the API views do; the
+        # admin wraps this in a transaction. Deleting cascades to the nights.
+        super().save_model(request, obj, form, change)
+        sync_room_nights(obj)
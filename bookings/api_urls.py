@@ -2,7 +2,8 @@ from django.urls import path
 from .api_views import (
     GuestBookingCreateView, GuestBookingListView,
     ReceptionBookingListView, ReceptionBookingCreateView,
-    ReceptionBookingStatusUpdateView, ReceptionBookingDetailView
+    ReceptionBookingStatusUpdateView, ReceptionBookingDetailView,
+    ReceptionBookingBulkStatusView
 )
 
 urlpatterns = [
@@ -12,4 +13,5 @@ urlpatterns = [
     path('reception/create/', ReceptionBookingCreateView.as_view(), name='reception-booking-create'),
     path('reception/<int:pk>/', ReceptionBookingDetailView.as_view(), name='reception-booking-detail'),
     path('reception/<int:pk>/status/', ReceptionBookingStatusUpdateView.as_view(), name='reception-booking-status-update'),
+    path('reception/bulk/status/', ReceptionBookingBulkStatusView.as_view(), name='reception-booking-bulk-status'),
 ]
\ No newline at end of file
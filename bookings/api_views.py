@@ -1,17 +1,24 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from .models import Booking
-from .serializers import BookingSerializer, BookingCreateSerializer, BookingStatusUpdateSerializer
+from .serializers import (
+    BookingSerializer, BookingCreateSerializer, BookingStatusUpdateSerializer, BookingBulkStatusSerializer
+)
+from .inventory import sync_room_nights
+from .services import InvalidTransition, StatusConflict, bulk_transition, transition_booking
 from rooms.models import Room
 from accounts.models import User
-from audit.models import AuditLog
+from audit.writer import audit_writer
+from hotel_management.pagination import CreatedAtCursorPagination
 
 
 class GuestBookingCreateView(generics.CreateAPIView):
     serializer_class = BookingCreateSerializer
     permission_classes = [IsAuthenticated]
     
+    @transaction.atomic
     def perform_create(self, serializer):
         # Set the guest to the current user
         booking = serializer.save(guest=self.request.user)
@@ -22,7 +29,7 @@ class GuestBookingCreateView(generics.CreateAPIView):
         room.save()
         
         # Log the action
-        AuditLog.objects.create(
+        audit_writer.log(
             user=self.request.user,
             action='create',
             model_type='Booking',
@@ -31,7 +38,7 @@ class GuestBookingCreateView(generics.CreateAPIView):
         )
         
         # Also log room status change
-        AuditLog.objects.create(
+        audit_writer.log(
             user=self.request.user,
             action='room_status_change',
             model_type='Room',
@@ -46,18 +53,28 @@ class GuestBookingListView(generics.ListAPIView):
     
     def get_queryset(self):
         # Guests can only see their own bookings
-        return Booking.objects.filter(guest=self.request.user)
+        return Booking.objects.with_details().filter(guest=self.request.user)
 
 
 class ReceptionBookingListView(generics.ListCreateAPIView):
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         # Reception staff can see all bookings
-        if self.request.user.is_reception():
-            return Booking.objects.all()
-        return Booking.objects.none()
+        if not self.request.user.is_reception():
+            return Booking.objects.none()
+        queryset = Booking.objects.with_details()
+
+        # Filtered here rather than in the browser, which only holds one page
+        booking_status = self.request.query_params.get('status')
+        if booking_status:
+            queryset = queryset.filter(status=booking_status)
+        room_number = self.request.query_params.get('room')
+        if room_number:
+            queryset = queryset.filter(room__number=room_number)
+        return queryset
 
 
 class ReceptionBookingCreateView(generics.CreateAPIView):
@@ -90,6 +107,7 @@ class ReceptionBookingCreateView(generics.CreateAPIView):
         
         return super().create(request, *args, **kwargs)
         
+    @transaction.atomic
     def perform_create(self, serializer):
         # Save with confirmed status for reception bookings
         booking = serializer.save(guest=self.guest, status='confirmed')
@@ -100,7 +118,7 @@ class ReceptionBookingCreateView(generics.CreateAPIView):
         room.save()
         
         # Log the actions
-        AuditLog.objects.create(
+        audit_writer.log(
             user=self.request.user,
             action='create',
             model_type='Booking',
@@ -108,7 +126,7 @@ class ReceptionBookingCreateView(generics.CreateAPIView):
             description=f'Reception created booking for room {booking.room.number}'
         )
         
-        AuditLog.objects.create(
+        audit_writer.log(
             user=self.request.user,
             action='room_status_change',
             model_type='Room',
@@ -118,7 +136,7 @@ class ReceptionBookingCreateView(generics.CreateAPIView):
 
 
 class ReceptionBookingStatusUpdateView(generics.UpdateAPIView):
-    queryset = Booking.objects.all()
+    queryset = Booking.objects.select_related('room')
     serializer_class = BookingStatusUpdateSerializer
     permission_classes = [IsAuthenticated]
     
@@ -129,53 +147,80 @@ class ReceptionBookingStatusUpdateView(generics.UpdateAPIView):
             }, status=status.HTTP_403_FORBIDDEN)
             
         booking = self.get_object()
-        old_status = booking.status
-        response = super().update(request, *args, **kwargs)
-        
-        # If status changed to 'checked_in', update room status
-        if booking.status == 'checked_in' and old_status != 'checked_in':
-            room = booking.room
-            room.status = 'booked'
-            room.save()
-            
-            # Log room status change
-            AuditLog.objects.create(
-                user=request.user,
-                action='room_status_change',
-                model_type='Room',
-                object_id=room.id,
-                description=f'Changed room {room.number} status to booked (check-in)'
-            )
-            
-        # If status changed to 'checked_out', update room status
-        elif booking.status == 'checked_out' and old_status != 'checked_out':
-            room = booking.room
-            room.status = 'dispo'
-            room.save()
-            
-            # Log room status change
-            AuditLog.objects.create(
-                user=request.user,
-                action='room_status_change',
-                model_type='Room',
-                object_id=room.id,
-                description=f'Changed room {room.number} status to available (check-out)'
-            )
-            
-        # Log booking status change
-        AuditLog.objects.create(
-            user=request.user,
-            action='booking_status_change',
-            model_type='Booking',
-            object_id=booking.id,
-            description=f'Changed booking status from {old_status} to {booking.status}'
-        )
+        serializer = self.get_serializer(booking, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data.get('status')
+        if new_status is None:
+            return Response({
+                'error': 'status is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # The lifecycle service checks the move and updates the room,
+        # inventory and audit trail in one transaction
+        try:
+            transition_booking(booking, new_status, request.user)
+        except InvalidTransition as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except StatusConflict:
+            return Response({
+                'error': 'Booking was updated by someone else; reload and try again'
+            }, status=status.HTTP_409_CONFLICT)
         
-        return response
+        return Response(self.get_serializer(booking).data)
+
+
+class ReceptionBookingBulkStatusView(generics.GenericAPIView):
+    serializer_class = BookingBulkStatusSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_reception():
+            return Response({
+                'error': 'Only reception staff can update booking status'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return bulk_transition_response(
+            serializer.validated_data['booking_ids'],
+            serializer.validated_data['status'],
+            request.user
+        )
+
+
+def bulk_transition_response(booking_ids, new_status, user):
+    """Apply ``bulk_transition`` and report the outcome for each booking"""
+    try:
+        results = bulk_transition(booking_ids, new_status, user)
+    except StatusConflict:
+        return Response({
+            'error': 'Bookings were updated by someone else; reload and try again'
+        }, status=status.HTTP_409_CONFLICT)
+    
+    report = []
+    for result in results:
+        booking = result.get('booking')
+        if booking is None:
+            report.append({'booking_id': result['booking_id'], 'error': result['error']})
+        else:
+            report.append({
+                'booking_id': booking.id,
+                'status': booking.status,
+                'room_number': booking.room.number
+            })
+    updated = sum('error' not in entry for entry in report)
+    return Response({
+        'status': new_status,
+        'updated': updated,
+        'failed': len(report) - updated,
+        'results': report
+    })
 
 
 class ReceptionBookingDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Booking.objects.all()
+    queryset = Booking.objects.with_details()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
     
@@ -186,6 +231,11 @@ class ReceptionBookingDetailView(generics.RetrieveUpdateDestroyAPIView):
             }, status=status.HTTP_403_FORBIDDEN)
         return super().update(request, *args, **kwargs)
         
+    @transaction.atomic
+    def perform_update(self, serializer):
+        booking = serializer.save()
+        sync_room_nights(booking)
+        
     def destroy(self, request, *args, **kwargs):
         if not request.user.is_reception():
             return Response({
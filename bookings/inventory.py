@@ -0,0 +1,66 @@
+"""
+Room-night inventory maintenance.
+
+Confirmed and checked-in bookings hold one ``RoomNight`` row per night. These
+helpers are called inside the same transaction as the booking write so the
+inventory never drifts from the bookings table, and the unique (room, date)
+constraint turns a double-booking into an IntegrityError.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from rooms.availability import BLOCKING_STATUSES
+from .models import RoomNight
+
+
+def booking_nights(booking):
+    nights = (booking.check_out_date - booking.check_in_date).days
+    return [booking.check_in_date + timedelta(days=i) for i in range(nights)]
+
+
+def claim_room_nights(booking):
+    """Replace the nights held by a booking with its current room and dates"""
+    nights = [
+        RoomNight(room_id=booking.room_id, date=night, booking=booking)
+        for night in booking_nights(booking)
+    ]
+    try:
+        with transaction.atomic():
+            RoomNight.objects.filter(booking=booking).delete()
+            RoomNight.objects.bulk_create(nights)
+    except IntegrityError:
+        raise serializers.ValidationError("Room is not available for the selected dates")
+
+
+def release_room_nights(booking):
+    RoomNight.objects.filter(booking=booking).delete()
+
+
+def sync_room_nights(booking):
+    """Claim or release a booking's nights to match its status"""
+    if booking.status in BLOCKING_STATUSES:
+        claim_room_nights(booking)
+    else:
+        release_room_nights(booking)
+
+
+def room_is_free(room, check_in, check_out, exclude_booking=None):
+    """True if no night in the range is held, ignoring ``exclude_booking``'s own nights"""
+    nights = RoomNight.objects.filter(
+        room=room,
+        date__gte=check_in,
+        date__lt=check_out
+    )
+    if exclude_booking is not None and exclude_booking.pk is not None:
+        nights = nights.exclude(booking=exclude_booking)
+    return not nights.exists()
+
+
+def held_room_ids(check_in, check_out):
+    """Subquery of rooms with at least one held night in the range"""
+    return RoomNight.objects.filter(
+        date__gte=check_in,
+        date__lt=check_out
+    ).values('room_id')
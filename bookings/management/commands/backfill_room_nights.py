@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from bookings.models import Booking, RoomNight
+from bookings.inventory import booking_nights
+from rooms.availability import BLOCKING_STATUSES
+
+
+class Command(BaseCommand):
+    help = 'Backfill the room-night inventory from existing confirmed and checked-in bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Bookings processed per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        bookings = Booking.objects.filter(status__in=BLOCKING_STATUSES).order_by('id').only(
+            'id', 'room_id', 'check_in_date', 'check_out_date'
+        )
+        before = RoomNight.objects.count()
+        processed = 0
+        last_id = 0
+
+        while True:
+            chunk = list(bookings.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            nights = [
+                RoomNight(room_id=booking.room_id, date=night, booking_id=booking.id)
+                for booking in chunk
+                for night in booking_nights(booking)
+            ]
+            # Nights already claimed (or double-booked in legacy data) are skipped
+            with transaction.atomic():
+                RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+            processed += len(chunk)
+            last_id = chunk[-1].id
+            self.stdout.write(f'Processed {processed} bookings')
+
+        created = RoomNight.objects.count() - before
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfill completed: {created} room-nights created from {processed} bookings')
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='bookings.booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='rooms.room')),
+            ],
+            options={
+                'db_table': 'room_nights',
+                'ordering': ['room', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='unique_room_night')],
+            },
+        ),
+    ]
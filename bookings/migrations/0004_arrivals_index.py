@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_query_indexes'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'check_in_date'], name='booking_status_checkin_idx'),
+        ),
+    ]
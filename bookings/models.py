@@ -1,8 +1,24 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.conf import settings
 from rooms.models import Room
 
 
+class BookingQuerySet(models.QuerySet):
+    def with_details(self):
+        """
+        Join the guest and room and annotate the latest payment so that
+        serializing a list of bookings costs a single query
+        """
+        from payments.models import Payment
+
+        latest_payment = Payment.objects.filter(booking=OuterRef('pk')).order_by('-created_at', '-id')
+        return self.select_related('guest', 'room').annotate(
+            latest_payment_status=Subquery(latest_payment.values('status')[:1]),
+            latest_payment_amount=Subquery(latest_payment.values('amount')[:1]),
+        )
+
+
 class Booking(models.Model):
     """
     Booking model for guest reservations
@@ -25,9 +41,52 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     def __str__(self):
         return f"Booking {self.id} - {self.guest.username} - Room {self.room.number}"
         
     class Meta:
         db_table = 'bookings'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Overlap check for one room: room, status IN (...), check_in < X, check_out > Y
+            models.Index(
+                fields=['room', 'status', 'check_in_date', 'check_out_date'],
+                name='booking_room_overlap_idx'
+            ),
+            # Blocking bookings still running after a date (availability index, analytics),
+            # and status breakdowns
+            models.Index(fields=['status', 'check_out_date'], name='booking_status_checkout_idx'),
+            # Arrivals on a date (front-desk board)
+            models.Index(fields=['status', 'check_in_date'], name='booking_status_checkin_idx'),
+            # Cursor-paginated lists and trend buckets
+            models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+            models.Index(fields=['guest', 'created_at'], name='booking_guest_created_idx'),
+            # Recent activity
+            models.Index(fields=['updated_at'], name='booking_updated_idx'),
+        ]
+
+
+class RoomNight(models.Model):
+    """
+    Inventory of room-nights held by confirmed or checked-in bookings.
+    The unique (room, date) constraint makes the database reject double-bookings.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='nights')
+    date = models.DateField()
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='nights')
+
+    def __str__(self):
+        return f"Room {self.room_id} on {self.date} - Booking {self.booking_id}"
+
+    class Meta:
+        db_table = 'room_nights'
+        ordering = ['room', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='unique_room_night'),
+        ]
+        indexes = [
+            # Rooms holding any night in a date range
+            models.Index(fields=['date', 'room'], name='room_night_date_idx'),
+        ]
@@ -1,6 +1,10 @@
 from rest_framework import serializers
+from django.db import transaction
 from .models import Booking
+from .inventory import room_is_free, sync_room_nights
+from .services import MAX_BULK_BOOKINGS
 from rooms.models import Room
+from rooms.availability import get_index
 from accounts.models import User
 
 
@@ -13,10 +17,29 @@ class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = '__all__'
-        read_only_fields = ('guest', 'total_price')
+        # Status changes go through bookings.services.transition_booking
+        read_only_fields = ('guest', 'total_price', 'status')
+
+    def validate(self, attrs):
+        # Refuse rather than silently ignore an attempted status change
+        requested = self.initial_data.get('status')
+        current = self.instance.status if self.instance is not None else 'pending'
+        if requested is not None and requested != current:
+            raise serializers.ValidationError({
+                'status': 'Change the status with PATCH /api/bookings/reception/<id>/status/'
+            })
+        return super().validate(attrs)
 
     def get_payment(self, obj):
-        payment = obj.payments.last()
+        # Use the annotations from Booking.objects.with_details() when present
+        if hasattr(obj, 'latest_payment_status'):
+            if obj.latest_payment_status is None:
+                return None
+            return {
+                'status': obj.latest_payment_status,
+                'amount': obj.latest_payment_amount
+            }
+        payment = obj.payments.order_by('-created_at', '-id').first()
         if payment:
             return {
                 'status': payment.status,
@@ -39,15 +62,16 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if check_in >= check_out:
             raise serializers.ValidationError("Check-out date must be after check-in date")
             
-        # Check for overlapping bookings
-        overlapping_bookings = Booking.objects.filter(
-            room=room,
-            status__in=['confirmed', 'checked_in'],
-            check_in_date__lt=check_out,
-            check_out_date__gt=check_in
-        )
-        
-        if overlapping_bookings.exists():
+        # Check the availability index first, falling back to the database
+        # for dates outside its horizon
+        available = get_index().is_available(room.id, check_in, check_out)
+        if available is False:
+            raise serializers.ValidationError("Room is not available for the selected dates")
+        if available:
+            return attrs
+            
+        # Check the room-night inventory for any held night in the range
+        if not room_is_free(room, check_in, check_out):
             raise serializers.ValidationError("Room is not available for the selected dates")
             
         return attrs
@@ -65,10 +89,28 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if 'status' not in validated_data:
             validated_data['status'] = 'pending'
         
-        return super().create(validated_data)
+        # Lock the room so concurrent bookings for it are checked and
+        # inserted one at a time, then re-check availability under the lock
+        # and hold the room-nights in the same transaction as the booking
+        with transaction.atomic():
+            Room.objects.select_for_update().only('id').get(pk=room.pk)
+            if not room_is_free(room, check_in, check_out):
+                raise serializers.ValidationError("Room is not available for the selected dates")
+            booking = super().create(validated_data)
+            sync_room_nights(booking)
+        return booking
 
 
 class BookingStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
-        fields = ('status',)
\ No newline at end of file
+        fields = ('status',)
+
+
+class BookingBulkStatusSerializer(serializers.Serializer):
+    booking_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_BOOKINGS
+    )
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES)
@@ -0,0 +1,284 @@
+"""
+Booking lifecycle.
+
+Every status change goes through ``transition_booking``, which checks the
+move against ``TRANSITIONS`` and applies the booking status, the room status,
+the room-night inventory and the audit entries in one transaction, writing
+only the columns that change. A check-in costs one UPDATE per row plus the
+audit INSERTs; a check-out or cancellation adds one DELETE of the held nights.
+
+``bulk_transition`` applies one move to a batch of bookings with a fixed
+number of statements whatever the batch size: one locking SELECT, an UPDATE
+per starting status, one UPDATE of the rooms, one inventory write and one
+INSERT of audit rows. After commit, the availability index re-reads the rooms
+whose nights changed in one batch (see ``rooms.signals``).
+
+Status writes are compare-and-set: ``UPDATE ... WHERE status = <the status
+that was read>``. When two requests race, the one whose UPDATE matches no row
+lost and gets ``StatusConflict`` instead of silently overwriting the winner.
+"""
+from collections import namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from rest_framework import serializers
+
+from audit.writer import audit_writer
+from rooms.availability import BLOCKING_STATUSES
+from rooms.models import Room
+from .inventory import booking_nights, claim_room_nights, release_room_nights
+from .models import Booking, RoomNight
+
+# ``room_status``: status the room takes on, or None to leave it alone.
+# ``label``: how the audit trail names the step, if it has a name.
+Transition = namedtuple('Transition', ['room_status', 'label'])
+
+TRANSITIONS = {
+    ('pending', 'confirmed'): Transition(None, None),
+    ('pending', 'cancelled'): Transition(None, None),
+    ('confirmed', 'checked_in'): Transition('booked', 'check-in'),
+    ('confirmed', 'cancelled'): Transition(None, None),
+    ('checked_in', 'checked_out'): Transition('dispo', 'check-out'),
+}
+
+# How audit descriptions name a room status
+ROOM_STATUS_NAMES = {'dispo': 'available'}
+
+# Most bookings one ``bulk_transition`` call accepts
+MAX_BULK_BOOKINGS = 200
+
+
+class InvalidTransition(Exception):
+    """The booking cannot move from its current status to the requested one"""
+
+
+class StatusConflict(Exception):
+    """The row's status changed between reading it and writing the new one"""
+
+
+def compare_and_set_status(instance, expected, new_status):
+    """
+    Set ``instance.status`` to ``new_status`` only if the row still has
+    ``expected``, with a single conditional UPDATE. Raises ``StatusConflict``
+    when no row matched. Queryset updates skip model signals, so post_save is
+    sent by hand for the availability index, dashboard caches and live feed.
+    """
+    model = type(instance)
+    now = timezone.now()
+    updated = model.objects.filter(pk=instance.pk, status=expected).update(status=new_status, updated_at=now)
+    if not updated:
+        raise StatusConflict(f'{model.__name__} {instance.pk} is no longer {expected}')
+    instance.status = new_status
+    instance.updated_at = now
+    send_status_saved(instance)
+
+
+def send_status_saved(instance):
+    """Send the post_save a ``save(update_fields=['status', 'updated_at'])`` would"""
+    model = type(instance)
+    post_save.send(
+        sender=model, instance=instance, created=False,
+        update_fields=frozenset({'status', 'updated_at'}), raw=False, using=model.objects.db
+    )
+
+
+def allowed_transitions(status):
+    return [new for old, new in TRANSITIONS if old == status]
+
+
+def check_transition(old_status, new_status):
+    """Return the table entry for the move or raise ``InvalidTransition``"""
+    transition = TRANSITIONS.get((old_status, new_status))
+    if transition is None:
+        allowed = ', '.join(allowed_transitions(old_status)) or 'none'
+        raise InvalidTransition(
+            f'Cannot change booking status from {old_status} to {new_status} (allowed: {allowed})'
+        )
+    return transition
+
+
+def transition_booking(booking, new_status, user):
+    """
+    Move ``booking`` (with its room loaded) to ``new_status`` on behalf of
+    ``user``. Raises ``InvalidTransition`` for a move the table does not allow
+    and ``StatusConflict`` if another request changed the booking first.
+    """
+    old_status = booking.status
+    transition = check_transition(old_status, new_status)
+    old_room_status = booking.room.status if transition.room_status else None
+    try:
+        with transaction.atomic():
+            apply_transition(booking, old_status, new_status, transition, user)
+    except Exception:
+        # The rollback undid the rows; undo the in-memory changes too
+        booking.status = old_status
+        if old_room_status is not None:
+            booking.room.status = old_room_status
+        raise
+    return transition
+
+
+def apply_transition(booking, old_status, new_status, transition, user):
+    """The writes behind ``transition_booking``; runs inside its transaction"""
+    compare_and_set_status(booking, old_status, new_status)
+
+    # Nights stay held between confirmed and checked-in; only entering or
+    # leaving a blocking status touches the inventory
+    if new_status in BLOCKING_STATUSES and old_status not in BLOCKING_STATUSES:
+        claim_room_nights(booking)
+    elif old_status in BLOCKING_STATUSES and new_status not in BLOCKING_STATUSES:
+        release_room_nights(booking)
+
+    audit_writer.log(**booking_audit_entry(booking, old_status, transition, user))
+
+    if transition.room_status is not None:
+        room = booking.room
+        room.status = transition.room_status
+        # The booking's conditional UPDATE already settled any race
+        room.save(update_fields=['status', 'updated_at'])
+        audit_writer.log(**room_audit_entry(room, transition, user))
+
+
+def booking_audit_entry(booking, old_status, transition, user):
+    suffix = f' ({transition.label})' if transition.label else ''
+    return {
+        'user': user,
+        'action': 'booking_status_change',
+        'model_type': 'Booking',
+        'object_id': booking.id,
+        'description': f'Changed booking status from {old_status} to {booking.status}{suffix}',
+    }
+
+
+def room_audit_entry(room, transition, user):
+    suffix = f' ({transition.label})' if transition.label else ''
+    return {
+        'user': user,
+        'action': 'room_status_change',
+        'model_type': 'Room',
+        'object_id': room.id,
+        'description': (
+            f'Changed room {room.number} status to '
+            f'{ROOM_STATUS_NAMES.get(room.status, room.status)}{suffix}'
+        ),
+    }
+
+
+def bulk_transition(booking_ids, new_status, user):
+    """
+    Move every booking in ``booking_ids`` to ``new_status`` in one
+    transaction. Bookings that are missing, cannot make the move or whose
+    nights are taken are skipped; the rest are written together. Returns one
+    result per distinct id, in request order: the booking with its room, or
+    an error message.
+    """
+    booking_ids = list(dict.fromkeys(booking_ids))
+    if len(booking_ids) > MAX_BULK_BOOKINGS:
+        raise ValueError(f'At most {MAX_BULK_BOOKINGS} bookings can be changed at once')
+
+    with transaction.atomic():
+        # Locked until commit, so the statuses read here are the ones replaced
+        # (guest and room loaded for the activity feed and the response)
+        bookings = (
+            Booking.objects.select_related('guest', 'room')
+            .select_for_update(of=('self',))
+            .in_bulk(booking_ids)
+        )
+        errors = {}
+        accepted = []
+        for booking_id in booking_ids:
+            booking = bookings.get(booking_id)
+            if booking is None:
+                errors[booking_id] = 'Booking not found'
+                continue
+            try:
+                accepted.append((booking, check_transition(booking.status, new_status)))
+            except InvalidTransition as e:
+                errors[booking_id] = str(e)
+
+        claiming = [booking for booking, _ in accepted
+                    if new_status in BLOCKING_STATUSES and booking.status not in BLOCKING_STATUSES]
+        for booking in claim_nights_in_bulk(claiming):
+            errors[booking.id] = 'Room is not available for the selected dates'
+        accepted = [(booking, transition) for booking, transition in accepted if booking.id not in errors]
+        if accepted:
+            apply_bulk_transition(accepted, new_status, user)
+
+    return [
+        {'booking_id': booking_id, 'error': errors[booking_id]} if booking_id in errors
+        else {'booking_id': booking_id, 'booking': bookings[booking_id]}
+        for booking_id in booking_ids
+    ]
+
+
+def claim_nights_in_bulk(bookings):
+    """
+    Claim the nights of ``bookings`` with one INSERT. If any night is taken,
+    fall back to claiming booking by booking and return those that failed.
+    """
+    if not bookings:
+        return []
+    try:
+        with transaction.atomic():
+            RoomNight.objects.filter(booking__in=bookings).delete()
+            RoomNight.objects.bulk_create([
+                RoomNight(room_id=booking.room_id, date=night, booking=booking)
+                for booking in bookings
+                for night in booking_nights(booking)
+            ])
+        return []
+    except IntegrityError:
+        pass
+    failed = []
+    for booking in bookings:
+        try:
+            claim_room_nights(booking)
+        except serializers.ValidationError:
+            failed.append(booking)
+    return failed
+
+
+def apply_bulk_transition(accepted, new_status, user):
+    """The writes behind ``bulk_transition``; runs inside its transaction"""
+    now = timezone.now()
+    by_status = {}
+    for booking, _ in accepted:
+        by_status.setdefault(booking.status, []).append(booking.id)
+    for old_status, ids in by_status.items():
+        updated = Booking.objects.filter(pk__in=ids, status=old_status).update(status=new_status, updated_at=now)
+        if updated != len(ids):
+            # Cannot happen while the rows are locked; refuse to half-apply
+            raise StatusConflict(f'{len(ids) - updated} bookings are no longer {old_status}')
+
+    releasing = [booking.id for booking, _ in accepted
+                 if booking.status in BLOCKING_STATUSES and new_status not in BLOCKING_STATUSES]
+    if releasing:
+        RoomNight.objects.filter(booking_id__in=releasing).delete()
+
+    rooms = {}
+    audit_entries = []
+    for booking, transition in accepted:
+        old_status = booking.status
+        booking.status = new_status
+        booking.updated_at = now
+        audit_entries.append(booking_audit_entry(booking, old_status, transition, user))
+        if transition.room_status is not None:
+            room = booking.room
+            room.status = transition.room_status
+            room.updated_at = now
+            rooms[room.id] = room
+            audit_entries.append(room_audit_entry(room, transition, user))
+
+    room_ids_by_status = {}
+    for room in rooms.values():
+        room_ids_by_status.setdefault(room.status, []).append(room.id)
+    for room_status, ids in room_ids_by_status.items():
+        Room.objects.filter(pk__in=ids).update(status=room_status, updated_at=now)
+    audit_writer.log_many(audit_entries)
+
+    # Queryset updates skip signals; send them so caches and feeds follow
+    for booking, _ in accepted:
+        send_status_saved(booking)
+    for room in rooms.values():
+        send_status_saved(room)
@@ -32,7 +32,9 @@ class BookingAPITest(APITestCase):
         # Create room
         self.room = Room.objects.create(
             number='101',
-            room_type='Single',
+            name='Single',
+            floor=1,
+            capacity=2,
             price_per_night=Decimal('100.00'),
             status='dispo',
             description='Test room'
@@ -0,0 +1,93 @@
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection
+from django.test import TransactionTestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from bookings.models import Booking, RoomNight
+from rooms.models import Room
+from rooms.availability import availability_index
+from datetime import date, timedelta
+from decimal import Decimal
+
+User = get_user_model()
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    """Stress test booking creation under parallel requests"""
+
+    requests = 300
+    workers = 16
+
+    def setUp(self):
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        self.rooms = [
+            Room.objects.create(
+                number=str(100 + i), name='Room', floor=1, capacity=2,
+                price_per_night=Decimal('100.00')
+            )
+            for i in range(3)
+        ]
+
+    def create_booking(self, payload):
+        try:
+            client = APIClient()
+            client.force_authenticate(user=self.reception)
+            return client.post('/api/bookings/reception/create/', payload, format='json').status_code
+        finally:
+            connection.close()
+
+    def test_parallel_creates_never_overlap(self):
+        rng = random.Random(7)
+        start = date.today() + timedelta(days=1)
+        payloads = []
+        for _ in range(self.requests):
+            check_in = start + timedelta(days=rng.randint(0, 20))
+            payloads.append({
+                'guest_email': self.guest.email,
+                'room': rng.choice(self.rooms).id,
+                'check_in_date': str(check_in),
+                'check_out_date': str(check_in + timedelta(days=rng.randint(1, 4))),
+                'num_guests': 1
+            })
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            statuses = list(pool.map(self.create_booking, payloads))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(set(statuses) - {201, 400}, set())
+        created = statuses.count(201)
+        self.assertGreater(created, 0)
+        self.assertEqual(Booking.objects.count(), created)
+
+        for room in self.rooms:
+            bookings = sorted(
+                Booking.objects.filter(room=room).values_list('check_in_date', 'check_out_date')
+            )
+            for (_, previous_out), (next_in, _) in zip(bookings, bookings[1:]):
+                self.assertLessEqual(previous_out, next_in)
+
+        held = sum((out - in_).days for in_, out in Booking.objects.values_list('check_in_date', 'check_out_date'))
+        self.assertEqual(RoomNight.objects.count(), held)
+
+        sys.stderr.write(
+            f'\n{self.requests} concurrent creates: {created} accepted, '
+            f'{self.requests - created} rejected, {self.requests / elapsed:.0f} req/s\n'
+        )
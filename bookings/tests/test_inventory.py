@@ -0,0 +1,166 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from bookings.models import Booking, RoomNight
+from rooms.models import Room
+from rooms.availability import availability_index
+from datetime import date, timedelta
+from decimal import Decimal
+
+User = get_user_model()
+
+
+class RoomNightInventoryTest(TestCase):
+    """Test cases for the room-night inventory"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        self.room = Room.objects.create(
+            number='101',
+            name='Single',
+            floor=1,
+            capacity=2,
+            price_per_night=Decimal('100.00')
+        )
+        self.check_in = date.today() + timedelta(days=1)
+        self.check_out = date.today() + timedelta(days=3)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+
+    def create_reception_booking(self):
+        return self.client.post('/api/bookings/reception/create/', {
+            'guest_email': self.guest.email,
+            'room': self.room.id,
+            'check_in_date': str(self.check_in),
+            'check_out_date': str(self.check_out),
+            'num_guests': 1
+        }, format='json')
+
+    def test_reception_booking_claims_nights(self):
+        """A confirmed booking holds one row per night"""
+        response = self.create_reception_booking()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        nights = list(RoomNight.objects.values_list('room_id', 'date'))
+        self.assertEqual(nights, [
+            (self.room.id, self.check_in),
+            (self.room.id, self.check_in + timedelta(days=1)),
+        ])
+
+    def test_pending_booking_holds_no_nights(self):
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.post('/api/bookings/guest/create/', {
+            'room': self.room.id,
+            'check_in_date': str(self.check_in),
+            'check_out_date': str(self.check_out),
+            'num_guests': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(RoomNight.objects.exists())
+
+    def test_database_rejects_double_booking(self):
+        self.create_reception_booking()
+        other = Booking.objects.create(
+            guest=self.guest, room=self.room, check_in_date=self.check_in,
+            check_out_date=self.check_out, num_guests=1,
+            total_price=Decimal('200.00'), status='confirmed'
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RoomNight.objects.create(room=self.room, date=self.check_in, booking=other)
+
+    def test_overlapping_booking_is_rejected(self):
+        self.create_reception_booking()
+        response = self.create_reception_booking()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_cancel_releases_nights(self):
+        self.create_reception_booking()
+        booking = Booking.objects.get()
+
+        response = self.client.patch(
+            f'/api/bookings/reception/{booking.id}/status/', {'status': 'cancelled'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(RoomNight.objects.exists())
+
+    def test_backfill_command(self):
+        for status_choice, offset in (('confirmed', 0), ('checked_in', 5), ('checked_out', 10)):
+            Booking.objects.create(
+                guest=self.guest, room=self.room,
+                check_in_date=self.check_in + timedelta(days=offset),
+                check_out_date=self.check_out + timedelta(days=offset),
+                num_guests=1, total_price=Decimal('200.00'), status=status_choice
+            )
+
+        call_command('backfill_room_nights', chunk_size=1, stdout=StringIO())
+        self.assertEqual(RoomNight.objects.count(), 4)
+
+        # Running it again is a no-op
+        call_command('backfill_room_nights', stdout=StringIO())
+        self.assertEqual(RoomNight.objects.count(), 4)
+
+    def admin_change(self, booking, **changes):
+        admin = User.objects.filter(is_superuser=True).first() or User.objects.create_superuser(
+            email='admin@test.com', username='admin', password='testpass123'
+        )
+        self.client.force_login(admin)
+        data = {
+            'guest': booking.guest_id,
+            'room': booking.room_id,
+            'check_in_date': str(booking.check_in_date),
+            'check_out_date': str(booking.check_out_date),
+            'num_guests': booking.num_guests,
+            'total_price': str(booking.total_price),
+            'status': booking.status,
+        }
+        data.update(changes)
+        return self.client.post(f'/admin/bookings/booking/{booking.id}/change/', data)
+
+    def test_admin_edits_keep_nights_in_step(self):
+        self.create_reception_booking()
+        booking = Booking.objects.get()
+
+        later = self.check_out + timedelta(days=1)
+        response = self.admin_change(booking, check_out_date=str(later))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(RoomNight.objects.filter(booking=booking).count(), 3)
+
+        booking.refresh_from_db()
+        response = self.admin_change(booking, status='cancelled')
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(RoomNight.objects.exists())
+
+    def test_admin_cannot_double_book(self):
+        self.create_reception_booking()
+        other = Booking.objects.create(
+            guest=self.guest, room=self.room,
+            check_in_date=self.check_in, check_out_date=self.check_out,
+            num_guests=1, total_price=Decimal('200.00'), status='pending'
+        )
+        response = self.admin_change(other, status='confirmed')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Room is not available for the selected dates')
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'pending')
+        self.assertFalse(RoomNight.objects.filter(booking=other).exists())
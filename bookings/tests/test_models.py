@@ -22,7 +22,9 @@ class BookingModelTest(TestCase):
         
         self.room = Room.objects.create(
             number='101',
-            room_type='Single',
+            name='Single',
+            floor=1,
+            capacity=2,
             price_per_night=Decimal('100.00'),
             status='dispo',
             description='Test room'
@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from bookings.models import Booking
+from payments.models import Payment
+from rooms.models import Room
+from datetime import date, timedelta
+from decimal import Decimal
+
+User = get_user_model()
+
+
+class BookingListQueryCountTest(TestCase):
+    """The booking list endpoints must not issue per-row queries"""
+
+    def setUp(self):
+        self.reception = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+        self.created = 0
+
+    def add_bookings(self, count):
+        for _ in range(count):
+            self.created += 1
+            guest = User.objects.create_user(
+                email=f'guest{self.created}@test.com',
+                username=f'guest{self.created}',
+                password='testpass123'
+            )
+            room = Room.objects.create(
+                number=str(100 + self.created), name='Room', floor=1, capacity=2,
+                price_per_night=Decimal('100.00')
+            )
+            booking = Booking.objects.create(
+                guest=guest, room=room,
+                check_in_date=date.today() + timedelta(days=1),
+                check_out_date=date.today() + timedelta(days=3),
+                num_guests=1, total_price=Decimal('200.00'), status='confirmed'
+            )
+            for suffix, payment_status in (('a', 'failed'), ('b', 'completed')):
+                Payment.objects.create(
+                    booking=booking, amount=Decimal('200.00'), payment_method='cash',
+                    status=payment_status, transaction_id=f'TX{self.created}{suffix}'
+                )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/bookings/reception/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_reception_list_query_count_is_constant(self):
+        self.add_bookings(2)
+        small, _ = self.count_list_queries()
+        self.add_bookings(8)
+        large, response = self.count_list_queries()
+
+        self.assertEqual(small, large)
+        self.assertEqual(large, 1)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_latest_payment_is_reported(self):
+        self.add_bookings(1)
+        _, response = self.count_list_queries()
+        booking = response.data['results'][0]
+        self.assertEqual(booking['payment']['status'], 'completed')
+        self.assertEqual(booking['payment']['amount'], Decimal('200.00'))
+        self.assertEqual(booking['room_number'], '101')
+        self.assertEqual(booking['guest_email'], 'guest1@test.com')
+
+    def test_list_is_filtered_on_the_server(self):
+        self.add_bookings(3)
+        Booking.objects.filter(room__number='102').update(status='cancelled')
+
+        response = self.client.get('/api/bookings/reception/', {'status': 'cancelled'})
+        self.assertEqual([booking['room_number'] for booking in response.data['results']], ['102'])
+        response = self.client.get('/api/bookings/reception/', {'room': '103', 'status': 'confirmed'})
+        self.assertEqual([booking['room_number'] for booking in response.data['results']], ['103'])
+        response = self.client.get('/api/bookings/reception/', {'room': '103', 'status': 'cancelled'})
+        self.assertEqual(response.data['results'], [])
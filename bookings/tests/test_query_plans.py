@@ -0,0 +1,144 @@
+import re
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from audit.models import AuditLog
+from bookings.models import Booking
+from payments.models import Payment
+from rooms.models import Room
+from rooms.availability import availability_index
+from dashboard.activity import activity_feed
+from datetime import timedelta
+from decimal import Decimal
+
+User = get_user_model()
+
+# Small dimension tables that hot paths may read in full
+SMALL_TABLES = {'rooms', 'users'}
+
+
+class QueryPlanTest(TestCase):
+    """
+    Run EXPLAIN QUERY PLAN on every SELECT issued by the hot paths and fail
+    if any of them reads a large table without an index. Whole-table
+    aggregates that are cached (the reception stats) are not covered.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        availability_index.invalidate()
+        self.addCleanup(availability_index.invalidate)
+        activity_feed.reset()
+        self.addCleanup(activity_feed.reset)
+
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', role='admin'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com', username='reception', password='testpass123', role='reception'
+        )
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        self.rooms = [
+            Room.objects.create(
+                number=str(101 + i), name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+            )
+            for i in range(3)
+        ]
+        self.today = timezone.localdate()
+        for i in range(6):
+            booking = Booking.objects.create(
+                guest=self.guest, room=self.rooms[i % 3],
+                check_in_date=self.today + timedelta(days=i * 3),
+                check_out_date=self.today + timedelta(days=i * 3 + 2),
+                num_guests=1, total_price=Decimal('200.00'), status='confirmed'
+            )
+            Payment.objects.create(
+                booking=booking, amount=Decimal('200.00'), payment_method='cash',
+                status='completed', transaction_id=f'TX{booking.id}'
+            )
+            AuditLog.objects.create(
+                user=self.reception, action='create', model_type='Booking',
+                object_id=booking.id, description='Created booking'
+            )
+        self.client = APIClient()
+
+    def full_scans(self, queries):
+        scans = []
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            for step in plan:
+                match = re.fullmatch(r'SCAN (\S+)', step)
+                if match and match.group(1) not in SMALL_TABLES:
+                    scans.append(f'{step}\n    {sql}')
+        return scans
+
+    def assertIndexed(self, action):
+        with CaptureQueriesContext(connection) as queries:
+            action()
+        self.assertTrue(queries.captured_queries)
+        scans = self.full_scans(queries.captured_queries)
+        self.assertFalse(scans, 'Full table scans:\n' + '\n'.join(scans))
+
+    def get_pages(self, url, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if isinstance(response.data, dict) and response.data.get('next'):
+            self.assertEqual(self.client.get(response.data['next']).status_code, 200)
+
+    def test_room_search(self):
+        check_in = self.today + timedelta(days=2)
+        self.client.force_authenticate(user=self.guest)
+        # Inside the horizon: availability index load
+        self.assertIndexed(lambda: self.client.get(
+            f'/api/rooms/?check_in_date={check_in}&check_out_date={check_in + timedelta(days=3)}'
+        ))
+        # Beyond it: room-night inventory lookup
+        far = self.today + timedelta(days=2000)
+        self.assertIndexed(lambda: self.client.get(
+            f'/api/rooms/?check_in_date={far}&check_out_date={far + timedelta(days=3)}'
+        ))
+
+    def test_booking_create(self):
+        self.client.force_authenticate(user=self.reception)
+        check_in = self.today + timedelta(days=40)
+
+        def create():
+            response = self.client.post('/api/bookings/reception/create/', {
+                'guest_email': self.guest.email,
+                'room': self.rooms[0].id,
+                'check_in_date': str(check_in),
+                'check_out_date': str(check_in + timedelta(days=2)),
+                'num_guests': 1
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+
+        self.assertIndexed(create)
+        # Per-room overlap query run when the booking commits
+        self.assertIndexed(lambda: availability_index.refresh_room(self.rooms[0].id))
+
+    def test_booking_lists(self):
+        self.assertIndexed(lambda: self.get_pages('/api/bookings/reception/?page_size=2', self.reception))
+        self.assertIndexed(lambda: self.get_pages('/api/bookings/guest/list/', self.guest))
+
+    def test_dashboard(self):
+        self.assertIndexed(lambda: self.get_pages('/api/dashboard/stats/', self.admin))
+        self.assertIndexed(lambda: self.get_pages('/api/dashboard/stats/', self.guest))
+        self.assertIndexed(lambda: self.get_pages('/api/dashboard/charts/booking-trend/', self.reception))
+        self.assertIndexed(lambda: self.get_pages('/api/dashboard/analytics/', self.reception))
+        self.assertIndexed(lambda: self.get_pages('/api/dashboard/recent-activity/', self.reception))
+
+    def test_audit_log_list(self):
+        self.assertIndexed(lambda: self.get_pages('/api/audit/?page_size=2', self.admin))
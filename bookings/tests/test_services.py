@@ -0,0 +1,281 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from audit.models import AuditLog
+from bookings.models import Booking, RoomNight
+from bookings.inventory import claim_room_nights
+from bookings.services import TRANSITIONS, InvalidTransition, StatusConflict, bulk_transition, transition_booking
+from dashboard.activity import activity_feed
+from dashboard.cache import get_versions
+from rooms.models import Room
+from rooms.availability import availability_index
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+User = get_user_model()
+
+
+class BookingServiceTestCase(TestCase):
+    """Guest, reception user and room shared by the service tests"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        self.room = Room.objects.create(
+            number='101',
+            name='Single',
+            floor=1,
+            capacity=2,
+            price_per_night=Decimal('100.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+
+    def create_booking(self, booking_status='confirmed', room=None):
+        booking = Booking.objects.create(
+            guest=self.guest,
+            room=room or self.room,
+            check_in_date=date.today() + timedelta(days=1),
+            check_out_date=date.today() + timedelta(days=3),
+            num_guests=1,
+            total_price=Decimal('200.00'),
+            status=booking_status
+        )
+        if booking_status == 'confirmed':
+            claim_room_nights(booking)
+        return Booking.objects.select_related('room').get(id=booking.id)
+
+    def statements(self, queries):
+        return [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+
+
+class BookingLifecycleTest(BookingServiceTestCase):
+    """Test cases for the booking lifecycle service"""
+
+    def test_check_in_and_out(self):
+        booking = self.create_booking()
+
+        with CaptureQueriesContext(connection) as queries:
+            transition_booking(booking, 'checked_in', self.reception)
+        # Booking, room, and one audit entry for each
+        self.assertEqual(self.statements(queries), ['UPDATE', 'INSERT', 'UPDATE', 'INSERT'])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'booked')
+        self.assertEqual(RoomNight.objects.filter(booking=booking).count(), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            transition_booking(booking, 'checked_out', self.reception)
+        # Plus releasing the held nights
+        self.assertEqual(self.statements(queries), ['UPDATE', 'DELETE', 'INSERT', 'UPDATE', 'INSERT'])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'dispo')
+        self.assertFalse(RoomNight.objects.filter(booking=booking).exists())
+
+        self.assertEqual(
+            list(AuditLog.objects.order_by('id').values_list('description', flat=True)),
+            [
+                'Changed booking status from confirmed to checked_in (check-in)',
+                'Changed room 101 status to booked (check-in)',
+                'Changed booking status from checked_in to checked_out (check-out)',
+                'Changed room 101 status to available (check-out)',
+            ]
+        )
+
+    def test_confirming_claims_nights(self):
+        booking = self.create_booking('pending')
+        transition_booking(booking, 'confirmed', self.reception)
+        self.assertEqual(RoomNight.objects.filter(booking=booking).count(), 2)
+        # The room is left alone
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'dispo')
+
+    def test_invalid_transitions_are_rejected(self):
+        for old_status, new_status in [('pending', 'checked_in'), ('checked_out', 'confirmed'),
+                                       ('cancelled', 'confirmed'), ('confirmed', 'confirmed')]:
+            self.assertNotIn((old_status, new_status), TRANSITIONS)
+            booking = self.create_booking(old_status)
+            with self.assertRaises(InvalidTransition):
+                transition_booking(booking, new_status, self.reception)
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, old_status)
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_failure_rolls_back_every_write(self):
+        booking = self.create_booking()
+        # Fails on the last write, the room's audit entry
+        with mock.patch('bookings.services.audit_writer.log', side_effect=[None, RuntimeError('disk full')]):
+            with self.assertRaises(RuntimeError):
+                transition_booking(booking, 'checked_in', self.reception)
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(booking.room.status, 'dispo')
+        booking.refresh_from_db()
+        self.room.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(self.room.status, 'dispo')
+        self.assertEqual(RoomNight.objects.filter(booking=booking).count(), 2)
+
+    def test_lost_race_is_a_conflict(self):
+        booking = self.create_booking()
+        Booking.objects.filter(id=booking.id).update(status='cancelled')
+        with self.assertRaises(StatusConflict):
+            transition_booking(booking, 'checked_in', self.reception)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'dispo')
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_conditional_update_still_notifies_receivers(self):
+        booking = self.create_booking()
+        before = get_versions(['bookings', 'rooms'])
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_booking(booking, 'checked_in', self.reception)
+        after = get_versions(['bookings', 'rooms'])
+        self.assertNotEqual(before['bookings'], after['bookings'])
+        self.assertNotEqual(before['rooms'], after['rooms'])
+
+    def test_status_endpoint_uses_transition_table(self):
+        booking = self.create_booking()
+        url = f'/api/bookings/reception/{booking.id}/status/'
+
+        response = self.client.patch(url, {'status': 'checked_out'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('allowed: checked_in, cancelled', response.data['error'])
+
+        response = self.client.patch(url, {'status': 'checked_in'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'checked_in')
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'booked')
+
+    def test_detail_endpoint_cannot_change_status(self):
+        booking = self.create_booking()
+        url = f'/api/bookings/reception/{booking.id}/'
+
+        response = self.client.patch(url, {'status': 'checked_in'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertFalse(AuditLog.objects.exists())
+
+        # Sending the unchanged status back with other edits is fine
+        response = self.client.patch(url, {'status': 'confirmed', 'num_guests': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['num_guests'], 2)
+
+
+class BulkTransitionTest(BookingServiceTestCase):
+    """Test cases for changing many bookings at once"""
+
+    def create_rooms(self, count):
+        return [
+            Room.objects.create(
+                number=f'2{i:02d}',
+                name='Double',
+                floor=2,
+                capacity=2,
+                price_per_night=Decimal('150.00')
+            )
+            for i in range(count)
+        ]
+
+    def test_bulk_check_in_reports_each_booking(self):
+        bookings = [self.create_booking(room=room) for room in self.create_rooms(3)]
+        pending = self.create_booking('pending')
+        ids = [booking.id for booking in bookings] + [pending.id, 9999]
+
+        response = self.client.post('/api/bookings/reception/bulk/status/',
+                                    {'booking_ids': ids, 'status': 'checked_in'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([result['booking_id'] for result in response.data['results']], ids)
+        self.assertEqual(response.data['results'][0]['status'], 'checked_in')
+        self.assertEqual(response.data['results'][0]['room_number'], '200')
+        self.assertIn('allowed: confirmed, cancelled', response.data['results'][3]['error'])
+        self.assertEqual(response.data['results'][4]['error'], 'Booking not found')
+
+        self.assertEqual(
+            set(Booking.objects.filter(id__in=ids).values_list('status', flat=True)),
+            {'checked_in', 'pending'}
+        )
+        self.assertEqual(Room.objects.filter(status='booked').count(), 3)
+        self.assertEqual(AuditLog.objects.filter(action='booking_status_change').count(), 3)
+        self.assertEqual(
+            AuditLog.objects.get(action='room_status_change', object_id=bookings[1].room_id).description,
+            'Changed room 201 status to booked (check-in)'
+        )
+
+    def test_statement_count_does_not_grow_with_the_batch(self):
+        # Everything the commit triggers counts: the index is built and the
+        # activity feed seeded, as in a running server
+        activity_feed.reset()
+        self.addCleanup(activity_feed.reset)
+        rooms = self.create_rooms(8)
+        counts = []
+        for batch in (rooms[:2], rooms[2:]):
+            ids = [self.create_booking(room=room).id for room in batch]
+            availability_index.rebuild()
+            activity_feed.ensure_seeded()
+            for new_status in ('checked_in', 'checked_out'):
+                with CaptureQueriesContext(connection) as queries:
+                    with self.captureOnCommitCallbacks(execute=True):
+                        bulk_transition(ids, new_status, self.reception)
+                counts.append(self.statements(queries))
+            self.assertEqual(availability_index.verify(), [])
+        # Lock, bookings, rooms and audit; check-out also frees the nights
+        # and re-reads the rooms (rooms, bookings) for the availability index
+        self.assertEqual(counts[0], ['SELECT', 'UPDATE', 'UPDATE', 'INSERT'])
+        self.assertEqual(counts[1], ['SELECT', 'UPDATE', 'DELETE', 'UPDATE', 'INSERT', 'SELECT', 'SELECT'])
+        self.assertEqual(counts[0], counts[2])
+        self.assertEqual(counts[1], counts[3])
+        self.assertFalse(RoomNight.objects.exists())
+        self.assertEqual(activity_feed.recent(limit=1)[0]['description'], 'Checked out from Room 207')
+
+    def test_bulk_confirm_skips_bookings_whose_nights_are_taken(self):
+        first = self.create_booking('pending')
+        clash = self.create_booking('pending')
+        results = bulk_transition([first.id, clash.id], 'confirmed', self.reception)
+        self.assertEqual(results[0]['booking'].status, 'confirmed')
+        self.assertEqual(results[1]['error'], 'Room is not available for the selected dates')
+        self.assertEqual(RoomNight.objects.filter(booking=first).count(), 2)
+        self.assertFalse(RoomNight.objects.filter(booking=clash).exists())
+        clash.refresh_from_db()
+        self.assertEqual(clash.status, 'pending')
+
+    def test_bulk_updates_notify_receivers(self):
+        ids = [self.create_booking(room=room).id for room in self.create_rooms(2)]
+        before = get_versions(['bookings', 'rooms'])
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(ids, 'checked_in', self.reception)
+        after = get_versions(['bookings', 'rooms'])
+        self.assertNotEqual(before['bookings'], after['bookings'])
+        self.assertNotEqual(before['rooms'], after['rooms'])
+
+    def test_bulk_endpoint_validates_the_request(self):
+        url = '/api/bookings/reception/bulk/status/'
+        response = self.client.post(url, {'booking_ids': [], 'status': 'checked_in'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'booking_ids': [1], 'status': 'gone'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.post(url, {'booking_ids': [1], 'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -6,6 +6,7 @@ from django.utils import timezone
 from datetime import timedelta
 from rooms.models import Room
 from bookings.models import Booking
+from bookings.inventory import room_is_free, sync_room_nights
 from payments.models import Payment
 from accounts.models import User
 
@@ -13,6 +14,7 @@ from accounts.models import User
 guest_user, created = User.objects.get_or_create(
     email='guest@example.com',
     defaults={
+        'username': 'sample_guest',
         'first_name': 'Test',
         'last_name': 'Guest',
         'role': 'guest',
@@ -38,6 +40,9 @@ for i, room in enumerate(rooms):
     # Create a booking
     check_in = today + timedelta(days=i)
     check_out = check_in + timedelta(days=3)
+    if not room_is_free(room, check_in, check_out):
+        print(f"Room {room.number} is already booked from {check_in} to {check_out}, skipping")
+        continue
     
     booking = Booking.objects.create(
         guest=guest_user,
@@ -45,22 +50,24 @@ for i, room in enumerate(rooms):
         check_in_date=check_in,
         check_out_date=check_out,
         status='confirmed' if i == 0 else 'pending',
-        number_of_guests=2,
-        special_requests='Test booking' if i < 2 else ''
+        num_guests=min(2, room.capacity),
+        total_price=room.price_per_night * (check_out - check_in).days
     )
+    sync_room_nights(booking)
     bookings_created += 1
     print(f"Created booking {booking.id}: Room {room.number}, {check_in} to {check_out}")
     
     # Create payment for confirmed booking
     if booking.status == 'confirmed':
-        total_nights = (check_out - check_in).days
-        amount = room.price_per_night * total_nights
+        amount = booking.total_price
         
         payment = Payment.objects.create(
             booking=booking,
             amount=amount,
             payment_method='credit_card',
-            status='completed'
+            status='completed',
+            transaction_id=f'SAMPLE-{booking.id}',
+            paid_at=timezone.now()
         )
         print(f"Created payment {payment.id}: ${amount}")
 
@@ -0,0 +1,124 @@
+"""
+Activity feed shown on the admin and reception dashboards.
+
+``activity_feed`` keeps the latest booking changes in a bounded ring buffer.
+It is seeded from the database the first time it is read and then fed by
+the booking ``post_save`` signal (see ``dashboard.signals``) whenever a
+write commits, so serving the feed needs no query. Every event carries an
+increasing ``event_id``; clients pass the last one they saw as ``since`` to
+receive only newer items.
+
+The buffer lives in the process that served the write. With several
+workers each one seeds itself and records its own writes.
+"""
+import threading
+from collections import deque
+from bookings.models import Booking
+
+
+def activity_entry(booking):
+    """Feed entry describing the booking's latest change"""
+    guest = booking.guest
+    room_number = booking.room.number
+
+    # Determine activity description based on status
+    status_messages = {
+        'pending': f'Created a booking for Room {room_number}',
+        'confirmed': f'Confirmed booking for Room {room_number}',
+        'checked_in': f'Checked in to Room {room_number}',
+        'checked_out': f'Checked out from Room {room_number}',
+        'cancelled': f'Cancelled booking for Room {room_number}',
+    }
+
+    return {
+        'id': booking.id,
+        'guest_name': f"{guest.first_name} {guest.last_name}" if guest.first_name else guest.username,
+        'guest_initials': f"{guest.first_name[0] if guest.first_name else guest.username[0]}{guest.last_name[0] if guest.last_name else (guest.username[1] if len(guest.username) > 1 else '')}".upper(),
+        'description': status_messages.get(booking.status, f'Updated booking for Room {room_number}'),
+        'updated_at': booking.updated_at,
+        'status': booking.status
+    }
+
+
+def time_ago(time_diff):
+    """Human readable age of an activity"""
+    if time_diff.days > 0:
+        return f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
+    elif time_diff.seconds >= 3600:
+        hours = time_diff.seconds // 3600
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    elif time_diff.seconds >= 60:
+        minutes = time_diff.seconds // 60
+        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+    return "Just now"
+
+
+class ActivityFeed:
+    def __init__(self, size=100, seed_size=10):
+        self.size = size
+        self.seed_size = seed_size
+        self._events = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self.is_seeded = False
+
+    def reset(self):
+        """Forget every event; the next read seeds from the database again"""
+        with self._lock:
+            self._events.clear()
+            self._last_id = 0
+            self.is_seeded = False
+
+    def ensure_seeded(self):
+        if self.is_seeded:
+            return
+        with self._lock:
+            if self.is_seeded:
+                return
+            recent = Booking.objects.select_related('guest', 'room').order_by('-updated_at')[:self.seed_size]
+            for booking in reversed(recent):
+                self._append(activity_entry(booking))
+            self.is_seeded = True
+
+    def record(self, booking):
+        """Add an event for the booking; returns it, or None before seeding"""
+        if not self.is_seeded:
+            # The seed query will pick the change up
+            return None
+        entry = activity_entry(booking)
+        with self._lock:
+            return self._append(entry)
+
+    def _append(self, entry):
+        self._last_id += 1
+        event = dict(entry, event_id=self._last_id)
+        self._events.append(event)
+        return event
+
+    def recent(self, limit=10, since=None):
+        """
+        Newest first, one event per booking. With ``since`` only events after
+        that id are returned, unless the id is unknown to this buffer (the
+        process restarted or the client fell too far behind), in which case
+        the whole feed is.
+        """
+        self.ensure_seeded()
+        with self._lock:
+            events = list(self._events)
+            last_id = self._last_id
+        if since is not None and events and events[0]['event_id'] - 1 <= since <= last_id:
+            events = [event for event in events if event['event_id'] > since]
+
+        seen = set()
+        feed = []
+        for event in reversed(events):
+            if event['id'] in seen:
+                continue
+            seen.add(event['id'])
+            feed.append(event)
+            if len(feed) == limit:
+                break
+        return feed
+
+
+activity_feed = ActivityFeed()
@@ -0,0 +1,100 @@
+"""
+Occupancy, average daily rate (ADR) and revenue per available room (RevPAR).
+
+Bookings are expanded into room-nights without materialising one row per
+night: the database groups overlapping bookings by their (check-in,
+check-out) pair, which leaves at most a few tens of thousands of groups even
+for years of history, and each group adds its rooms and nightly revenue to
+two difference arrays at its first and last night. A running sum over each
+array then gives rooms sold and revenue for every day of the range in a
+single pass.
+"""
+from datetime import timedelta
+from django.db.models import Count, Sum
+from rooms.models import Room
+from bookings.models import Booking
+
+# Bookings that sell their nights
+SOLD_STATUSES = ('confirmed', 'checked_in', 'checked_out')
+
+# Longest range one request may cover
+MAX_DAYS = 366 * 10
+
+
+def ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def nightly_series(start, end):
+    """
+    Rooms sold and revenue for each night from ``start`` to ``end``
+    inclusive, as two lists indexed by day offset.
+    """
+    days = (end - start).days + 1
+    groups = Booking.objects.filter(
+        status__in=SOLD_STATUSES,
+        check_in_date__lte=end,
+        check_out_date__gt=start,
+    ).values('check_in_date', 'check_out_date').annotate(
+        bookings=Count('id'), revenue=Sum('total_price')
+    ).order_by()
+
+    sold_delta = [0] * (days + 1)
+    revenue_delta = [0.0] * (days + 1)
+    for group in groups:
+        check_in, check_out = group['check_in_date'], group['check_out_date']
+        nights = (check_out - check_in).days
+        if nights <= 0:
+            continue
+        nightly_revenue = float(group['revenue'] or 0) / nights
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, days)
+        sold_delta[first] += group['bookings']
+        sold_delta[last] -= group['bookings']
+        revenue_delta[first] += nightly_revenue
+        revenue_delta[last] -= nightly_revenue
+
+    sold, revenue = [], []
+    running_sold, running_revenue = 0, 0.0
+    for day in range(days):
+        running_sold += sold_delta[day]
+        running_revenue += revenue_delta[day]
+        sold.append(running_sold)
+        # Running float sums can leave dust where the true value is zero
+        revenue.append(round(running_revenue, 2) if running_sold else 0.0)
+    return sold, revenue
+
+
+def occupancy_report(start, end):
+    """Daily and whole-range occupancy rate, ADR and RevPAR"""
+    rooms = Room.objects.count()
+    sold, revenue = nightly_series(start, end)
+
+    daily = []
+    for offset, (rooms_sold, day_revenue) in enumerate(zip(sold, revenue)):
+        daily.append({
+            'date': start + timedelta(days=offset),
+            'rooms_sold': rooms_sold,
+            'revenue': day_revenue,
+            'occupancy_rate': ratio(rooms_sold, rooms),
+            'adr': round(day_revenue / rooms_sold, 2) if rooms_sold else 0.0,
+            'revpar': round(day_revenue / rooms, 2) if rooms else 0.0,
+        })
+
+    total_sold = sum(sold)
+    total_revenue = round(sum(revenue), 2)
+    available = rooms * len(sold)
+    return {
+        'start': start,
+        'end': end,
+        'rooms': rooms,
+        'summary': {
+            'rooms_sold': total_sold,
+            'room_nights_available': available,
+            'revenue': total_revenue,
+            'occupancy_rate': ratio(total_sold, available),
+            'adr': round(total_revenue / total_sold, 2) if total_sold else 0.0,
+            'revpar': round(total_revenue / available, 2) if available else 0.0,
+        },
+        'daily': daily,
+    }
@@ -1,9 +1,11 @@
 from django.urls import path
-from .api_views import dashboard_stats, room_status_chart, booking_trend_chart, recent_activity
+from .api_views import dashboard_stats, room_status_chart, booking_trend_chart, recent_activity, event_stream, occupancy_analytics
 
 urlpatterns = [
     path('stats/', dashboard_stats, name='dashboard-stats'),
     path('charts/room-status/', room_status_chart, name='room-status-chart'),
     path('charts/booking-trend/', booking_trend_chart, name='booking-trend-chart'),
+    path('analytics/', occupancy_analytics, name='occupancy-analytics'),
     path('recent-activity/', recent_activity, name='recent-activity'),
+    path('events/', event_stream, name='dashboard-events'),
 ]
\ No newline at end of file
@@ -4,11 +4,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rooms.models import Room
 from bookings.models import Booking
-from payments.models import Payment
-from accounts.models import User
-from django.db.models import Count, Sum
+from django.db.models import Count
 from django.utils import timezone
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from datetime import datetime, timedelta
+import asyncio
+from functools import partial
+from . import analytics, stats, trends
+from .cache import cached
+from .activity import activity_feed, time_ago
+from .events import broker
 
 
 @api_view(['GET'])
@@ -27,176 +33,27 @@ def dashboard_stats(request):
 
 def admin_dashboard_stats():
     """Admin dashboard statistics"""
-    # Get today's date
-    today = timezone.now().date()
-    
-    # Room statistics
-    total_rooms = Room.objects.count()
-    available_rooms = Room.objects.filter(status='dispo').count()
-    reserved_rooms = Room.objects.filter(status='reserved').count()
-    booked_rooms = Room.objects.filter(status='booked').count()
-    maintenance_rooms = Room.objects.filter(status='maintenance').count()
-    
-    # Booking statistics
-    total_bookings = Booking.objects.count()
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    confirmed_bookings = Booking.objects.filter(status='confirmed').count()
-    checked_in_bookings = Booking.objects.filter(status='checked_in').count()
-    checked_out_bookings = Booking.objects.filter(status='checked_out').count()
-    cancelled_bookings = Booking.objects.filter(status='cancelled').count()
-    
-    # User statistics
-    total_users = User.objects.count()
-    guests = User.objects.filter(role='guest').count()
-    receptionists = User.objects.filter(role='reception').count()
-    admins = User.objects.filter(role='admin').count()
-    
-    # Revenue statistics
-    total_revenue = Payment.objects.filter(
-        status='completed'
-    ).aggregate(total=Sum('amount'))['total'] or 0
-    
-    data = {
-        'rooms': {
-            'total': total_rooms,
-            'available': available_rooms,
-            'reserved': reserved_rooms,
-            'booked': booked_rooms,
-            'maintenance': maintenance_rooms
-        },
-        'bookings': {
-            'total': total_bookings,
-            'pending': pending_bookings,
-            'confirmed': confirmed_bookings,
-            'checked_in': checked_in_bookings,
-            'checked_out': checked_out_bookings,
-            'cancelled': cancelled_bookings
-        },
-        'payments': {
-            'total_revenue': float(total_revenue)
-        },
-        'users': {
-            'total': total_users,
-            'guests': guests,
-            'receptionists': receptionists,
-            'admins': admins
-        }
-    }
-    
-    return Response(data)
+    return Response(cached(
+        'admin-stats', ['rooms', 'bookings', 'payments', 'users'], stats.admin_stats
+    ))
 
 
 def reception_dashboard_stats():
     """Reception dashboard statistics"""
-    # Get today's date
+    # Today's check-ins/outs depend on the date as well as the data
     today = timezone.now().date()
-    
-    # Room statistics
-    total_rooms = Room.objects.count()
-    available_rooms = Room.objects.filter(status='dispo').count()
-    reserved_rooms = Room.objects.filter(status='reserved').count()
-    booked_rooms = Room.objects.filter(status='booked').count()
-    maintenance_rooms = Room.objects.filter(status='maintenance').count()
-    
-    # Booking statistics
-    total_bookings = Booking.objects.count()
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    confirmed_bookings = Booking.objects.filter(status='confirmed').count()
-    checked_in_bookings = Booking.objects.filter(status='checked_in').count()
-    checked_out_bookings = Booking.objects.filter(status='checked_out').count()
-    cancelled_bookings = Booking.objects.filter(status='cancelled').count()
-    
-    # Today's check-ins and check-outs
-    todays_check_ins = Booking.objects.filter(
-        check_in_date=today,
-        status='confirmed'
-    ).count()
-    
-    todays_check_outs = Booking.objects.filter(
-        check_out_date=today,
-        status='checked_in'
-    ).count()
-    
-    # Recent bookings (last 7 days)
-    week_ago = today - timedelta(days=7)
-    recent_bookings = Booking.objects.filter(
-        created_at__date__gte=week_ago
-    ).count()
-    
-    # Revenue statistics - Calculate from confirmed bookings only
-    # Include confirmed and checked_in bookings, exclude canceled
-    total_revenue = Booking.objects.filter(
-        status__in=['confirmed', 'checked_in', 'checked_out']
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    # Recent revenue (last 7 days) from confirmed bookings
-    recent_revenue = Booking.objects.filter(
-        created_at__date__gte=week_ago,
-        status__in=['confirmed', 'checked_in', 'checked_out']
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    
-    data = {
-        'rooms': {
-            'total': total_rooms,
-            'available': available_rooms,
-            'reserved': reserved_rooms,
-            'booked': booked_rooms,
-            'maintenance': maintenance_rooms
-        },
-        'bookings': {
-            'total': total_bookings,
-            'pending': pending_bookings,
-            'confirmed': confirmed_bookings,
-            'checked_in': checked_in_bookings,
-            'checked_out': checked_out_bookings,
-            'cancelled': cancelled_bookings,
-            'todays_check_ins': todays_check_ins,
-            'todays_check_outs': todays_check_outs,
-            'recent': recent_bookings
-        },
-        'payments': {
-            'total_revenue': float(total_revenue),
-            'recent_revenue': float(recent_revenue)
-        }
-    }
-    
-    return Response(data)
+    return Response(cached(
+        f'reception-stats:{today}', ['rooms', 'bookings'], partial(stats.reception_stats, today)
+    ))
 
 
 def guest_dashboard_stats(request):
     """Guest dashboard statistics"""
     # For guests, we only show their own bookings
     user = request.user
-    user_bookings = Booking.objects.filter(guest=user)
-    
-    total_bookings = user_bookings.count()
-    pending_bookings = user_bookings.filter(status='pending').count()
-    confirmed_bookings = user_bookings.filter(status='confirmed').count()
-    checked_in_bookings = user_bookings.filter(status='checked_in').count()
-    checked_out_bookings = user_bookings.filter(status='checked_out').count()
-    cancelled_bookings = user_bookings.filter(status='cancelled').count()
-    
-    # Calculate total spent
-    total_spent = Payment.objects.filter(
-        booking__guest=user,
-        status='completed'
-    ).aggregate(total=Sum('amount'))['total'] or 0
-    
-    data = {
-        'bookings': {
-            'total': total_bookings,
-            'pending': pending_bookings,
-            'confirmed': confirmed_bookings,
-            'checked_in': checked_in_bookings,
-            'checked_out': checked_out_bookings,
-            'cancelled': cancelled_bookings
-        },
-        'payments': {
-            'total_spent': float(total_spent)
-        }
-    }
-    
-    return Response(data)
+    return Response(cached(
+        f'guest-stats:{user.id}', ['bookings', 'payments'], partial(stats.guest_stats, user)
+    ))
 
 
 @api_view(['GET'])
@@ -236,54 +93,89 @@ def room_status_chart(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def booking_trend_chart(request):
+    """
+    Bookings created per bucket. Optional query parameters: ``start`` and
+    ``end`` (YYYY-MM-DD, default the last 30 days) and ``granularity``
+    (day, week or month). Guests only see their own bookings.
+    """
     user = request.user
-    
-    # Different chart data based on user role
-    if user.is_admin() or user.is_reception():
-        # Admin and reception can see booking trend chart
-        # Get bookings for the last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        bookings = Booking.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).extra(select={'date': 'date(created_at)'}).values('date').annotate(count=Count('id')).order_by('date')
-        
-        # Convert to chart-friendly format
-        chart_data = []
-        for booking in bookings:
-            chart_data.append({
-                'date': booking['date'],
-                'count': booking['count']
-            })
-        
-        return Response(chart_data)
-    elif user.is_guest():
-        # Guests can see their own booking trend
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        bookings = Booking.objects.filter(
-            guest=user,
-            created_at__gte=thirty_days_ago
-        ).extra(select={'date': 'date(created_at)'}).values('date').annotate(count=Count('id')).order_by('date')
-        
-        # Convert to chart-friendly format
-        chart_data = []
-        for booking in bookings:
-            chart_data.append({
-                'date': booking['date'],
-                'count': booking['count']
-            })
-        
-        return Response(chart_data)
-    else:
+
+    if not (user.is_admin() or user.is_reception() or user.is_guest()):
         # Unauthorized access
         return Response({
             'error': 'Access denied'
         }, status=status.HTTP_403_FORBIDDEN)
 
+    today = timezone.localdate()
+    granularity = request.query_params.get('granularity', 'day')
+    try:
+        end = parse_query_date(request.query_params.get('end')) or today
+        start = parse_query_date(request.query_params.get('start')) or end - timedelta(days=30)
+    except ValueError:
+        return Response({'error': 'Dates must use the YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if granularity not in trends.GRANULARITIES:
+        return Response({
+            'error': f'granularity must be one of {", ".join(trends.GRANULARITIES)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    if trends.bucket_count(start, end, granularity) > trends.MAX_BUCKETS:
+        return Response({
+            'error': f'At most {trends.MAX_BUCKETS} buckets can be requested'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    guest = user if user.is_guest() else None
+    chart_data = trends.booking_trend(start, end, granularity, guest=guest, today=today)
+    return Response(chart_data)
+
+
+def parse_query_date(value):
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def occupancy_analytics(request):
+    """
+    Daily occupancy rate, ADR and RevPAR with range totals. Optional query
+    parameters ``start`` and ``end`` (YYYY-MM-DD, default the last 30 days).
+    """
+    user = request.user
+
+    # Only admin and reception can access this
+    if not (user.is_admin() or user.is_reception()):
+        return Response({
+            'error': 'Access denied'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        end = parse_query_date(request.query_params.get('end')) or timezone.localdate()
+        start = parse_query_date(request.query_params.get('start')) or end - timedelta(days=29)
+    except ValueError:
+        return Response({'error': 'Dates must use the YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days + 1 > analytics.MAX_DAYS:
+        return Response({
+            'error': f'At most {analytics.MAX_DAYS} days can be requested'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(cached(
+        f'analytics:{start}:{end}', ['rooms', 'bookings'], partial(analytics.occupancy_report, start, end)
+    ))
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def recent_activity(request):
-    """Get recent booking activity for the dashboard"""
+    """
+    Get recent booking activity for the dashboard, newest first. Pass
+    ``?since=<event_id>`` to receive only items added after that event.
+    """
     user = request.user
     
     # Only admin and reception can access this
@@ -292,41 +184,60 @@ def recent_activity(request):
             'error': 'Access denied'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Get the last 10 bookings ordered by updated_at
-    recent_bookings = Booking.objects.select_related('guest', 'room').order_by('-updated_at')[:10]
-    
-    # Convert to activity feed format
+    since = request.query_params.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return Response({'error': 'since must be an event id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Relative times are rendered per request so buffered entries stay accurate
+    now = timezone.now()
     activities = []
-    for booking in recent_bookings:
-        # Determine activity description based on status
-        status_messages = {
-            'pending': f'Created a booking for Room {booking.room.number}',
-            'confirmed': f'Confirmed booking for Room {booking.room.number}',
-            'checked_in': f'Checked in to Room {booking.room.number}',
-            'checked_out': f'Checked out from Room {booking.room.number}',
-            'cancelled': f'Cancelled booking for Room {booking.room.number}',
-        }
-        
-        # Calculate time ago
-        time_diff = timezone.now() - booking.updated_at
-        if time_diff.days > 0:
-            time_ago = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-        elif time_diff.seconds >= 3600:
-            hours = time_diff.seconds // 3600
-            time_ago = f"{hours} hour{'s' if hours > 1 else ''} ago"
-        elif time_diff.seconds >= 60:
-            minutes = time_diff.seconds // 60
-            time_ago = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-        else:
-            time_ago = "Just now"
-        
-        activities.append({
-            'id': booking.id,
-            'guest_name': f"{booking.guest.first_name} {booking.guest.last_name}" if booking.guest.first_name else booking.guest.username,
-            'guest_initials': f"{booking.guest.first_name[0] if booking.guest.first_name else booking.guest.username[0]}{booking.guest.last_name[0] if booking.guest.last_name else (booking.guest.username[1] if len(booking.guest.username) > 1 else '')}".upper(),
-            'description': status_messages.get(booking.status, f'Updated booking for Room {booking.room.number}'),
-            'time_ago': time_ago,
-            'status': booking.status
-        })
-    
-    return Response(activities)
\ No newline at end of file
+    for entry in activity_feed.recent(since=since):
+        activity = dict(entry)
+        activity['time_ago'] = time_ago(now - activity.pop('updated_at'))
+        activities.append(activity)
+
+    return Response(activities)
+
+
+# Seconds between comments that keep idle event streams open through proxies
+EVENT_STREAM_KEEPALIVE = 15
+
+
+async def event_stream(request):
+    """
+    Server-sent events feed of room status changes, booking status changes
+    and new activity items for the admin and reception dashboards. Needs an
+    ASGI server so the open connection does not tie up a worker thread.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not (user.is_admin() or user.is_reception()):
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server buffers the whole (endless) stream before sending any
+        # of it. 204 tells EventSource to stop reconnecting; clients keep polling.
+        return HttpResponse(status=204)
+
+    async def events():
+        queue = broker.subscribe()
+        try:
+            # The first real message: clients stop polling once they see it
+            yield 'retry: 5000\nevent: ready\ndata: {}\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield event.encode()
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
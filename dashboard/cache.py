@@ -0,0 +1,61 @@
+"""
+Versioned cache for dashboard payloads.
+
+Every payload is stored under a key that embeds the current version of each
+model it was computed from. Writes to those models bump the version (see
+``dashboard.signals``), so the next read misses and recomputes once while
+stale entries simply age out. Any number of open dashboards therefore cost
+one computation per change instead of one per poll.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'dashboard'
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:version:{namespace}'
+
+
+def _fresh_version():
+    # Never reuses a number if a version key was evicted or the cache restarted
+    return time.time_ns()
+
+
+def get_versions(namespaces):
+    keys = {namespace: _version_key(namespace) for namespace in namespaces}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for namespace, key in keys.items():
+        version = stored.get(key)
+        if version is None:
+            cache.add(key, _fresh_version(), timeout=None)
+            version = cache.get(key)
+        versions[namespace] = version
+    return versions
+
+
+def bump(*namespaces):
+    """Invalidate every payload computed from these namespaces"""
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _fresh_version(), timeout=None)
+
+
+def cached(name, depends_on, compute, timeout=None):
+    """Return the cached payload ``name``, computing it on a miss"""
+    versions = get_versions(depends_on)
+    key = ':'.join(
+        [KEY_PREFIX, name] + [f'{namespace}{versions[namespace]}' for namespace in sorted(versions)]
+    )
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if timeout is None:
+            timeout = settings.DASHBOARD_CACHE_TIMEOUT
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,73 @@
+"""
+In-process publish/subscribe for dashboard events.
+
+Each open event stream subscribes an ``asyncio.Queue`` on the server's event
+loop. ``publish`` may be called from any thread (sync views run in worker
+threads under ASGI) and fans the event out to every subscriber with
+``call_soon_threadsafe``. A subscriber that falls behind loses its oldest
+events rather than growing without bound.
+
+Events only reach streams served by the same process; run a single ASGI
+worker, or put a shared broker in front, to fan out across processes.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Event:
+    def __init__(self, id, type, data):
+        self.id = id
+        self.type = type
+        self.data = data
+
+    def encode(self):
+        """Server-sent events wire format"""
+        payload = json.dumps(self.data, cls=DjangoJSONEncoder)
+        return f'id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n'
+
+
+class EventBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self):
+        """Register a queue on the running event loop"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, type, data):
+        """Send an event to every subscriber; safe to call from any thread"""
+        event = Event(next(self._ids), type, data)
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(queue)
+        return event
+
+    @staticmethod
+    def _deliver(queue, event):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+broker = EventBroker()
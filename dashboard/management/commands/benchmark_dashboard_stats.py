@@ -0,0 +1,66 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from rooms.models import Room
+from bookings.models import Booking
+from payments.models import Payment
+from accounts.models import User
+from dashboard import stats
+
+
+def per_key_counts(queryset, field, keys):
+    """The previous approach: one COUNT query per status or role"""
+    counts = {'total': queryset.count()}
+    for key, value in keys.items():
+        counts[key] = queryset.filter(**{field: value}).count()
+    return counts
+
+
+def per_key_admin_stats():
+    return {
+        'rooms': per_key_counts(Room.objects.all(), 'status', stats.ROOM_STATUSES),
+        'bookings': per_key_counts(Booking.objects.all(), 'status', stats.BOOKING_STATUSES),
+        'payments': {
+            'total_revenue': stats.as_float(
+                Payment.objects.filter(status='completed').aggregate(total=Sum('amount'))['total']
+            )
+        },
+        'users': per_key_counts(User.objects.all(), 'role', stats.USER_ROLES),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare the admin dashboard stats built from per-status counts and from conditional aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Payloads built per variant')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Rooms: {Room.objects.count()}  Bookings: {Booking.objects.count()}  '
+            f'Users: {User.objects.count()}'
+        )
+
+        payloads = {}
+        for name, build in (('per-key', per_key_admin_stats), ('aggregate', stats.admin_stats)):
+            timings = []
+            for _ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    payloads[name] = build()
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{name:>9}: {len(queries):2d} queries  mean {statistics.mean(timings):8.2f} ms  '
+                f'p50 {timings[len(timings) // 2]:8.2f} ms  '
+                f'p95 {timings[max(int(len(timings) * 0.95) - 1, 0)]:8.2f} ms'
+            )
+
+        if payloads['per-key'] != payloads['aggregate']:
+            self.stdout.write(self.style.ERROR('Payloads differ'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Payloads match'))
@@ -0,0 +1,84 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rooms.models import Room
+from bookings.models import Booking
+from payments.models import Payment
+from accounts.models import User
+from .cache import bump
+from .activity import activity_entry, activity_feed
+from .events import broker
+
+# Dashboard cache namespace per model
+NAMESPACES = {
+    Room: 'rooms',
+    Booking: 'bookings',
+    Payment: 'payments',
+    User: 'users',
+}
+
+
+def invalidate_dashboard_cache(sender, update_fields=None, **kwargs):
+    """
+    Bump the model's cache version straight away so the pre-write payload
+    stops being served, and again on commit so nothing recomputed from
+    uncommitted state outlives the transaction.
+    """
+    namespace = NAMESPACES.get(sender)
+    if namespace is None:
+        return
+    # Logins only touch last_login, which no dashboard reports
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump(namespace)
+    transaction.on_commit(partial(bump, namespace))
+
+
+# Connected per model rather than for every sender: a post_delete receiver
+# for all models stops Django fast-deleting unrelated rows such as room-nights
+for model in NAMESPACES:
+    post_save.connect(invalidate_dashboard_cache, sender=model)
+    post_delete.connect(invalidate_dashboard_cache, sender=model)
+
+
+@receiver(post_save, sender=Room)
+def publish_room_status(sender, instance, **kwargs):
+    """Push the room's status to open dashboards once the write commits"""
+    if broker.has_subscribers():
+        transaction.on_commit(partial(broker.publish, 'room_status', {
+            'id': instance.id,
+            'number': instance.number,
+            'status': instance.status,
+        }))
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_status(sender, instance, **kwargs):
+    """Record the change in the activity feed and push it once the write commits"""
+    if activity_feed.is_seeded or broker.has_subscribers():
+        transaction.on_commit(partial(publish_booking, instance))
+
+
+def publish_booking(booking):
+    event = activity_feed.record(booking)
+    if not broker.has_subscribers():
+        return
+    broker.publish('booking_status', {
+        'id': booking.id,
+        'room': booking.room_id,
+        'room_number': booking.room.number,
+        'status': booking.status,
+    })
+    if event is None:
+        event = activity_entry(booking)
+    broker.publish('activity', dict(event, time_ago='Just now'))
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_history(sender, **kwargs):
+    """Deleting a booking is the only write that changes closed trend buckets"""
+    bump('booking-history')
+    transaction.on_commit(partial(bump, 'booking-history'))
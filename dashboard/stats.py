@@ -0,0 +1,114 @@
+"""
+Dashboard statistics.
+
+Each model's breakdown is computed by a single aggregate query using
+``Count(filter=Q(...))``, so a payload costs one query per model involved
+no matter how many statuses or roles it reports.
+"""
+from datetime import timedelta
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from rooms.models import Room
+from bookings.models import Booking
+from payments.models import Payment
+from accounts.models import User
+
+# Payload key -> stored value
+ROOM_STATUSES = {
+    'available': 'dispo',
+    'reserved': 'reserved',
+    'booked': 'booked',
+    'maintenance': 'maintenance',
+}
+BOOKING_STATUSES = {value: value for value, _ in Booking.STATUS_CHOICES}
+USER_ROLES = {
+    'guests': 'guest',
+    'receptionists': 'reception',
+    'admins': 'admin',
+}
+
+# Bookings whose price counts towards reception revenue
+REVENUE_STATUSES = ('confirmed', 'checked_in', 'checked_out')
+
+
+def breakdown(queryset, field, keys, **extra):
+    """Total plus one count per key (and any extra aggregates) in one query"""
+    aggregates = {'total': Count('id')}
+    for key, value in keys.items():
+        aggregates[key] = Count('id', filter=Q(**{field: value}))
+    aggregates.update(extra)
+    return queryset.aggregate(**aggregates)
+
+
+def as_float(value):
+    return float(value or 0)
+
+
+def room_stats():
+    return breakdown(Room.objects.all(), 'status', ROOM_STATUSES)
+
+
+def booking_stats(queryset=None):
+    if queryset is None:
+        queryset = Booking.objects.all()
+    return breakdown(queryset, 'status', BOOKING_STATUSES)
+
+
+def user_stats():
+    return breakdown(User.objects.all(), 'role', USER_ROLES)
+
+
+def completed_payment_total(queryset=None):
+    if queryset is None:
+        queryset = Payment.objects.all()
+    return as_float(queryset.filter(status='completed').aggregate(total=Sum('amount'))['total'])
+
+
+def admin_stats():
+    """Admin payload: four queries"""
+    return {
+        'rooms': room_stats(),
+        'bookings': booking_stats(),
+        'payments': {
+            'total_revenue': completed_payment_total()
+        },
+        'users': user_stats()
+    }
+
+
+def reception_stats(today=None):
+    """Reception payload: two queries"""
+    today = today or timezone.now().date()
+    week_ago = today - timedelta(days=7)
+    recent = Q(created_at__date__gte=week_ago)
+    revenue = Q(status__in=REVENUE_STATUSES)
+
+    bookings = breakdown(
+        Booking.objects.all(), 'status', BOOKING_STATUSES,
+        todays_check_ins=Count('id', filter=Q(check_in_date=today, status='confirmed')),
+        todays_check_outs=Count('id', filter=Q(check_out_date=today, status='checked_in')),
+        recent=Count('id', filter=recent),
+        total_revenue=Sum('total_price', filter=revenue),
+        recent_revenue=Sum('total_price', filter=recent & revenue),
+    )
+    total_revenue = bookings.pop('total_revenue')
+    recent_revenue = bookings.pop('recent_revenue')
+
+    return {
+        'rooms': room_stats(),
+        'bookings': bookings,
+        'payments': {
+            'total_revenue': as_float(total_revenue),
+            'recent_revenue': as_float(recent_revenue)
+        }
+    }
+
+
+def guest_stats(user):
+    """Guest payload, limited to the guest's own bookings: two queries"""
+    return {
+        'bookings': booking_stats(Booking.objects.filter(guest=user)),
+        'payments': {
+            'total_spent': completed_payment_total(Payment.objects.filter(booking__guest=user))
+        }
+    }
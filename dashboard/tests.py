@@ -1,3 +1,487 @@
+import asyncio
+import threading
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from bookings.models import Booking
+from payments.models import Payment
+from rooms.models import Room
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from . import analytics, stats, trends
+from .events import EventBroker, broker
+from .activity import ActivityFeed, activity_feed
 
-# Create your tests here.
+User = get_user_model()
+
+
+class DashboardStatsTest(TestCase):
+    """Test cases for the dashboard statistics"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', role='admin'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com', username='reception', password='testpass123', role='reception'
+        )
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        today = timezone.now().date()
+        for number, room_status in (('101', 'dispo'), ('102', 'dispo'), ('103', 'booked'), ('104', 'maintenance')):
+            Room.objects.create(
+                number=number, name='Room', floor=1, capacity=2,
+                price_per_night=Decimal('100.00'), status=room_status
+            )
+        room = Room.objects.get(number='101')
+        for booking_status, check_in in (('pending', 3), ('confirmed', 0), ('checked_in', -2), ('cancelled', 5)):
+            booking = Booking.objects.create(
+                guest=self.guest, room=room,
+                check_in_date=today + timedelta(days=check_in),
+                check_out_date=today + timedelta(days=check_in + 2),
+                num_guests=1, total_price=Decimal('200.00'), status=booking_status
+            )
+            Payment.objects.create(
+                booking=booking, amount=Decimal('200.00'), payment_method='cash',
+                status='completed' if booking_status != 'cancelled' else 'refunded',
+                transaction_id=f'TX{booking.id}'
+            )
+        self.client = APIClient()
+
+    def test_admin_stats_cost_four_queries(self):
+        with self.assertNumQueries(4):
+            data = stats.admin_stats()
+
+        self.assertEqual(data['rooms'], {
+            'total': 4, 'available': 2, 'reserved': 0, 'booked': 1, 'maintenance': 1
+        })
+        self.assertEqual(data['bookings'], {
+            'total': 4, 'pending': 1, 'confirmed': 1, 'checked_in': 1, 'checked_out': 0, 'cancelled': 1
+        })
+        self.assertEqual(data['payments'], {'total_revenue': 600.0})
+        self.assertEqual(data['users'], {'total': 3, 'guests': 1, 'receptionists': 1, 'admins': 1})
+
+    def test_admin_endpoint_query_budget(self):
+        self.client.force_authenticate(user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 4)
+
+    def test_reception_stats(self):
+        with self.assertNumQueries(2):
+            data = stats.reception_stats()
+
+        self.assertEqual(data['bookings']['todays_check_ins'], 1)
+        self.assertEqual(data['bookings']['todays_check_outs'], 1)
+        self.assertEqual(data['bookings']['recent'], 4)
+        self.assertEqual(data['payments'], {'total_revenue': 400.0, 'recent_revenue': 400.0})
+
+    def test_guest_stats_only_cover_own_bookings(self):
+        other = User.objects.create_user(
+            email='other@test.com', username='other', password='testpass123', role='guest'
+        )
+        self.client.force_authenticate(user=other)
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.data['bookings']['total'], 0)
+        self.assertEqual(response.data['payments'], {'total_spent': 0.0})
+
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.data['bookings']['total'], 4)
+        self.assertEqual(response.data['payments'], {'total_spent': 600.0})
+
+
+class DashboardCacheTest(TestCase):
+    """Dashboard payloads are cached until a relevant write"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        activity_feed.reset()
+        self.addCleanup(activity_feed.reset)
+        self.reception = User.objects.create_user(
+            email='reception@test.com', username='reception', password='testpass123', role='reception'
+        )
+        self.room = Room.objects.create(
+            number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+
+    def test_repeated_polls_hit_the_cache(self):
+        self.client.get('/api/dashboard/stats/')
+        self.client.get('/api/dashboard/recent-activity/')
+        with self.assertNumQueries(0):
+            stats_response = self.client.get('/api/dashboard/stats/')
+            activity_response = self.client.get('/api/dashboard/recent-activity/')
+        self.assertEqual(stats_response.data['rooms']['total'], 1)
+        self.assertEqual(activity_response.data, [])
+
+    def test_writes_invalidate_the_snapshot(self):
+        self.client.get('/api/dashboard/stats/')
+        Room.objects.create(
+            number='102', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+        )
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.data['rooms']['total'], 2)
+
+        self.room.delete()
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.data['rooms']['total'], 1)
+
+    def test_activity_times_are_rendered_per_request(self):
+        guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123'
+        )
+        booking = Booking.objects.create(
+            guest=guest, room=self.room,
+            check_in_date=timezone.now().date() + timedelta(days=1),
+            check_out_date=timezone.now().date() + timedelta(days=2),
+            num_guests=1, total_price=Decimal('100.00')
+        )
+        response = self.client.get('/api/dashboard/recent-activity/')
+        self.assertEqual(response.data[0]['id'], booking.id)
+        self.assertEqual(response.data[0]['time_ago'], 'Just now')
+
+    def test_login_does_not_invalidate(self):
+        self.client.get('/api/dashboard/stats/')
+        self.reception.last_login = timezone.now()
+        self.reception.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.client.get('/api/dashboard/stats/')
+
+
+class EventStreamTest(TestCase):
+    """Test cases for the dashboard event stream"""
+
+    def setUp(self):
+        self.reception = User.objects.create_user(
+            email='reception@test.com', username='reception', password='testpass123', role='reception'
+        )
+
+    async def test_broker_fans_out_from_other_threads(self):
+        local = EventBroker()
+        first, second = local.subscribe(), local.subscribe()
+        publisher = threading.Thread(target=local.publish, args=('room_status', {'id': 1}))
+        publisher.start()
+        publisher.join()
+
+        for queue in (first, second):
+            event = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual((event.type, event.data), ('room_status', {'id': 1}))
+
+        local.unsubscribe(first)
+        local.publish('room_status', {'id': 2})
+        await asyncio.wait_for(second.get(), 1)
+        self.assertTrue(first.empty())
+
+    async def test_slow_subscriber_keeps_latest_events(self):
+        local = EventBroker(queue_size=2)
+        queue = local.subscribe()
+        for i in range(3):
+            local.publish('activity', {'id': i})
+        await asyncio.sleep(0)
+        self.assertEqual([queue.get_nowait().data['id'] for _ in range(2)], [1, 2])
+
+    async def test_stream_delivers_published_events(self):
+        await self.async_client.aforce_login(self.reception)
+        response = await self.async_client.get('/api/dashboard/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b'retry: 5000\nevent: ready\ndata: {}\n\n')
+        event = broker.publish('room_status', {'id': 7, 'number': '101', 'status': 'booked'})
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        await stream.aclose()
+
+        self.assertEqual(
+            chunk.decode(),
+            f'id: {event.id}\nevent: room_status\ndata: {{"id": 7, "number": "101", "status": "booked"}}\n\n'
+        )
+
+    def test_stream_is_refused_under_wsgi(self):
+        # The test client goes through the WSGI handler
+        self.client.force_login(self.reception)
+        response = self.client.get('/api/dashboard/events/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_stream_requires_staff(self):
+        response = self.client.get('/api/dashboard/events/')
+        self.assertEqual(response.status_code, 401)
+
+        guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        self.client.force_login(guest)
+        response = self.client.get('/api/dashboard/events/')
+        self.assertEqual(response.status_code, 403)
+
+    def create_booking(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            room = Room.objects.create(
+                number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+            )
+            Booking.objects.create(
+                guest=self.reception, room=room,
+                check_in_date=timezone.now().date() + timedelta(days=1),
+                check_out_date=timezone.now().date() + timedelta(days=2),
+                num_guests=1, total_price=Decimal('100.00')
+            )
+
+    async def test_committed_writes_are_published(self):
+        queue = broker.subscribe()
+        try:
+            await sync_to_async(self.create_booking)()
+            events = [await asyncio.wait_for(queue.get(), 1) for _ in range(3)]
+        finally:
+            broker.unsubscribe(queue)
+
+        self.assertEqual([event.type for event in events], ['room_status', 'booking_status', 'activity'])
+        self.assertEqual(events[1].data['status'], 'pending')
+        self.assertEqual(events[2].data['description'], 'Created a booking for Room 101')
+
+
+class BookingTrendTest(TestCase):
+    """Test cases for the booking trend engine"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', role='admin'
+        )
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        self.room = Room.objects.create(
+            number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+        )
+        self.today = date(2024, 3, 20)
+
+    def add_booking(self, created, guest=None):
+        booking = Booking.objects.create(
+            guest=guest or self.admin, room=self.room,
+            check_in_date=created, check_out_date=created + timedelta(days=1),
+            num_guests=1, total_price=Decimal('100.00')
+        )
+        created_at = timezone.make_aware(datetime.combine(created, datetime.min.time()) + timedelta(hours=12))
+        Booking.objects.filter(pk=booking.pk).update(created_at=created_at)
+        return booking
+
+    def test_daily_buckets_are_gap_filled(self):
+        self.add_booking(date(2024, 3, 1))
+        self.add_booking(date(2024, 3, 1))
+        self.add_booking(date(2024, 3, 3))
+
+        data = trends.booking_trend(date(2024, 3, 1), date(2024, 3, 4), today=self.today)
+        self.assertEqual(data, [
+            {'date': date(2024, 3, 1), 'count': 2},
+            {'date': date(2024, 3, 2), 'count': 0},
+            {'date': date(2024, 3, 3), 'count': 1},
+            {'date': date(2024, 3, 4), 'count': 0},
+        ])
+
+    def test_week_and_month_granularity(self):
+        for day in (date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 5)):
+            self.add_booking(day)
+
+        weekly = trends.booking_trend(date(2024, 1, 31), date(2024, 2, 5), 'week', today=self.today)
+        self.assertEqual(weekly, [
+            {'date': date(2024, 1, 29), 'count': 2},
+            {'date': date(2024, 2, 5), 'count': 1},
+        ])
+        monthly = trends.booking_trend(date(2024, 1, 1), date(2024, 3, 1), 'month', today=self.today)
+        self.assertEqual([bucket['count'] for bucket in monthly], [1, 2, 0])
+
+    def test_only_open_buckets_are_recomputed(self):
+        self.add_booking(date(2024, 3, 18))
+        trends.booking_trend(date(2024, 3, 1), self.today, today=self.today)
+
+        # Closed days come from the cache; only today is queried
+        self.add_booking(self.today)
+        with self.assertNumQueries(1):
+            data = trends.booking_trend(date(2024, 3, 1), self.today, today=self.today)
+        self.assertEqual(data[-1], {'date': self.today, 'count': 1})
+        self.assertEqual(data[-3], {'date': date(2024, 3, 18), 'count': 1})
+
+        with self.assertNumQueries(0):
+            trends.booking_trend(date(2024, 3, 1), date(2024, 3, 19), today=self.today)
+
+    def test_deleting_a_booking_invalidates_history(self):
+        booking = self.add_booking(date(2024, 3, 18))
+        trends.booking_trend(date(2024, 3, 18), date(2024, 3, 18), today=self.today)
+        booking.delete()
+        data = trends.booking_trend(date(2024, 3, 18), date(2024, 3, 18), today=self.today)
+        self.assertEqual(data, [{'date': date(2024, 3, 18), 'count': 0}])
+
+    def test_endpoint(self):
+        self.add_booking(date(2024, 3, 1), guest=self.guest)
+        self.add_booking(date(2024, 3, 1))
+        client = APIClient()
+        url = '/api/dashboard/charts/booking-trend/?start=2024-03-01&end=2024-03-31&granularity=month'
+
+        client.force_authenticate(user=self.admin)
+        response = client.get(url)
+        self.assertEqual(response.data, [{'date': date(2024, 3, 1), 'count': 2}])
+
+        client.force_authenticate(user=self.guest)
+        response = client.get(url)
+        self.assertEqual(response.data, [{'date': date(2024, 3, 1), 'count': 1}])
+
+        for query in ('granularity=year', 'start=2024-13-01', 'start=2024-03-02&end=2024-03-01', 'start=2000-01-01'):
+            response = client.get(f'/api/dashboard/charts/booking-trend/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class ActivityFeedTest(TestCase):
+    """Test cases for the recent activity ring buffer"""
+
+    def setUp(self):
+        activity_feed.reset()
+        self.addCleanup(activity_feed.reset)
+        self.reception = User.objects.create_user(
+            email='reception@test.com', username='reception', password='testpass123', role='reception'
+        )
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123',
+            first_name='Jane', last_name='Doe'
+        )
+        self.room = Room.objects.create(
+            number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+
+    def create_booking(self, days=1):
+        return Booking.objects.create(
+            guest=self.guest, room=self.room,
+            check_in_date=timezone.now().date() + timedelta(days=days),
+            check_out_date=timezone.now().date() + timedelta(days=days + 1),
+            num_guests=1, total_price=Decimal('100.00')
+        )
+
+    def test_feed_is_seeded_once_from_the_database(self):
+        booking = self.create_booking()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/recent-activity/')
+        self.assertEqual(response.data[0]['id'], booking.id)
+        self.assertEqual(response.data[0]['guest_initials'], 'JD')
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/dashboard/recent-activity/')
+
+    def test_since_returns_only_new_events(self):
+        self.create_booking()
+        first = self.client.get('/api/dashboard/recent-activity/').data
+        last_seen = first[0]['event_id']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.create_booking(days=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'confirmed'
+            booking.save()
+
+        response = self.client.get(f'/api/dashboard/recent-activity/?since={last_seen}')
+        # One entry per booking, reflecting its latest change
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], booking.id)
+        self.assertEqual(response.data[0]['status'], 'confirmed')
+        self.assertEqual(response.data[0]['description'], 'Confirmed booking for Room 101')
+
+        latest = response.data[0]['event_id']
+        response = self.client.get(f'/api/dashboard/recent-activity/?since={latest}')
+        self.assertEqual(response.data, [])
+
+    def test_unknown_since_returns_whole_feed(self):
+        self.create_booking()
+        response = self.client.get('/api/dashboard/recent-activity/?since=999')
+        self.assertEqual(len(response.data), 1)
+
+        response = self.client.get('/api/dashboard/recent-activity/?since=abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_buffer_is_bounded(self):
+        feed = ActivityFeed(size=3, seed_size=0)
+        feed.ensure_seeded()
+        for days in range(5):
+            feed.record(self.create_booking(days=days * 2 + 1))
+        events = feed.recent()
+        self.assertEqual([event['event_id'] for event in events], [5, 4, 3])
+
+
+class OccupancyAnalyticsTest(TestCase):
+    """Test cases for the occupancy, ADR and RevPAR engine"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.reception = User.objects.create_user(
+            email='reception@test.com', username='reception', password='testpass123', role='reception'
+        )
+        self.rooms = [
+            Room.objects.create(
+                number=str(101 + i), name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00')
+            )
+            for i in range(2)
+        ]
+
+    def add_booking(self, room, check_in, nights, total, booking_status='confirmed'):
+        Booking.objects.create(
+            guest=self.reception, room=room,
+            check_in_date=check_in, check_out_date=check_in + timedelta(days=nights),
+            num_guests=1, total_price=Decimal(total), status=booking_status
+        )
+
+    def test_daily_metrics(self):
+        start = date(2024, 5, 1)
+        # Starts before the range: only its nights inside count
+        self.add_booking(self.rooms[0], start - timedelta(days=1), 3, '300.00')
+        self.add_booking(self.rooms[1], start + timedelta(days=1), 2, '400.00', 'checked_out')
+        self.add_booking(self.rooms[1], start, 1, '999.00', 'cancelled')
+        self.add_booking(self.rooms[1], start, 1, '999.00', 'pending')
+
+        report = analytics.occupancy_report(start, start + timedelta(days=3))
+        daily = [(day['rooms_sold'], day['revenue'], day['occupancy_rate'], day['adr'], day['revpar'])
+                 for day in report['daily']]
+        self.assertEqual(daily, [
+            (1, 100.0, 0.5, 100.0, 50.0),
+            (2, 300.0, 1.0, 150.0, 150.0),
+            (1, 200.0, 0.5, 200.0, 100.0),
+            (0, 0.0, 0.0, 0.0, 0.0),
+        ])
+        self.assertEqual(report['summary'], {
+            'rooms_sold': 4,
+            'room_nights_available': 8,
+            'revenue': 600.0,
+            'occupancy_rate': 0.5,
+            'adr': 150.0,
+            'revpar': 75.0,
+        })
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.reception)
+        response = client.get('/api/dashboard/analytics/?start=2024-05-01&end=2024-05-07')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['daily']), 7)
+        self.assertEqual(response.data['rooms'], 2)
+
+        response = client.get('/api/dashboard/analytics/?start=2000-01-01&end=2024-05-07')
+        self.assertEqual(response.status_code, 400)
+
+        guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        client.force_authenticate(user=guest)
+        response = client.get('/api/dashboard/analytics/')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,111 @@
+"""
+Booking trend engine.
+
+Counts bookings created per day, week or month over an arbitrary range and
+returns every bucket in the range, empty ones included. Buckets that ended
+before today can no longer gain bookings, so their counts are cached
+permanently and only buckets reaching today are queried again. Deleting a
+booking is the one write that can change history; it bumps the
+``booking-history`` version and so retires every cached bucket.
+"""
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.db.models import Count, DateField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from bookings.models import Booking
+from .cache import KEY_PREFIX, get_versions
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Largest number of buckets one request may ask for
+MAX_BUCKETS = 1000
+
+
+def bucket_start(day, granularity):
+    """First day of the bucket containing ``day``"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(start, end, granularity):
+    """Number of buckets ``buckets_between`` would return, without building them"""
+    if granularity == 'week':
+        return (bucket_start(end, 'week') - bucket_start(start, 'week')).days // 7 + 1
+    if granularity == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def buckets_between(start, end, granularity):
+    """Bucket starts covering ``start``..``end`` inclusive, widened to whole buckets"""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def count_buckets(queryset, first, last, granularity):
+    """Bookings created per bucket from bucket ``first`` through bucket ``last``"""
+    # Bounds as datetimes rather than created_at__date so the index can be used
+    rows = queryset.filter(
+        created_at__gte=start_of_day(first),
+        created_at__lt=start_of_day(next_bucket(last, granularity))
+    ).annotate(
+        bucket=Trunc('created_at', granularity, output_field=DateField())
+    ).values('bucket').annotate(count=Count('id')).order_by()
+    return {row['bucket']: row['count'] for row in rows}
+
+
+def booking_trend(start, end, granularity='day', guest=None, today=None):
+    """
+    ``[{'date': bucket_start, 'count': n}, ...]`` for every bucket between
+    ``start`` and ``end``, optionally limited to one guest's bookings.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {", ".join(GRANULARITIES)}')
+    today = today or timezone.localdate()
+    buckets = buckets_between(start, end, granularity)
+
+    scope = f'guest{guest.pk}' if guest is not None else 'all'
+    history = get_versions(['booking-history'])['booking-history']
+    keys = {
+        bucket: f'{KEY_PREFIX}:trend:{scope}:{granularity}:{bucket}:{history}'
+        for bucket in buckets
+        if next_bucket(bucket, granularity) <= today
+    }
+    cached_counts = cache.get_many(keys.values())
+    counts = {bucket: cached_counts[key] for bucket, key in keys.items() if key in cached_counts}
+
+    missing = [bucket for bucket in buckets if bucket not in counts]
+    if missing:
+        queryset = Booking.objects.all()
+        if guest is not None:
+            queryset = queryset.filter(guest=guest)
+        fetched = count_buckets(queryset, missing[0], missing[-1], granularity)
+        closed = {}
+        for bucket in missing:
+            counts[bucket] = fetched.get(bucket, 0)
+            if bucket in keys:
+                closed[keys[bucket]] = counts[bucket]
+        if closed:
+            cache.set_many(closed, timeout=None)
+
+    return [{'date': bucket, 'count': counts[bucket]} for bucket in buckets]
@@ -5,4 +5,6 @@ urlpatterns = [
     path('reception/', views.reception_dashboard, name='reception-dashboard'),
     path('guest/', views.guest_dashboard, name='guest-dashboard'),
     path('admin/', views.admin_dashboard, name='admin-dashboard'),
+    path('profiles/', views.request_profiles, name='request-profiles'),
+    path('profiles/<str:profile_id>/download/', views.download_profile, name='download-profile'),
 ]
\ No newline at end of file
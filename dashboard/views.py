@@ -1,8 +1,9 @@
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 from django.contrib import messages
+from hotel_management.profiling import list_profiles, profile_path
 
 @login_required
 def reception_dashboard(request):
@@ -47,4 +48,25 @@ def admin_dashboard(request):
         messages.error(request, 'You do not have permission to access the admin dashboard.')
         return redirect('home')
     
-    return render(request, 'dashboard/admin_dashboard.html')
\ No newline at end of file
+    return render(request, 'dashboard/admin_dashboard.html')
+
+@login_required
+def request_profiles(request):
+    """Recent request profiles (admin only)"""
+    if not request.user.is_admin():
+        messages.error(request, 'You do not have permission to view request profiles.')
+        return redirect('home')
+
+    return render(request, 'dashboard/profiles.html', {'profiles': list_profiles()})
+
+@login_required
+def download_profile(request, profile_id):
+    """Download one profile as a .prof file (admin only)"""
+    if not request.user.is_admin():
+        messages.error(request, 'You do not have permission to view request profiles.')
+        return redirect('home')
+
+    path = profile_path(profile_id)
+    if path is None:
+        raise Http404('Profile not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{profile_id}.prof')
@@ -2,6 +2,9 @@
 ASGI config for hotel_management project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (for example ``uvicorn hotel_management.asgi:application``)
+to get the dashboard event stream at /api/dashboard/events/; each open stream
+is then a coroutine on the event loop rather than a blocked worker thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
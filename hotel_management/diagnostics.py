@@ -0,0 +1,82 @@
+"""
+Slow-query log and N+1 detector.
+
+``QueryDiagnostics`` is a ``connection.execute_wrapper`` hook that times
+every query of one request, logs any query slower than the threshold, and at
+the end of the request reports query shapes that ran many times, which is
+how a per-row lookup in a serializer (an N+1) shows up. Each report names
+the view and the first frame of project code that issued the query.
+Parameters are never logged, only the SQL with its placeholders.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from django.conf import settings
+
+logger = logging.getLogger('hotel_management.sql')
+
+# Placeholder lists such as IN (%s, %s, %s) differ only in length
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+# Frames of the instrumentation itself are never reported as the origin
+OWN_FILES = (__file__, os.path.join(os.path.dirname(__file__), 'middleware.py'))
+
+
+def query_shape(sql):
+    return PLACEHOLDER_LIST.sub('%s, ...', sql)
+
+
+def calling_frame():
+    """``path:line in function`` for the innermost project frame on the stack"""
+    root = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and 'site-packages' not in filename and filename not in OWN_FILES:
+            return f'{filename[len(root) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryDiagnostics:
+    def __init__(self, view, slow_threshold, repeat_threshold):
+        self.view = view
+        self.slow_threshold = slow_threshold
+        self.repeat_threshold = repeat_threshold
+        # shape -> [count, seconds, origin of the first occurrence]
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            shape = query_shape(sql)
+            entry = self.shapes.get(shape)
+            if entry is None:
+                entry = self.shapes[shape] = [0, 0.0, calling_frame()]
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed >= self.slow_threshold:
+                logger.warning(
+                    'Slow query %.1f ms in %s at %s: %s',
+                    elapsed * 1000, self.view(), calling_frame(), shape
+                )
+
+    def repeated(self):
+        """``(shape, count, seconds, origin)`` for every shape over the repeat threshold"""
+        return [
+            (shape, count, seconds, origin)
+            for shape, (count, seconds, origin) in self.shapes.items()
+            if count >= self.repeat_threshold
+        ]
+
+    def report(self):
+        for shape, count, seconds, origin in self.repeated():
+            logger.warning(
+                'Possible N+1: %d identical queries (%.1f ms) in %s at %s: %s',
+                count, seconds * 1000, self.view(), origin, shape
+            )
@@ -0,0 +1,117 @@
+"""
+Logging pipeline pieces used by ``LOGGING`` in settings.
+
+Request threads only put records on a queue (``QueueListenerHandler``); a
+listener thread formats them as JSON lines and writes them to size-rotated
+files that are gzip-compressed on rollover. ``SamplingFilter`` thins out
+high-volume, low-severity records such as per-request access logs.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class CompressedRotatingFileHandler(RotatingFileHandler):
+    """``RotatingFileHandler`` whose rolled-over files are gzipped (``debug.log.1.gz``)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = lambda name: name + '.gz'
+        self.rotator = self.compress
+
+    @staticmethod
+    def compress(source, destination):
+        with open(source, 'rb') as plain, gzip.open(destination, 'wb') as packed:
+            shutil.copyfileobj(plain, packed)
+        os.remove(source)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep records at or below ``level`` with probability ``rate``; always keep the rest"""
+
+    def __init__(self, rate=1.0, level='WARNING'):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging._checkLevel(level)
+
+    def filter(self, record):
+        return record.levelno > self.level or random.random() < self.rate
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Queue records for ``handlers``, which a background listener thread
+    feeds. In ``LOGGING`` list the targets as ``cfg://handlers.<name>``;
+    each must sort before this handler's own name so dictConfig has built it.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        targets = [handlers[i] for i in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f'{target!r} is not a configured handler; check handler name order')
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=respect_handler_level)
+        self.listener.start()
+        atexit.register(self.close)
+        os.register_at_fork(after_in_child=self.restart)
+
+    def restart(self):
+        """Give a forked child its own queue and listener thread"""
+        if self.listener is not None:
+            old = self.listener
+            self.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.queue, *old.handlers, respect_handler_level=old.respect_handler_level)
+            self.listener.start()
+
+    def prepare(self, record):
+        # Render the message and traceback now, keeping them as separate fields
+        # so the JSON formatter on the other side can still tell them apart
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def close(self):
+        if self.listener is not None:
+            # Drains everything already queued before returning
+            self.listener.stop()
+            self.listener = None
+        super().close()
@@ -0,0 +1,163 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+Every thread records into its own shard, so the request path never takes a
+lock or contends with other threads; only the first request on a new thread
+registers its shard. When a thread ends its shard is folded into a base
+total, so a thread-per-request server keeps one shard per live thread. A
+scrape sums the base and the live shards. Counts are per process, so with
+several server workers each one exposes its own totals.
+"""
+import itertools
+import threading
+import weakref
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the SQL queries-per-request histogram buckets
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Label for requests that did not resolve to a view (404s)
+UNMATCHED = '<unmatched>'
+
+
+class ViewSeries:
+    """Counters for one (view, method) pair within one shard"""
+    __slots__ = ('latency', 'latency_sum', 'queries', 'query_count', 'query_seconds', 'statuses')
+
+    def __init__(self):
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.queries = [0] * (len(QUERY_BUCKETS) + 1)
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.statuses = {}
+
+
+def add_series(totals, shard):
+    """Add every series of ``shard`` into ``totals``"""
+    # Copy first: the owning thread may add a series meanwhile
+    for key, series in list(shard.items()):
+        total = totals.get(key)
+        if total is None:
+            total = totals[key] = ViewSeries()
+        for i, count in enumerate(series.latency):
+            total.latency[i] += count
+        for i, count in enumerate(series.queries):
+            total.queries[i] += count
+        total.latency_sum += series.latency_sum
+        total.query_count += series.query_count
+        total.query_seconds += series.query_seconds
+        for status, count in list(series.statuses.items()):
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        # Live threads' shards by token, and the sum of finished threads' shards
+        self._shards = {}
+        self._retired = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'series', None)
+        if shard is None:
+            shard = self._local.series = {}
+            token = next(self._tokens)
+            with self._lock:
+                self._shards[token] = shard
+            weakref.finalize(threading.current_thread(), self._retire, token)
+        return shard
+
+    def _retire(self, token):
+        """Fold a finished thread's shard into the base total"""
+        with self._lock:
+            shard = self._shards.pop(token, None)
+            if shard:
+                add_series(self._retired, shard)
+
+    def observe(self, view, method, status, duration, queries, query_seconds):
+        shard = self._shard()
+        series = shard.get((view, method))
+        if series is None:
+            series = shard[(view, method)] = ViewSeries()
+        series.latency[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        series.latency_sum += duration
+        series.queries[bisect_left(QUERY_BUCKETS, queries)] += 1
+        series.query_count += queries
+        series.query_seconds += query_seconds
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+    def live_shards(self):
+        return len(self._shards)
+
+    def collect(self):
+        """Sum every shard into ``{(view, method): ViewSeries}``"""
+        totals = {}
+        with self._lock:
+            add_series(totals, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            add_series(totals, shard)
+        return totals
+
+    def render(self):
+        """The Prometheus text exposition of everything recorded so far"""
+        totals = sorted(self.collect().items())
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, bounds, counts, total_sum, labels):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {total_sum}')
+            lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+        header('http_requests_total', 'counter', 'Requests handled, by view, method and status code.')
+        for (view, method), series in totals:
+            for status, count in sorted(series.statuses.items()):
+                lines.append(f'http_requests_total{{{labels(view, method)},status="{status}"}} {count}')
+
+        header('http_request_duration_seconds', 'histogram', 'Time spent handling requests.')
+        for (view, method), series in totals:
+            histogram('http_request_duration_seconds', LATENCY_BUCKETS, series.latency,
+                      series.latency_sum, labels(view, method))
+
+        header('db_queries_per_request', 'histogram', 'SQL queries run per request.')
+        for (view, method), series in totals:
+            histogram('db_queries_per_request', QUERY_BUCKETS, series.queries,
+                      series.query_count, labels(view, method))
+
+        header('db_query_duration_seconds_total', 'counter', 'Time spent in SQL queries.')
+        for (view, method), series in totals:
+            lines.append(f'db_query_duration_seconds_total{{{labels(view, method)}}} {series.query_seconds}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(view, method):
+    return f'view="{escape(view)}",method="{escape(method)}"'
+
+
+registry = MetricsRegistry()
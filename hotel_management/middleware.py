@@ -0,0 +1,231 @@
+import cProfile
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .diagnostics import QueryDiagnostics
+from .metrics import UNMATCHED, registry
+from .profiling import save_profile
+
+logger = logging.getLogger(__name__)
+
+# One profiled request at a time. From Python 3.12 cProfile is process-wide:
+# a second profiler fails to start, and other threads' calls are recorded too
+PROFILER_LOCK = threading.Lock()
+
+
+class QueryTimer:
+    """``connection.execute_wrapper`` hook counting queries and their time"""
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def _add_execute_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_execute_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+@asynccontextmanager
+async def view_thread_execute_wrapper(wrapper):
+    """
+    ``connection.execute_wrapper`` for an ASGI request. Connections are per
+    thread, and sync views (and the ORM under async views) run in the
+    request's thread-sensitive worker thread, so the hook is installed on
+    that thread's connection rather than the event loop's.
+    """
+    await sync_to_async(_add_execute_wrapper)(wrapper)
+    try:
+        yield
+    finally:
+        await sync_to_async(_remove_execute_wrapper)(wrapper)
+
+
+def view_label(request):
+    """The URL pattern that matched, which keeps the label set small"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED
+    return '/' + match.route if match.route else match.view_name or UNMATCHED
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, status and SQL work per view into the metrics registry,
+    served at ``/api/metrics/``. Place it first so it times the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        async with view_thread_execute_wrapper(timer):
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    def record(self, request, response, duration, timer):
+        registry.observe(
+            view_label(request), request.method, response.status_code, duration, timer.count, timer.seconds
+        )
+
+
+class QueryDiagnosticsMiddleware:
+    """
+    Opt-in slow-query log and N+1 detector (``SQL_DIAGNOSTICS``), writing to
+    the ``hotel_management.sql`` logger.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SQL_DIAGNOSTICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_threshold = settings.SQL_SLOW_QUERY_MS / 1000
+        self.repeat_threshold = settings.SQL_REPEATED_QUERY_THRESHOLD
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def diagnostics(self, request):
+        return QueryDiagnostics(lambda: view_label(request), self.slow_threshold, self.repeat_threshold)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        diagnostics = self.diagnostics(request)
+        with connection.execute_wrapper(diagnostics):
+            response = self.get_response(request)
+        diagnostics.report()
+        return response
+
+    async def __acall__(self, request):
+        diagnostics = self.diagnostics(request)
+        async with view_thread_execute_wrapper(diagnostics):
+            response = await self.get_response(request)
+        diagnostics.report()
+        return response
+
+
+def profile_requested(request):
+    return request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1'
+
+
+def requesting_user(request):
+    """The session user, or the JWT bearer the API view will authenticate later"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+class RequestProfilingMiddleware:
+    """
+    Run admin requests that ask for it (``X-Profile: 1`` or ``?profile=1``)
+    under cProfile and store the result; the response carries its id in
+    ``X-Profile-Id``. Profiles are listed at ``/dashboards/profiles/``.
+    Only one request is profiled at a time; others asking meanwhile run
+    unprofiled. Must come after AuthenticationMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def profiling_user(self, request):
+        """The admin asking for ``request`` to be profiled, or None"""
+        if not profile_requested(request):
+            return None
+        user = requesting_user(request)
+        if user is None or not user.is_admin():
+            return None
+        if not PROFILER_LOCK.acquire(blocking=False):
+            logger.warning('Not profiling %s: another request is being profiled', request.get_full_path())
+            return None
+        return user
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = self.profiling_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+            PROFILER_LOCK.release()
+        self.save(request, response, user, profiler, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        user = await sync_to_async(self.profiling_user)(request) if profile_requested(request) else None
+        if user is None:
+            return await self.get_response(request)
+
+        # cProfile follows the thread that enables it, so profile the
+        # request's worker thread, where sync views and the ORM run
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            await sync_to_async(profiler.enable)()
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(profiler.disable)()
+            PROFILER_LOCK.release()
+        await sync_to_async(self.save)(request, response, user, profiler, time.perf_counter() - started)
+        return response
+
+    def save(self, request, response, user, profiler, duration):
+        response['X-Profile-Id'] = save_profile(
+            profiler, method=request.method, path=request.get_full_path(), view=view_label(request),
+            status=response.status_code, duration_ms=round(duration * 1000, 2), user=user.email
+        )
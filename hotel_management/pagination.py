@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first. The id breaks ties between rows created
+    in the same instant so pages never skip or repeat rows.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class RoomNumberCursorPagination(CreatedAtCursorPagination):
+    ordering = ('number', 'id')
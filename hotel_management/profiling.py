@@ -0,0 +1,69 @@
+"""
+Storage for on-demand request profiles.
+
+An admin request carrying ``X-Profile: 1`` (or ``?profile=1``) runs under
+cProfile, and the result is saved as ``<id>.prof`` next to a small JSON
+description of the request. The files load in ``pstats``, snakeviz or
+flameprof. Only the newest ``PROFILE_KEEP`` profiles are kept.
+"""
+import json
+import os
+import re
+import uuid
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_ID = re.compile(r'[0-9a-f]{32}')
+
+
+def profile_dir():
+    return str(settings.PROFILE_DIR)
+
+
+def profile_path(profile_id):
+    """Path of a stored ``.prof`` file, or None for an unknown or malformed id"""
+    if not PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = os.path.join(profile_dir(), f'{profile_id}.prof')
+    return path if os.path.exists(path) else None
+
+
+def save_profile(profiler, **details):
+    """Write ``profiler``'s stats and ``details``; returns the new profile id"""
+    profile_id = uuid.uuid4().hex
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+    details.update(id=profile_id, created_at=timezone.now().isoformat())
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as meta:
+        json.dump(details, meta)
+    prune()
+    return profile_id
+
+
+def list_profiles():
+    """Descriptions of the stored profiles, newest first"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as meta:
+                profiles.append(json.load(meta))
+        except (OSError, ValueError):
+            # Being written or pruned by another request
+            continue
+    profiles.sort(key=lambda profile: profile['created_at'], reverse=True)
+    return profiles
+
+
+def prune():
+    for profile in list_profiles()[settings.PROFILE_KEEP:]:
+        for extension in ('prof', 'json'):
+            try:
+                os.remove(os.path.join(profile_dir(), f'{profile["id"]}.{extension}'))
+            except FileNotFoundError:
+                pass
@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hotel_management.middleware.RequestMetricsMiddleware',
+    'hotel_management.middleware.QueryDiagnosticsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,6 +64,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hotel_management.middleware.RequestProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'hotel_management.urls'
@@ -92,6 +95,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so concurrent
+            # check-then-insert transactions queue up instead of failing
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file-backed test database lets threaded tests use separate
+        # connections (shared-cache in-memory SQLite fails with "table locked")
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -164,30 +178,108 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Nights ahead of today covered by the in-memory room availability index
+AVAILABILITY_HORIZON_DAYS = 730
+
+# Audit log entries are buffered and written in batches by a background thread.
+# AUDIT_WRITER_SYNC=1 writes them inside the request's transaction instead; the
+# test runner (hotel_management.test_runner) turns it on so assertions see them.
+AUDIT_WRITER_SYNC = os.environ.get('AUDIT_WRITER_SYNC') == '1'
+AUDIT_LOG_BATCH_SIZE = 100
+AUDIT_LOG_FLUSH_INTERVAL = 1.0  # seconds
+AUDIT_LOG_MAX_RETRIES = 3
+AUDIT_LOG_MAX_PENDING = 10000
+
+TEST_RUNNER = 'hotel_management.test_runner.TestRunner'
+
+# Dashboard payloads are cached per process by default; point this at a shared
+# backend (Redis, Memcached) when running several workers so invalidation is
+# seen by all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hotel-management',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Upper bound on how long a dashboard payload is served (seconds); writes
+# invalidate it sooner
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Bearer token required to read /api/metrics/; when unset the endpoint is only
+# served with DEBUG on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Slow-query log and N+1 detector, written to sql.log. Off by default; enable
+# with SQL_DIAGNOSTICS=1 while investigating a slow endpoint.
+SQL_DIAGNOSTICS = os.environ.get('SQL_DIAGNOSTICS') == '1'
+SQL_SLOW_QUERY_MS = 100
+# Identical query shapes within one request before it is reported as an N+1
+SQL_REPEATED_QUERY_THRESHOLD = 10
+
+# Admins can profile a single request by sending X-Profile: 1 (or ?profile=1);
+# the newest PROFILE_KEEP profiles are kept in PROFILE_DIR
+REQUEST_PROFILING = True
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_KEEP = 50
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # For React frontend if needed
     "http://127.0.0.1:3000",
 ]
 
-# Logging configuration
+# Logging configuration. Loggers only enqueue records; a listener thread writes
+# them as JSON lines to size-rotated, gzip-compressed files, so request threads
+# never wait on log I/O.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+# Share of routine per-request records (access lines, 4xx warnings) kept
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'sampled': {
+            '()': 'hotel_management.logs.SamplingFilter',
+            'rate': LOG_SAMPLE_RATE,
+            'level': 'WARNING',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': 'simple',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            'class': 'hotel_management.logs.CompressedRotatingFileHandler',
             'filename': os.path.join(BASE_DIR, 'debug.log'),
-            'formatter': 'verbose',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'json',
+        },
+        # Handlers are built in name order, so each queue sorts after its targets
+        'queue': {
+            'class': 'hotel_management.logs.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+        },
+        'sql_file': {
+            'class': 'hotel_management.logs.CompressedRotatingFileHandler',
+            'filename': os.path.join(BASE_DIR, 'sql.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'json',
+        },
+        'sql_queue': {
+            'class': 'hotel_management.logs.QueueListenerHandler',
+            'handlers': ['cfg://handlers.sql_file'],
         },
     },
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        'json': {
+            '()': 'hotel_management.logs.JSONFormatter',
         },
         'simple': {
             'format': '{levelname} {message}',
@@ -195,19 +287,37 @@ LOGGING = {
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
-        'level': 'INFO',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        # One record per request: keep a sample of the routine ones
+        'django.server': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'filters': ['sampled'],
+            'propagate': False,
+        },
+        'django.request': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'filters': ['sampled'],
             'propagate': False,
         },
         'accounts': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'hotel_management.sql': {
+            'handlers': ['sql_queue'],
             'level': 'INFO',
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
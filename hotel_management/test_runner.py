@@ -0,0 +1,42 @@
+"""
+Test runner for ``manage.py test``.
+
+Audit entries are written inside the caller's transaction during tests so
+assertions see them straight away (``AUDIT_WRITER_SYNC``). Other runners
+should set ``AUDIT_WRITER_SYNC=1`` in the environment. Log files are written
+to a temporary directory rather than the project's ``debug.log``.
+"""
+import copy
+import os
+import shutil
+import tempfile
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.utils.log import configure_logging
+
+
+def logging_in(directory, config):
+    """``config`` with every file handler moved into ``directory``"""
+    config = copy.deepcopy(config)
+    for handler in config.get('handlers', {}).values():
+        if 'filename' in handler:
+            handler['filename'] = os.path.join(directory, os.path.basename(handler['filename']))
+    return config
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._log_dir = tempfile.mkdtemp(prefix='hotel-test-logs-')
+        self._test_settings = override_settings(
+            AUDIT_WRITER_SYNC=True, LOGGING=logging_in(self._log_dir, settings.LOGGING)
+        )
+        self._test_settings.enable()
+        configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+        shutil.rmtree(self._log_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,372 @@
+import gc
+import gzip
+import json
+import logging
+import os
+import pstats
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+from payments.models import Payment
+from rooms.models import Room
+from rooms.availability import availability_index
+from .diagnostics import QueryDiagnostics, query_shape
+from .logs import CompressedRotatingFileHandler, JSONFormatter, QueueListenerHandler, SamplingFilter
+from .metrics import MetricsRegistry, registry
+from .middleware import PROFILER_LOCK, QueryDiagnosticsMiddleware
+from .profiling import list_profiles, profile_path
+
+User = get_user_model()
+
+
+class MetricsRegistryTest(TestCase):
+    """Test cases for the metrics registry"""
+
+    def test_histograms_are_cumulative(self):
+        metrics = MetricsRegistry()
+        metrics.observe('/api/rooms/', 'GET', 200, 0.003, 2, 0.001)
+        metrics.observe('/api/rooms/', 'GET', 200, 0.2, 30, 0.05)
+        metrics.observe('/api/rooms/', 'GET', 500, 20.0, 0, 0.0)
+        text = metrics.render()
+
+        self.assertIn('http_requests_total{view="/api/rooms/",method="GET",status="200"} 2', text)
+        self.assertIn('http_requests_total{view="/api/rooms/",method="GET",status="500"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="/api/rooms/",method="GET",le="0.005"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="/api/rooms/",method="GET",le="0.25"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="/api/rooms/",method="GET",le="+Inf"} 3', text)
+        self.assertIn('http_request_duration_seconds_count{view="/api/rooms/",method="GET"} 3', text)
+        self.assertIn('db_queries_per_request_bucket{view="/api/rooms/",method="GET",le="2"} 2', text)
+        self.assertIn('db_queries_per_request_sum{view="/api/rooms/",method="GET"} 32', text)
+
+    def test_finished_threads_are_folded_into_the_total(self):
+        metrics = MetricsRegistry()
+        threads = [
+            threading.Thread(target=metrics.observe, args=('/api/rooms/', 'GET', 200, 0.01, 1, 0.001))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        del threads, thread
+        gc.collect()
+
+        self.assertEqual(metrics.live_shards(), 0)
+        self.assertIn('http_requests_total{view="/api/rooms/",method="GET",status="200"} 5', metrics.render())
+
+    def test_label_values_are_escaped(self):
+        metrics = MetricsRegistry()
+        metrics.observe('a"b\\c', 'GET', 200, 0.1, 0, 0.0)
+        self.assertIn('view="a\\"b\\\\c"', metrics.render())
+
+
+class MetricsEndpointTest(TestCase):
+    """Test cases for the request metrics middleware and endpoint"""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.addCleanup(availability_index.invalidate)
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        Room.objects.create(number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00'))
+        self.client = APIClient()
+
+    def scrape(self, **headers):
+        response = self.client.get('/api/metrics/', headers=headers)
+        return response.status_code, response.content.decode()
+
+    @override_settings(DEBUG=True)
+    def test_requests_are_recorded_per_route(self):
+        self.client.force_authenticate(user=self.guest)
+        self.client.get('/api/rooms/')
+        self.client.get('/api/rooms/')
+        self.client.get('/api/no-such-endpoint/')
+
+        status, text = self.scrape()
+        self.assertEqual(status, 200)
+        self.assertIn('http_requests_total{view="/api/rooms/",method="GET",status="200"} 2', text)
+        self.assertIn('http_requests_total{view="<unmatched>",method="GET",status="404"} 1', text)
+        queries = re.search(r'db_queries_per_request_sum\{view="/api/rooms/",method="GET"\} (\d+)', text)
+        self.assertGreater(int(queries.group(1)), 0)
+        self.assertRegex(text, r'db_query_duration_seconds_total\{view="/api/rooms/",method="GET"\} [0-9.e-]+')
+
+    @override_settings(DEBUG=True)
+    async def test_queries_are_counted_under_asgi(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.guest).access_token))()
+        client = AsyncClient()
+        response = await client.get('/api/rooms/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+
+        # The sync view ran in a worker thread, with its own connection
+        text = (await client.get('/api/metrics/')).content.decode()
+        queries = re.search(r'db_queries_per_request_sum\{view="/api/rooms/",method="GET"\} (\d+)', text)
+        self.assertGreater(int(queries.group(1)), 0)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.scrape()[0], 401)
+        self.assertEqual(self.scrape(Authorization='Bearer wrong')[0], 401)
+        self.assertEqual(self.scrape(Authorization='Bearer scrape-secret')[0], 200)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_no_token_outside_debug_is_refused(self):
+        self.assertEqual(self.scrape()[0], 403)
+
+
+class QueryDiagnosticsTest(TestCase):
+    """Test cases for the slow-query log and N+1 detector"""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.addCleanup(availability_index.invalidate)
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        room = Room.objects.create(number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00'))
+        today = timezone.localdate()
+        for i in range(12):
+            booking = Booking.objects.create(
+                guest=self.guest, room=room, check_in_date=today + timedelta(days=i * 2),
+                check_out_date=today + timedelta(days=i * 2 + 1), num_guests=1,
+                total_price=Decimal('100.00'), status='confirmed'
+            )
+            Payment.objects.create(
+                booking=booking, amount=Decimal('100.00'), payment_method='cash',
+                status='completed', transaction_id=f'TX{booking.id}'
+            )
+        self.client = APIClient()
+
+    def test_query_shape_collapses_placeholder_lists(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM rooms WHERE id IN (%s, %s, %s) AND floor = %s'),
+            'SELECT * FROM rooms WHERE id IN (%s, ...) AND floor = %s'
+        )
+
+    def test_detects_per_row_queries(self):
+        diagnostics = QueryDiagnostics(lambda: 'test', slow_threshold=60, repeat_threshold=10)
+        with connection.execute_wrapper(diagnostics):
+            # Without with_details() every booking looks up its payment
+            BookingSerializer(Booking.objects.all(), many=True).data
+
+        repeated = diagnostics.repeated()
+        payments = [entry for entry in repeated if '"payments"' in entry[0]]
+        self.assertEqual(len(payments), 1)
+        shape, count, _, origin = payments[0]
+        self.assertEqual(count, 12)
+        self.assertIn('bookings/serializers.py', origin)
+        self.assertIn('get_payment', origin)
+
+        with self.assertLogs('hotel_management.sql', 'WARNING') as logs:
+            diagnostics.report()
+        self.assertTrue(any('Possible N+1: 12 identical queries' in line for line in logs.output))
+
+    @override_settings(SQL_DIAGNOSTICS=True, SQL_SLOW_QUERY_MS=0)
+    def test_middleware_logs_slow_queries_with_view(self):
+        self.client.force_authenticate(user=self.guest)
+        with self.assertLogs('hotel_management.sql', 'WARNING') as logs:
+            self.assertEqual(self.client.get('/api/bookings/guest/list/').status_code, 200)
+        self.assertTrue(any('Slow query' in line and '/api/bookings/guest/list/' in line for line in logs.output))
+        # The list uses with_details(), so nothing repeats per booking
+        self.assertFalse(any('Possible N+1' in line for line in logs.output))
+
+    @override_settings(SQL_DIAGNOSTICS=True, SQL_SLOW_QUERY_MS=0)
+    async def test_middleware_sees_queries_under_asgi(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.guest).access_token))()
+        with self.assertLogs('hotel_management.sql', 'WARNING') as logs:
+            response = await AsyncClient().get(
+                '/api/bookings/guest/list/', headers={'Authorization': f'Bearer {token}'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('Slow query' in line and '/api/bookings/guest/list/' in line for line in logs.output))
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryDiagnosticsMiddleware(lambda request: None)
+
+
+class RequestProfilingTest(TestCase):
+    """Test cases for on-demand request profiling"""
+
+    def setUp(self):
+        availability_index.invalidate()
+        self.addCleanup(availability_index.invalidate)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(PROFILE_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(
+            email='admin@test.com', username='admin', password='testpass123', role='admin'
+        )
+        self.guest = User.objects.create_user(
+            email='guest@test.com', username='guest', password='testpass123', role='guest'
+        )
+        Room.objects.create(number='101', name='Room', floor=1, capacity=2, price_per_night=Decimal('100.00'))
+        self.client = APIClient()
+
+    def get_rooms(self, user, **headers):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get('/api/rooms/', headers={'Authorization': f'Bearer {token}', **headers})
+
+    def test_admin_request_is_profiled(self):
+        response = self.get_rooms(self.admin, X_Profile='1')
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+
+        stats = pstats.Stats(profile_path(profile_id))
+        self.assertGreater(stats.total_calls, 0)
+        [profile] = list_profiles()
+        self.assertEqual(profile['id'], profile_id)
+        self.assertEqual(profile['view'], '/api/rooms/')
+        self.assertEqual(profile['user'], self.admin.email)
+
+    def test_only_admins_who_ask_are_profiled(self):
+        self.assertNotIn('X-Profile-Id', self.get_rooms(self.admin))
+        self.assertNotIn('X-Profile-Id', self.get_rooms(self.guest, X_Profile='1'))
+        self.assertEqual(list_profiles(), [])
+
+    def test_one_profile_at_a_time(self):
+        with PROFILER_LOCK:
+            with self.assertLogs('hotel_management.middleware', 'WARNING'):
+                response = self.get_rooms(self.admin, X_Profile='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertIn('X-Profile-Id', self.get_rooms(self.admin, X_Profile='1'))
+
+    async def test_asgi_request_is_profiled(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.admin).access_token))()
+        response = await AsyncClient().get(
+            '/api/rooms/', headers={'Authorization': f'Bearer {token}', 'X-Profile': '1'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # The view ran in a worker thread, and its calls are in the profile
+        stats = pstats.Stats(profile_path(response['X-Profile-Id']))
+        self.assertTrue(any(function == 'list' for _, _, function in stats.stats))
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_old_profiles_are_pruned(self):
+        ids = [self.get_rooms(self.admin, X_Profile='1')['X-Profile-Id'] for _ in range(3)]
+        kept = [profile['id'] for profile in list_profiles()]
+        self.assertEqual(len(kept), 2)
+        self.assertIn(ids[-1], kept)
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+    def test_profiles_page(self):
+        profile_id = self.get_rooms(self.admin, X_Profile='1')['X-Profile-Id']
+
+        self.client.force_login(self.guest)
+        self.assertEqual(self.client.get('/dashboards/profiles/').status_code, 302)
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/dashboards/profiles/')
+        self.assertContains(response, '/api/rooms/')
+        download = self.client.get(f'/dashboards/profiles/{profile_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content))
+        self.assertEqual(self.client.get('/dashboards/profiles/../settings/download/').status_code, 404)
+        self.assertEqual(self.client.get(f'/dashboards/profiles/{"0" * 32}/download/').status_code, 404)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class LoggingPipelineTest(TestCase):
+    """Test cases for the queued JSON logging pipeline"""
+
+    def record(self, level=logging.INFO, msg='Booking %s confirmed', args=(7,), exc_info=None, **extra):
+        record = logging.LogRecord('bookings', level, __file__, 1, msg, args, exc_info)
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_formatter(self):
+        try:
+            raise ValueError('bad date')
+        except ValueError:
+            record = self.record(logging.ERROR, exc_info=sys.exc_info(), booking_id=7)
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertEqual(entry['level'], 'ERROR')
+        self.assertEqual(entry['logger'], 'bookings')
+        self.assertEqual(entry['message'], 'Booking 7 confirmed')
+        self.assertEqual(entry['booking_id'], 7)
+        self.assertIn('ValueError: bad date', entry['exception'])
+
+    def test_sampling_keeps_errors(self):
+        drop_all = SamplingFilter(rate=0.0, level='WARNING')
+        self.assertFalse(drop_all.filter(self.record(logging.INFO)))
+        self.assertFalse(drop_all.filter(self.record(logging.WARNING)))
+        self.assertTrue(drop_all.filter(self.record(logging.ERROR)))
+        self.assertTrue(SamplingFilter(rate=1.0).filter(self.record(logging.INFO)))
+
+    def test_rotated_files_are_compressed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'app.log')
+        handler = CompressedRotatingFileHandler(path, maxBytes=200, backupCount=2)
+        handler.setFormatter(JSONFormatter())
+        for _ in range(20):
+            handler.emit(self.record())
+        handler.close()
+
+        self.assertEqual(sorted(os.listdir(directory)), ['app.log', 'app.log.1.gz', 'app.log.2.gz'])
+        with gzip.open(path + '.1.gz', 'rt') as rotated:
+            self.assertEqual(json.loads(rotated.readline())['message'], 'Booking 7 confirmed')
+
+    def test_queue_handler_delivers_in_background(self):
+        target = ListHandler()
+        handler = QueueListenerHandler([target])
+        try:
+            raise KeyError('room')
+        except KeyError:
+            handler.handle(self.record(logging.ERROR, exc_info=sys.exc_info()))
+        handler.handle(self.record(args=(8,), booking_id=8))
+        # Closing drains the queue
+        handler.close()
+
+        first, second = target.records
+        self.assertIsNone(first.exc_info)
+        self.assertIn("KeyError: 'room'", first.exc_text)
+        self.assertEqual(first.getMessage(), 'Booking 7 confirmed')
+        self.assertEqual(second.getMessage(), 'Booking 8 confirmed')
+        self.assertEqual(second.booking_id, 8)
+
+    def test_tests_do_not_write_the_project_log(self):
+        targets = logging.getLogger('accounts').handlers[0].listener.handlers
+        files = [target.baseFilename for target in targets if isinstance(target, logging.FileHandler)]
+        self.assertEqual([os.path.basename(path) for path in files], ['debug.log'])
+        self.assertNotEqual(os.path.dirname(files[0]), str(settings.BASE_DIR))
+
+    def test_login_does_not_log_credentials(self):
+        User.objects.create_user(email='guest@test.com', username='guest', password='testpass123', role='guest')
+        with self.assertLogs('accounts', 'DEBUG') as logs:
+            response = APIClient().post(
+                '/api/accounts/login/', {'email': 'guest@test.com', 'password': 'testpass123'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        output = '\n'.join(logs.output)
+        self.assertNotIn('testpass123', output)
+        self.assertNotIn(response.data['access'], output)
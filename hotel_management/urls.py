@@ -35,4 +35,6 @@ urlpatterns = [
     path('api/payments/', include('payments.urls')),
     path('api/accounts/', include('accounts.api_urls')),
     path('api/audit/', include('audit.api_urls')),
+    path('api/reception/', include('reception.urls')),
+    path('api/metrics/', views.metrics, name='metrics'),
 ]
\ No newline at end of file
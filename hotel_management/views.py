@@ -7,6 +7,10 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from .metrics import registry
 
 def home(request):
     # If user is authenticated, redirect to their dashboard
@@ -42,4 +46,17 @@ def dashboard_redirect(request):
 def logout_view(request):
     logout(request)
     messages.success(request, 'You have been successfully logged out.')
-    return redirect('home')
\ No newline at end of file
+    return redirect('home')
+
+@require_GET
+def metrics(request):
+    """Request and SQL metrics in Prometheus text format"""
+    # Scrapers authenticate with a static token; only development servers
+    # (DEBUG on) expose the metrics without one
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse('Set METRICS_TOKEN to enable metrics', status=403, content_type='text/plain')
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_query_indexes'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status'], name='payment_status_idx'),
+        ),
+    ]
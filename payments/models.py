@@ -35,4 +35,7 @@ class Payment(models.Model):
         
     class Meta:
         db_table = 'payments'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status'], name='payment_status_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Front-desk board: who arrives, who is staying and who leaves on a given day.
+
+The three lists come from one query over the bookings joined with their guest
+and room, split in Python. Only the columns the board shows are selected.
+"""
+from django.db.models import Q
+from bookings.models import Booking
+
+# Arrivals and departures still listed once processed, so the desk can tick them off
+ARRIVAL_STATUSES = ('confirmed', 'checked_in')
+DEPARTURE_STATUSES = ('checked_in', 'checked_out')
+
+FIELDS = (
+    'id', 'status', 'check_in_date', 'check_out_date', 'num_guests',
+    'guest_id', 'guest__username', 'guest__first_name', 'guest__last_name',
+    'guest__email', 'guest__phone_number',
+    'room_id', 'room__number', 'room__name', 'room__floor',
+)
+
+
+def board_entry(row):
+    full_name = f"{row['guest__first_name']} {row['guest__last_name']}".strip()
+    return {
+        'booking_id': row['id'],
+        'status': row['status'],
+        'check_in_date': row['check_in_date'],
+        'check_out_date': row['check_out_date'],
+        'num_guests': row['num_guests'],
+        'guest': {
+            'id': row['guest_id'],
+            'name': full_name or row['guest__username'],
+            'email': row['guest__email'],
+            'phone_number': row['guest__phone_number'],
+        },
+        'room': {
+            'id': row['room_id'],
+            'number': row['room__number'],
+            'name': row['room__name'],
+            'floor': row['room__floor'],
+        },
+    }
+
+
+def front_desk_board(day):
+    """
+    Arrivals (check-in on ``day``), in-house guests (checked in and staying
+    the night of ``day``) and departures (check-out on ``day``): one query
+    """
+    arriving = Q(check_in_date=day, status__in=ARRIVAL_STATUSES)
+    departing = Q(check_out_date=day, status__in=DEPARTURE_STATUSES)
+    staying = Q(status='checked_in', check_in_date__lte=day, check_out_date__gt=day)
+
+    rows = (
+        Booking.objects
+        .filter(arriving | departing | staying)
+        .order_by('room__number', 'id')
+        .values(*FIELDS)
+    )
+    board = {'date': day, 'arrivals': [], 'in_house': [], 'departures': []}
+    for row in rows:
+        entry = board_entry(row)
+        if row['check_in_date'] == day and row['status'] in ARRIVAL_STATUSES:
+            board['arrivals'].append(entry)
+        if row['check_out_date'] == day and row['status'] in DEPARTURE_STATUSES:
+            board['departures'].append(entry)
+        if row['status'] == 'checked_in' and row['check_in_date'] <= day < row['check_out_date']:
+            board['in_house'].append(entry)
+    board['counts'] = {key: len(board[key]) for key in ('arrivals', 'in_house', 'departures')}
+    return board
@@ -1,3 +1,220 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from audit.models import AuditLog
+from bookings.models import Booking, RoomNight
+from bookings.inventory import claim_room_nights
+from bookings.services import StatusConflict, compare_and_set_status
+from rooms.models import Room
+from rooms.availability import availability_index
+from datetime import date, timedelta
+from decimal import Decimal
+from .views import (
+    bulk_check_in, bulk_check_out, check_in_guest, check_out_guest,
+    finish_room_maintenance, mark_room_maintenance
+)
 
-# Create your tests here.
+User = get_user_model()
+
+
+class ReceptionFixtures:
+    def create_fixtures(self):
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        self.room = Room.objects.create(
+            number='101',
+            name='Single',
+            floor=1,
+            capacity=2,
+            price_per_night=Decimal('100.00')
+        )
+        self.booking = Booking.objects.create(
+            guest=self.guest,
+            room=self.room,
+            check_in_date=date.today(),
+            check_out_date=date.today() + timedelta(days=2),
+            num_guests=1,
+            total_price=Decimal('200.00'),
+            status='confirmed'
+        )
+        claim_room_nights(self.booking)
+        self.factory = APIRequestFactory()
+
+    def call(self, view, data=None, **kwargs):
+        request = self.factory.post('/', data, format='json')
+        force_authenticate(request, user=self.reception)
+        return view(request, **kwargs)
+
+
+class ReceptionWorkflowTest(ReceptionFixtures, TestCase):
+    """Test cases for check-in, check-out and maintenance"""
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def test_check_in_then_out(self):
+        self.assertEqual(self.call(check_in_guest, booking_id=self.booking.id).status_code, 200)
+        self.assertEqual(self.call(check_in_guest, booking_id=self.booking.id).status_code, 400)
+        self.assertEqual(self.call(check_out_guest, booking_id=self.booking.id).status_code, 200)
+
+        self.booking.refresh_from_db()
+        self.room.refresh_from_db()
+        self.assertEqual(self.booking.status, 'checked_out')
+        self.assertEqual(self.room.status, 'dispo')
+        self.assertFalse(RoomNight.objects.filter(booking=self.booking).exists())
+
+    def test_bulk_check_in_then_out(self):
+        ids = [self.booking.id, self.booking.id + 1]
+        response = self.call(bulk_check_in, {'booking_ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'][1]['error'], 'Booking not found')
+
+        response = self.call(bulk_check_out, {'booking_ids': [self.booking.id]})
+        self.assertEqual(response.data['results'], [
+            {'booking_id': self.booking.id, 'status': 'checked_out', 'room_number': '101'}
+        ])
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'dispo')
+        self.assertEqual(self.call(bulk_check_out, {}).status_code, 400)
+
+    def test_maintenance(self):
+        self.assertEqual(self.call(finish_room_maintenance, room_id=self.room.id).status_code, 400)
+        self.assertEqual(self.call(mark_room_maintenance, room_id=self.room.id).status_code, 200)
+        self.assertEqual(self.call(mark_room_maintenance, room_id=self.room.id).status_code, 400)
+        response = self.call(finish_room_maintenance, room_id=self.room.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['new_status'], 'dispo')
+
+    def test_stale_status_is_a_conflict(self):
+        stale = Room.objects.get(id=self.room.id)
+        Room.objects.filter(id=self.room.id).update(status='maintenance')
+        with self.assertRaises(StatusConflict):
+            compare_and_set_status(stale, 'dispo', 'booked')
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.status, 'maintenance')
+
+
+class FrontDeskBoardTest(ReceptionFixtures, TestCase):
+    """Test cases for the arrivals/departures board"""
+
+    def setUp(self):
+        self.create_fixtures()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+        today = date.today()
+        other_room = Room.objects.create(number='102', name='Double', floor=1, capacity=2,
+                                         price_per_night=Decimal('150.00'))
+        # Checked in two days ago and leaving today
+        self.departure = Booking.objects.create(
+            guest=self.guest, room=other_room, check_in_date=today - timedelta(days=2),
+            check_out_date=today, num_guests=2, total_price=Decimal('300.00'), status='checked_in'
+        )
+        # Not on today's board
+        Booking.objects.create(
+            guest=self.guest, room=other_room, check_in_date=today,
+            check_out_date=today + timedelta(days=1), num_guests=1,
+            total_price=Decimal('150.00'), status='cancelled'
+        )
+
+    def ids(self, entries):
+        return [entry['booking_id'] for entry in entries]
+
+    def test_board_lists_today(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reception/board/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response.data['arrivals']), [self.booking.id])
+        self.assertEqual(self.ids(response.data['departures']), [self.departure.id])
+        self.assertEqual(response.data['in_house'], [])
+        self.assertEqual(response.data['counts'], {'arrivals': 1, 'in_house': 0, 'departures': 1})
+        arrival = response.data['arrivals'][0]
+        self.assertEqual(arrival['guest']['email'], 'guest@test.com')
+        self.assertEqual(arrival['room']['number'], '101')
+
+        # Served from the cache until something changes
+        with self.assertNumQueries(0):
+            self.client.get('/api/reception/board/')
+
+    def test_check_in_refreshes_board(self):
+        self.client.get('/api/reception/board/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/reception/check-in/{self.booking.id}/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/reception/board/')
+        self.assertEqual(response.data['arrivals'][0]['status'], 'checked_in')
+        self.assertEqual(self.ids(response.data['in_house']), [self.booking.id])
+
+    def test_other_dates(self):
+        tomorrow = date.today() + timedelta(days=1)
+        response = self.client.get('/api/reception/board/', {'date': tomorrow.isoformat()})
+        self.assertEqual(response.data['date'], tomorrow)
+        self.assertEqual(response.data['counts'], {'arrivals': 0, 'in_house': 0, 'departures': 0})
+        response = self.client.get('/api/reception/board/', {'date': 'tomorrow'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_guests_are_refused(self):
+        self.client.force_authenticate(user=self.guest)
+        self.assertEqual(self.client.get('/api/reception/board/').status_code, 403)
+
+
+class ConcurrentTransitionTest(ReceptionFixtures, TransactionTestCase):
+    """Parallel transitions of the same row: exactly one may win"""
+
+    workers = 8
+
+    def setUp(self):
+        self.create_fixtures()
+
+    def race(self, view, **kwargs):
+        barrier = threading.Barrier(self.workers)
+
+        def attempt(_):
+            try:
+                barrier.wait()
+                return self.call(view, **kwargs).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            statuses = list(pool.map(attempt, range(self.workers)))
+        return statuses
+
+    def assertOneWinner(self, statuses):
+        self.assertEqual(statuses.count(200), 1)
+        # Losers either saw the new status (400) or lost the UPDATE (409)
+        self.assertEqual(set(statuses) - {200, 400, 409}, set())
+
+    def test_parallel_check_ins(self):
+        self.assertOneWinner(self.race(check_in_guest, booking_id=self.booking.id))
+        self.assertEqual(AuditLog.objects.filter(action='booking_status_change').count(), 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'checked_in')
+
+        self.assertOneWinner(self.race(check_out_guest, booking_id=self.booking.id))
+        self.assertEqual(AuditLog.objects.filter(action='booking_status_change').count(), 2)
+        self.assertFalse(RoomNight.objects.filter(booking=self.booking).exists())
+
+    def test_parallel_maintenance(self):
+        self.assertOneWinner(self.race(mark_room_maintenance, room_id=self.room.id))
+        self.assertOneWinner(self.race(finish_room_maintenance, room_id=self.room.id))
+        self.assertEqual(AuditLog.objects.filter(action='room_status_change').count(), 2)
@@ -1,12 +1,15 @@
 from django.urls import path
 from .views import (
-    check_in_guest, check_out_guest, 
-    mark_room_maintenance, finish_room_maintenance
+    check_in_guest, check_out_guest, bulk_check_in, bulk_check_out,
+    mark_room_maintenance, finish_room_maintenance, arrivals_departures_board
 )
 
 urlpatterns = [
     path('check-in/<int:booking_id>/', check_in_guest, name='check-in-guest'),
     path('check-out/<int:booking_id>/', check_out_guest, name='check-out-guest'),
+    path('check-in/bulk/', bulk_check_in, name='bulk-check-in'),
+    path('check-out/bulk/', bulk_check_out, name='bulk-check-out'),
     path('room/<int:room_id>/maintenance/start/', mark_room_maintenance, name='mark-room-maintenance'),
     path('room/<int:room_id>/maintenance/finish/', finish_room_maintenance, name='finish-room-maintenance'),
+    path('board/', arrivals_departures_board, name='arrivals-departures-board'),
 ]
\ No newline at end of file
@@ -2,13 +2,21 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
+from django.db import transaction
+from django.utils import timezone
+from functools import partial
 from rooms.models import Room
 from bookings.models import Booking
 from payments.models import Payment
 from accounts.models import User
 from rooms.serializers import RoomStatusUpdateSerializer
-from bookings.serializers import BookingStatusUpdateSerializer
-from audit.models import AuditLog
+from bookings.serializers import BookingStatusUpdateSerializer, BookingBulkStatusSerializer
+from bookings.api_views import bulk_transition_response
+from bookings.services import InvalidTransition, StatusConflict, compare_and_set_status, transition_booking
+from audit.writer import audit_writer
+from dashboard.api_views import parse_query_date
+from dashboard.cache import cached
+from . import board
 
 
 @api_view(['POST'])
@@ -27,49 +35,27 @@ def check_in_guest(request, booking_id):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        booking = Booking.objects.get(id=booking_id)
+        booking = Booking.objects.select_related('room').get(id=booking_id)
     except Booking.DoesNotExist:
         return Response({
             'error': 'Booking not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Check if booking is in correct status for check-in
-    if booking.status != 'confirmed':
+    try:
+        transition_booking(booking, 'checked_in', user)
+    except InvalidTransition:
         return Response({
             'error': 'Booking must be confirmed to check-in'
         }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Update booking status
-    old_status = booking.status
-    booking.status = 'checked_in'
-    booking.save()
-    
-    # Update room status
-    room = booking.room
-    room.status = 'booked'
-    room.save()
-    
-    # Log the actions
-    AuditLog.objects.create(
-        user=user,
-        action='booking_status_change',
-        model_type='Booking',
-        object_id=booking.id,
-        description=f'Changed booking status from {old_status} to checked_in (check-in)'
-    )
-    
-    AuditLog.objects.create(
-        user=user,
-        action='room_status_change',
-        model_type='Room',
-        object_id=room.id,
-        description=f'Changed room {room.number} status to booked (check-in)'
-    )
+    except StatusConflict:
+        return Response({
+            'error': 'Booking was updated by someone else; reload and try again'
+        }, status=status.HTTP_409_CONFLICT)
     
     return Response({
         'message': 'Guest checked-in successfully',
         'booking_id': booking.id,
-        'room_number': room.number
+        'room_number': booking.room.number
     })
 
 
@@ -89,52 +75,65 @@ def check_out_guest(request, booking_id):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        booking = Booking.objects.get(id=booking_id)
+        booking = Booking.objects.select_related('room').get(id=booking_id)
     except Booking.DoesNotExist:
         return Response({
             'error': 'Booking not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Check if booking is in correct status for check-out
-    if booking.status != 'checked_in':
+    try:
+        transition_booking(booking, 'checked_out', user)
+    except InvalidTransition:
         return Response({
             'error': 'Booking must be checked-in to check-out'
         }, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Update booking status
-    old_status = booking.status
-    booking.status = 'checked_out'
-    booking.save()
-    
-    # Update room status
-    room = booking.room
-    room.status = 'dispo'
-    room.save()
-    
-    # Log the actions
-    AuditLog.objects.create(
-        user=user,
-        action='booking_status_change',
-        model_type='Booking',
-        object_id=booking.id,
-        description=f'Changed booking status from {old_status} to checked_out (check-out)'
-    )
-    
-    AuditLog.objects.create(
-        user=user,
-        action='room_status_change',
-        model_type='Room',
-        object_id=room.id,
-        description=f'Changed room {room.number} status to available (check-out)'
-    )
+    except StatusConflict:
+        return Response({
+            'error': 'Booking was updated by someone else; reload and try again'
+        }, status=status.HTTP_409_CONFLICT)
     
     return Response({
         'message': 'Guest checked-out successfully',
         'booking_id': booking.id,
-        'room_number': room.number
+        'room_number': booking.room.number
     })
 
 
+def bulk_status_change(request, new_status):
+    serializer = BookingBulkStatusSerializer(data={
+        'booking_ids': request.data.get('booking_ids'),
+        'status': new_status
+    })
+    serializer.is_valid(raise_exception=True)
+    return bulk_transition_response(serializer.validated_data['booking_ids'], new_status, request.user)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_check_in(request):
+    """
+    Check-in several guests at once; the response reports each booking
+    """
+    if not request.user.is_reception():
+        return Response({
+            'error': 'Only reception staff can check-in guests'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return bulk_status_change(request, 'checked_in')
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_check_out(request):
+    """
+    Check-out several guests at once; the response reports each booking
+    """
+    if not request.user.is_reception():
+        return Response({
+            'error': 'Only reception staff can check-out guests'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return bulk_status_change(request, 'checked_out')
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_room_maintenance(request, room_id):
@@ -156,19 +155,27 @@ def mark_room_maintenance(request, room_id):
             'error': 'Room not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Update room status
     old_status = room.status
-    room.status = 'maintenance'
-    room.save()
-    
-    # Log the action
-    AuditLog.objects.create(
-        user=user,
-        action='room_status_change',
-        model_type='Room',
-        object_id=room.id,
-        description=f'Changed room {room.number} status from {old_status} to maintenance'
-    )
+    if old_status == 'maintenance':
+        return Response({
+            'error': 'Room is already under maintenance'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Only switch if nobody changed the room since it was read
+    try:
+        with transaction.atomic():
+            compare_and_set_status(room, old_status, 'maintenance')
+            audit_writer.log(
+                user=user,
+                action='room_status_change',
+                model_type='Room',
+                object_id=room.id,
+                description=f'Changed room {room.number} status from {old_status} to maintenance'
+            )
+    except StatusConflict:
+        return Response({
+            'error': 'Room was updated by someone else; reload and try again'
+        }, status=status.HTTP_409_CONFLICT)
     
     return Response({
         'message': 'Room marked for maintenance',
@@ -205,23 +212,53 @@ def finish_room_maintenance(request, room_id):
             'error': 'Room is not currently under maintenance'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Update room status
     old_status = room.status
-    room.status = 'dispo'
-    room.save()
-    
-    # Log the action
-    AuditLog.objects.create(
-        user=user,
-        action='room_status_change',
-        model_type='Room',
-        object_id=room.id,
-        description=f'Changed room {room.number} status from {old_status} to available (maintenance finished)'
-    )
+    try:
+        with transaction.atomic():
+            compare_and_set_status(room, old_status, 'dispo')
+            audit_writer.log(
+                user=user,
+                action='room_status_change',
+                model_type='Room',
+                object_id=room.id,
+                description=f'Changed room {room.number} status from {old_status} to available (maintenance finished)'
+            )
+    except StatusConflict:
+        return Response({
+            'error': 'Room was updated by someone else; reload and try again'
+        }, status=status.HTTP_409_CONFLICT)
     
     return Response({
         'message': 'Room maintenance finished',
         'room_number': room.number,
         'old_status': old_status,
         'new_status': room.status
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def arrivals_departures_board(request):
+    """
+    Today's expected arrivals, in-house guests and departures, with guest
+    and room details. Optional query parameter ``date`` (YYYY-MM-DD).
+    """
+    user = request.user
+    
+    # Only admin and reception can see the board
+    if not (user.is_admin() or user.is_reception()):
+        return Response({
+            'error': 'Access denied'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        day = parse_query_date(request.query_params.get('date')) or timezone.localdate()
+    except ValueError:
+        return Response({
+            'error': 'Dates must use the YYYY-MM-DD format'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # One payload per day, recomputed after any booking, room or guest change
+    return Response(cached(
+        f'front-desk-board:{day}', ['bookings', 'rooms', 'users'], partial(board.front_desk_board, day)
+    ))
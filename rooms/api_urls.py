@@ -1,11 +1,13 @@
 from django.urls import path
 from .api_views import (
-    RoomListView, RoomDetailView, ReceptionRoomListView, 
-    ReceptionRoomStatusUpdateView, AdminRoomListView
+    RoomListView, RoomDetailView, RoomCalendarView, ReceptionRoomListView, 
+    ReceptionRoomStatusUpdateView, AdminRoomListView, RoomFloorMapView
 )
 
 urlpatterns = [
     path('', RoomListView.as_view(), name='room-list'),
+    path('calendar/', RoomCalendarView.as_view(), name='room-calendar'),
+    path('floor-map/', RoomFloorMapView.as_view(), name='room-floor-map'),
     path('<int:pk>/', RoomDetailView.as_view(), name='room-detail'),
     path('reception/', ReceptionRoomListView.as_view(), name='reception-room-list'),
     path('reception/<int:pk>/status/', ReceptionRoomStatusUpdateView.as_view(), name='reception-room-status-update'),
@@ -1,35 +1,145 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import OuterRef, Subquery
+from django.utils.dateparse import parse_date
 from .models import Room
+from .availability import get_index, encode_runs
+from bookings.models import Booking, RoomNight
+from bookings.inventory import held_room_ids
+from hotel_management.pagination import RoomNumberCursorPagination
 from .serializers import RoomSerializer, RoomStatusUpdateSerializer
 from accounts.models import User
 from audit.models import AuditLog
+from dashboard.cache import cached
 
 
 class RoomListView(generics.ListAPIView):
     serializer_class = RoomSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RoomNumberCursorPagination
     
     def get_queryset(self):
         user = self.request.user
         queryset = Room.objects.all()
+
+        room_status = self.request.query_params.get('status')
+        if room_status:
+            queryset = queryset.filter(status=room_status)
         
         # Filter by availability if dates are provided
         check_in = self.request.query_params.get('check_in_date')
         check_out = self.request.query_params.get('check_out_date')
         
         if check_in and check_out:
-            # Exclude rooms that have overlapping confirmed/checked_in bookings
-            from django.db.models import Q
-            queryset = queryset.exclude(
-                bookings__status__in=['confirmed', 'checked_in'],
-                bookings__check_in_date__lt=check_out,
-                bookings__check_out_date__gt=check_in
-            )
+            # Answer from the in-memory availability index when the dates fall
+            # inside its horizon, otherwise fall back to the overlap scan
+            unavailable = self.get_unavailable_rooms(check_in, check_out)
+            if unavailable is not None:
+                return queryset.exclude(id__in=unavailable)
+
+            # Exclude rooms holding any night in the range according to the
+            # room-night inventory
+            queryset = queryset.exclude(id__in=held_room_ids(check_in, check_out))
             
         return queryset
 
+    def get_unavailable_rooms(self, check_in, check_out):
+        try:
+            check_in = parse_date(check_in)
+            check_out = parse_date(check_out)
+        except ValueError:
+            return None
+        if not check_in or not check_out:
+            return None
+        return get_index().unavailable_rooms(check_in, check_out)
+
+
+class RoomCalendarView(APIView):
+    """
+    Rooms x days occupancy grid for ``[start, end)``, one run-length encoded
+    row per room (see ``rooms.availability.encode_runs``)
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 366
+
+    def get(self, request):
+        try:
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if not start or not end:
+            return Response({
+                'error': 'start and end dates are required (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        days = (end - start).days
+        if days <= 0 or days > self.max_days:
+            return Response({
+                'error': f'end must be after start and at most {self.max_days} days later'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rooms = list(Room.objects.values_list('id', 'number'))
+        index = get_index()
+        if index.covers(start, end):
+            bits = {room_id: index.room_bits(room_id, start, days) for room_id, _ in rooms}
+        else:
+            # Outside the index horizon, read the held nights in one query
+            bits = {}
+            nights = RoomNight.objects.filter(date__gte=start, date__lt=end).values_list('room_id', 'date')
+            for room_id, night in nights:
+                bits[room_id] = bits.get(room_id, 0) | (1 << (night - start).days)
+
+        return Response({
+            'start': start,
+            'end': end,
+            'days': days,
+            'rooms': [
+                {'id': room_id, 'number': number, 'runs': encode_runs(bits.get(room_id, 0), days)}
+                for room_id, number in rooms
+            ]
+        })
+
+
+class RoomFloorMapView(APIView):
+    """
+    Every room grouped by floor with only its number, status and current
+    guest, for the reception floor plan
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if not (user.is_reception() or user.is_admin()):
+            return Response({
+                'error': 'Access denied'
+            }, status=status.HTTP_403_FORBIDDEN)
+        # Recomputed after any room, booking or guest change
+        return Response(cached('floor-map', ['rooms', 'bookings', 'users'], floor_map))
+
+
+def floor_map():
+    """Floor plan payload: one query, the guest read by a correlated subquery per room"""
+    stay = Booking.objects.filter(room=OuterRef('pk'), status='checked_in').order_by('-check_in_date')
+    rooms = Room.objects.annotate(
+        booking_id=Subquery(stay.values('id')[:1]),
+        guest=Subquery(stay.values('guest__username')[:1]),
+    ).order_by('floor', 'number').values_list('floor', 'id', 'number', 'status', 'booking_id', 'guest')
+
+    floors = []
+    for floor, room_id, number, room_status, booking_id, guest in rooms:
+        if not floors or floors[-1]['floor'] != floor:
+            floors.append({'floor': floor, 'rooms': []})
+        floors[-1]['rooms'].append({
+            'id': room_id,
+            'number': number,
+            'status': room_status,
+            'current_guest': guest and {'name': guest, 'booking_id': booking_id},
+        })
+    return {'floors': floors}
+
 
 class RoomDetailView(generics.RetrieveAPIView):
     queryset = Room.objects.all()
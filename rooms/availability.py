@@ -0,0 +1,205 @@
+"""
+In-process room availability index.
+
+Every room gets one bitset (a plain Python int) covering a rolling window of
+nights that starts today. Bit ``i`` is set when night ``origin + i`` is held by
+a confirmed or checked-in booking, so "is this room free between X and Y" is a
+single AND against a mask instead of an overlap scan over the bookings table.
+
+The index is built lazily on first use after startup (and again whenever the
+date rolls over), then kept up to date by the booking signals registered in
+``rooms.signals``. Searches that fall outside the window return ``None`` and
+callers fall back to the database.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+BLOCKING_STATUSES = ('confirmed', 'checked_in')
+
+
+class AvailabilityIndex:
+    """Per-room occupancy bitsets over a rolling day horizon"""
+
+    def __init__(self, horizon_days=None):
+        self.horizon_days = horizon_days or getattr(settings, 'AVAILABILITY_HORIZON_DAYS', 730)
+        self.origin = None
+        self._bits = {}
+        self._lock = threading.Lock()
+        self._scheduled = threading.local()
+
+    @property
+    def is_built(self):
+        return self.origin is not None
+
+    def ensure_current(self):
+        """Build the index on first use, or rebuild it once the date rolls over"""
+        if self.origin != timezone.localdate():
+            self.rebuild()
+        return self
+
+    def rebuild(self):
+        origin = timezone.localdate()
+        bits = self._load(origin)
+        with self._lock:
+            self.origin = origin
+            self._bits = bits
+
+    def invalidate(self):
+        """Drop the index so the next lookup rebuilds it from the database"""
+        with self._lock:
+            self.origin = None
+            self._bits = {}
+
+    def refresh_room(self, room_id):
+        """Recompute a single room from the database"""
+        self.refresh_rooms([room_id])
+
+    def refresh_rooms(self, room_ids):
+        """Recompute several rooms from the database with one read"""
+        if not self.is_built or not room_ids:
+            return
+        origin = self.origin
+        bits = self._load(origin, room_ids=room_ids)
+        with self._lock:
+            if self.origin == origin:
+                for room_id in room_ids:
+                    # Rooms missing from the load were deleted
+                    if room_id in bits:
+                        self._bits[room_id] = bits[room_id]
+                    else:
+                        self._bits.pop(room_id, None)
+
+    def schedule_refresh(self, room_id):
+        """
+        Refresh the room once the current transaction commits. Every room
+        scheduled before a commit is re-read by the first callback in one
+        batch; the others find nothing left to do.
+        """
+        pending = self._pending_rooms()
+        pending.add(room_id)
+        transaction.on_commit(self.refresh_scheduled)
+
+    def refresh_scheduled(self):
+        pending = self._pending_rooms()
+        room_ids = list(pending)
+        pending.clear()
+        self.refresh_rooms(room_ids)
+
+    def _pending_rooms(self):
+        # Per thread, because on_commit callbacks run in the committing thread
+        if not hasattr(self._scheduled, 'rooms'):
+            self._scheduled.rooms = set()
+        return self._scheduled.rooms
+
+    def has_holds(self, room_id):
+        return bool(self._bits.get(room_id))
+
+    def holds(self, room_id, check_in, check_out):
+        """True if every night of the stay inside the horizon is already marked held"""
+        if not self.is_built:
+            return False
+        end = self.origin + timedelta(days=self.horizon_days)
+        check_in, check_out = max(check_in, self.origin), min(check_out, end)
+        if check_in >= check_out:
+            return True
+        mask = self._mask(check_in, check_out)
+        return self._bits.get(room_id, 0) & mask == mask
+
+    def covers(self, check_in, check_out):
+        if not self.is_built:
+            return False
+        end = self.origin + timedelta(days=self.horizon_days)
+        return self.origin <= check_in < check_out <= end
+
+    def is_available(self, room_id, check_in, check_out):
+        """Return True/False, or None when the range is outside the horizon"""
+        if not self.covers(check_in, check_out):
+            return None
+        return not self._bits.get(room_id, 0) & self._mask(check_in, check_out)
+
+    def unavailable_rooms(self, check_in, check_out):
+        """Return the ids of rooms held on any night in the range, or None"""
+        if not self.covers(check_in, check_out):
+            return None
+        mask = self._mask(check_in, check_out)
+        return {room_id for room_id, bits in self._bits.items() if bits & mask}
+
+    def room_bits(self, room_id, start, days):
+        """Return ``days`` bits for a room, bit 0 being the night of ``start``"""
+        offset = (start - self.origin).days
+        return (self._bits.get(room_id, 0) >> offset) & ((1 << days) - 1)
+
+    def verify(self):
+        """
+        Compare the index against the database and return the ids of rooms
+        whose bitsets disagree (an empty list means the index is consistent).
+        """
+        if not self.is_built:
+            return []
+        fresh = self._load(self.origin)
+        with self._lock:
+            current = dict(self._bits)
+        room_ids = set(fresh) | set(current)
+        return sorted(
+            room_id for room_id in room_ids
+            if fresh.get(room_id, 0) != current.get(room_id, 0)
+        )
+
+    def _mask(self, check_in, check_out):
+        start = (check_in - self.origin).days
+        return ((1 << (check_out - check_in).days) - 1) << start
+
+    def _load(self, origin, room_ids=None):
+        from bookings.models import Booking
+        from .models import Room
+
+        end = origin + timedelta(days=self.horizon_days)
+        rooms = Room.objects.all()
+        bookings = Booking.objects.filter(
+            status__in=BLOCKING_STATUSES,
+            check_in_date__lt=end,
+            check_out_date__gt=origin
+        )
+        if room_ids is not None:
+            rooms = rooms.filter(id__in=room_ids)
+            bookings = bookings.filter(room_id__in=room_ids)
+
+        bits = dict.fromkeys(rooms.values_list('id', flat=True), 0)
+        rows = bookings.values_list('room_id', 'check_in_date', 'check_out_date')
+        for booking_room_id, check_in, check_out in rows.iterator(chunk_size=5000):
+            start = max((check_in - origin).days, 0)
+            stop = min((check_out - origin).days, self.horizon_days)
+            bits[booking_room_id] = bits.get(booking_room_id, 0) | (((1 << (stop - start)) - 1) << start)
+        return bits
+
+
+def encode_runs(bits, days):
+    """
+    Run-length encode ``days`` bits as alternating free/held run lengths.
+    The first run is always free (possibly 0), e.g. ``[2, 3, 5]`` means two
+    free nights, three held nights, then five free nights.
+    """
+    runs = []
+    held = False
+    length = 0
+    for i in range(days):
+        if bool(bits >> i & 1) != held:
+            runs.append(length)
+            held = not held
+            length = 0
+        length += 1
+    runs.append(length)
+    return runs
+
+
+availability_index = AvailabilityIndex()
+
+
+def get_index():
+    """Return the process-wide index, building it if needed"""
+    return availability_index.ensure_current()
@@ -0,0 +1,144 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rooms.models import Room
+from rooms.availability import AvailabilityIndex, BLOCKING_STATUSES
+from bookings.models import Booking, RoomNight
+from bookings.inventory import booking_nights
+from accounts.management.commands.loadtest import percentile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare room search latency of the SQL overlap scan and the availability index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=200, help='Number of random searches to time')
+        parser.add_argument('--seed-rooms', type=int, default=0, help='Create this many synthetic rooms first')
+        parser.add_argument('--seed-bookings', type=int, default=0, help='Create this many synthetic bookings first')
+        parser.add_argument('--random-seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['random_seed'])
+        if options['seed_rooms'] or options['seed_bookings']:
+            self.seed(rng, options['seed_rooms'], options['seed_bookings'])
+
+        today = timezone.localdate()
+        self.stdout.write(
+            f'Rooms: {Room.objects.count()}  Bookings: {Booking.objects.count()}'
+        )
+
+        index = AvailabilityIndex()
+        started = time.perf_counter()
+        index.rebuild()
+        self.stdout.write(f'Index build: {(time.perf_counter() - started) * 1000:.1f} ms')
+
+        ranges = []
+        for _ in range(options['searches']):
+            check_in = today + timedelta(days=rng.randint(0, 90))
+            ranges.append((check_in, check_in + timedelta(days=rng.randint(1, 7))))
+
+        def sql_search(check_in, check_out):
+            overlapping = Booking.objects.filter(
+                status__in=BLOCKING_STATUSES,
+                check_in_date__lt=check_out,
+                check_out_date__gt=check_in
+            ).values('room_id')
+            return list(Room.objects.exclude(id__in=overlapping).values_list('id', flat=True))
+
+        def index_search(check_in, check_out):
+            unavailable = index.unavailable_rooms(check_in, check_out)
+            return list(Room.objects.exclude(id__in=unavailable).values_list('id', flat=True))
+
+        results = {'sql': [], 'index': []}
+        for name, search in (('sql', sql_search), ('index', index_search)):
+            timings = []
+            for check_in, check_out in ranges:
+                started = time.perf_counter()
+                results[name].append(sorted(search(check_in, check_out)))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{name:>6}: mean {statistics.mean(timings):8.2f} ms  '
+                f'p50 {percentile(timings, 0.5):8.2f} ms  '
+                f'p95 {percentile(timings, 0.95):8.2f} ms'
+            )
+
+        mismatches = [
+            ranges[i] for i, (sql, indexed) in enumerate(zip(results['sql'], results['index']))
+            if sql != indexed
+        ]
+        drift = index.verify()
+        if mismatches or drift:
+            self.stdout.write(self.style.ERROR(
+                f'Inconsistent results: {len(mismatches)} searches differ, {len(drift)} rooms drifted'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Index results match the database'))
+
+    def seed(self, rng, room_count, booking_count):
+        """Create synthetic rooms and non-overlapping historical bookings with their held nights"""
+        guest, _ = User.objects.get_or_create(
+            email='benchmark@hotel.com',
+            defaults={'username': 'benchmark', 'role': 'guest'}
+        )
+        existing = Room.objects.count()
+        Room.objects.bulk_create([
+            Room(
+                number=f'B{existing + i:05d}', name='Benchmark Room', floor=(i // 50) + 1,
+                capacity=2, price_per_night=Decimal('100.00')
+            )
+            for i in range(room_count)
+        ], batch_size=1000)
+
+        # Rooms already holding nights keep their own bookings
+        room_ids = list(
+            Room.objects.exclude(id__in=RoomNight.objects.values('room_id')).values_list('id', flat=True)
+        )
+        per_room = max(booking_count // max(len(room_ids), 1), 1)
+        today = timezone.localdate()
+        batch = []
+        created = 0
+        for room_id in room_ids:
+            if created >= booking_count:
+                break
+            # Walk backwards from a few months ahead so history spans years
+            day = today + timedelta(days=rng.randint(60, 180))
+            for _ in range(min(per_room, booking_count - created)):
+                nights = rng.randint(1, 5)
+                check_out = day
+                check_in = check_out - timedelta(days=nights)
+                day = check_in - timedelta(days=rng.randint(0, 3))
+                if check_out <= today:
+                    status = 'cancelled' if rng.random() < 0.1 else 'checked_out'
+                else:
+                    status = rng.choice(('confirmed', 'confirmed', 'pending'))
+                batch.append(Booking(
+                    guest=guest, room_id=room_id, check_in_date=check_in,
+                    check_out_date=check_out, num_guests=1,
+                    total_price=Decimal('100.00') * nights, status=status
+                ))
+                created += 1
+                if len(batch) >= 5000:
+                    self.write_bookings(batch)
+                    batch = []
+        self.write_bookings(batch)
+        self.stdout.write(f'Seeded {room_count} rooms and {created} bookings')
+
+    def write_bookings(self, bookings):
+        """Insert bookings and claim the nights of the blocking ones, as the app would"""
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create(bookings)
+            RoomNight.objects.bulk_create([
+                RoomNight(room_id=booking.room_id, date=night, booking_id=booking.id)
+                for booking in bookings if booking.status in BLOCKING_STATUSES
+                for night in booking_nights(booking)
+            ])
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from .availability import availability_index, BLOCKING_STATUSES
+
+# What a status-only write (``bookings.services``) passes as ``update_fields``
+STATUS_FIELDS = frozenset({'status', 'updated_at'})
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_room_availability(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the availability index in sync when a booking enters or leaves a
+    blocking status. Rooms are re-read once the transaction commits, in one
+    batch per transaction, so a rolled-back booking never leaks into the index.
+    """
+    if not availability_index.is_built:
+        return
+    if instance.status in BLOCKING_STATUSES:
+        # Moving between blocking statuses (check-in) leaves the nights as they are
+        if update_fields == STATUS_FIELDS and availability_index.holds(
+                instance.room_id, instance.check_in_date, instance.check_out_date):
+            return
+        availability_index.schedule_refresh(instance.room_id)
+    elif availability_index.has_holds(instance.room_id):
+        availability_index.schedule_refresh(instance.room_id)
@@ -1,3 +1,271 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+from datetime import timedelta
+from decimal import Decimal
+from bookings.models import Booking, RoomNight
+from .models import Room
+from .availability import BLOCKING_STATUSES, availability_index, get_index
 
-# Create your tests here.
+User = get_user_model()
+
+
+class AvailabilityIndexTest(TestCase):
+    """Test cases for the in-memory availability index"""
+
+    def setUp(self):
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.room = Room.objects.create(
+            number='101', name='Single', floor=1, capacity=1,
+            price_per_night=Decimal('100.00')
+        )
+        self.other_room = Room.objects.create(
+            number='102', name='Double', floor=1, capacity=2,
+            price_per_night=Decimal('150.00')
+        )
+        self.today = timezone.localdate()
+
+    def book(self, room, start, nights, status='confirmed'):
+        return Booking.objects.create(
+            guest=self.guest,
+            room=room,
+            check_in_date=self.today + timedelta(days=start),
+            check_out_date=self.today + timedelta(days=start + nights),
+            num_guests=1,
+            total_price=room.price_per_night * nights,
+            status=status
+        )
+
+    def test_overlap_detection(self):
+        """Only ranges sharing a night with a blocking booking are unavailable"""
+        self.book(self.room, 5, 3)
+        self.book(self.other_room, 5, 3, status='pending')
+        index = get_index()
+
+        day = lambda n: self.today + timedelta(days=n)
+        self.assertFalse(index.is_available(self.room.id, day(6), day(7)))
+        self.assertFalse(index.is_available(self.room.id, day(4), day(6)))
+        self.assertTrue(index.is_available(self.room.id, day(2), day(5)))
+        self.assertTrue(index.is_available(self.room.id, day(8), day(10)))
+        self.assertTrue(index.is_available(self.other_room.id, day(5), day(8)))
+        self.assertEqual(index.unavailable_rooms(day(0), day(30)), {self.room.id})
+
+    def test_outside_horizon_returns_none(self):
+        index = get_index()
+        past = self.today - timedelta(days=3)
+        far = self.today + timedelta(days=index.horizon_days + 1)
+        self.assertIsNone(index.is_available(self.room.id, past, self.today))
+        self.assertIsNone(index.unavailable_rooms(self.today, far))
+
+    def test_status_transitions_update_index(self):
+        """Entering and leaving a blocking status refreshes the room on commit"""
+        index = get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.room, 1, 2)
+        self.assertEqual(index.unavailable_rooms(self.today, self.today + timedelta(days=10)), {self.room.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertEqual(index.unavailable_rooms(self.today, self.today + timedelta(days=10)), set())
+        self.assertEqual(index.verify(), [])
+
+    def test_verify_reports_drift(self):
+        """Writes that bypass signals show up in the consistency check"""
+        index = get_index()
+        self.book(self.room, 1, 2)
+        Booking.objects.filter(room=self.room).update(status='checked_in')
+        self.assertEqual(index.verify(), [self.room.id])
+        index.rebuild()
+        self.assertEqual(index.verify(), [])
+
+    def test_room_list_excludes_unavailable_rooms(self):
+        self.book(self.room, 1, 2)
+        client = APIClient()
+        client.force_authenticate(user=self.guest)
+
+        check_in = self.today + timedelta(days=2)
+        check_out = self.today + timedelta(days=4)
+        response = client.get('/api/rooms/', {'check_in_date': str(check_in), 'check_out_date': str(check_out)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['number'] for room in response.data['results']], ['102'])
+
+    def test_room_list_filters_by_status(self):
+        Room.objects.filter(id=self.room.id).update(status='maintenance')
+        client = APIClient()
+        client.force_authenticate(user=self.guest)
+        response = client.get('/api/rooms/', {'status': 'dispo'})
+        self.assertEqual([room['number'] for room in response.data['results']], ['102'])
+
+    def test_room_list_fallback_matches_same_booking(self):
+        """Outside the horizon, rooms with unrelated bookings stay listed"""
+        self.book(self.room, -10, 2, status='checked_out')
+        self.book(self.room, -30, 2)
+        client = APIClient()
+        client.force_authenticate(user=self.guest)
+
+        check_in = self.today - timedelta(days=9)
+        check_out = self.today - timedelta(days=8)
+        response = client.get('/api/rooms/', {'check_in_date': str(check_in), 'check_out_date': str(check_out)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['number'] for room in response.data['results']], ['101', '102'])
+
+
+class RoomCalendarTest(TestCase):
+    """Test cases for the occupancy calendar endpoint"""
+
+    def setUp(self):
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.room = Room.objects.create(
+            number='101', name='Single', floor=1, capacity=1,
+            price_per_night=Decimal('100.00')
+        )
+        self.other_room = Room.objects.create(
+            number='102', name='Double', floor=1, capacity=2,
+            price_per_night=Decimal('150.00')
+        )
+        self.today = timezone.localdate()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.guest)
+
+    def get_calendar(self, start, end):
+        return self.client.get('/api/rooms/calendar/', {'start': str(start), 'end': str(end)})
+
+    def test_grid_from_index(self):
+        Booking.objects.create(
+            guest=self.guest, room=self.room,
+            check_in_date=self.today + timedelta(days=2),
+            check_out_date=self.today + timedelta(days=5),
+            num_guests=1, total_price=Decimal('300.00'), status='confirmed'
+        )
+        get_index()
+
+        with self.assertNumQueries(1):
+            response = self.get_calendar(self.today, self.today + timedelta(days=90))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['days'], 90)
+        self.assertEqual(response.data['rooms'], [
+            {'id': self.room.id, 'number': '101', 'runs': [2, 3, 85]},
+            {'id': self.other_room.id, 'number': '102', 'runs': [90]},
+        ])
+
+    def test_grid_outside_horizon_reads_room_nights(self):
+        start = self.today - timedelta(days=30)
+        booking = Booking.objects.create(
+            guest=self.guest, room=self.other_room,
+            check_in_date=start, check_out_date=start + timedelta(days=2),
+            num_guests=1, total_price=Decimal('300.00'), status='checked_in'
+        )
+        RoomNight.objects.bulk_create([
+            RoomNight(room=self.other_room, date=start, booking=booking),
+            RoomNight(room=self.other_room, date=start + timedelta(days=1), booking=booking),
+        ])
+        get_index()
+
+        with self.assertNumQueries(2):
+            response = self.get_calendar(start, start + timedelta(days=7))
+        self.assertEqual(response.data['rooms'][1]['runs'], [0, 2, 5])
+
+    def test_invalid_ranges_are_rejected(self):
+        self.assertEqual(self.get_calendar('', '').status_code, 400)
+        self.assertEqual(self.get_calendar(self.today, self.today).status_code, 400)
+        self.assertEqual(self.get_calendar(self.today, self.today + timedelta(days=400)).status_code, 400)
+
+
+class RoomFloorMapTest(TestCase):
+    """Test cases for the floor-plan room status map"""
+
+    def setUp(self):
+        self.addCleanup(availability_index.invalidate)
+        availability_index.invalidate()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        self.guest = User.objects.create_user(
+            email='guest@test.com',
+            username='guest',
+            password='testpass123',
+            role='guest'
+        )
+        self.reception = User.objects.create_user(
+            email='reception@test.com',
+            username='reception',
+            password='testpass123',
+            role='reception'
+        )
+        self.rooms = [
+            Room.objects.create(number=number, name='Single', floor=floor, capacity=1,
+                                price_per_night=Decimal('100.00'))
+            for number, floor in [('201', 2), ('101', 1), ('102', 1)]
+        ]
+        today = timezone.localdate()
+        self.booking = Booking.objects.create(
+            guest=self.guest, room=self.rooms[2],
+            check_in_date=today, check_out_date=today + timedelta(days=2),
+            num_guests=1, total_price=Decimal('200.00'), status='confirmed'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reception)
+
+    def test_rooms_grouped_by_floor(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/rooms/floor-map/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([floor['floor'] for floor in response.data['floors']], [1, 2])
+        self.assertEqual(response.data['floors'][0]['rooms'], [
+            {'id': self.rooms[1].id, 'number': '101', 'status': 'dispo', 'current_guest': None},
+            {'id': self.rooms[2].id, 'number': '102', 'status': 'dispo', 'current_guest': None},
+        ])
+        with self.assertNumQueries(0):
+            self.client.get('/api/rooms/floor-map/')
+
+    def test_check_in_refreshes_map(self):
+        self.client.get('/api/rooms/floor-map/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/reception/check-in/{self.booking.id}/')
+        self.assertEqual(response.status_code, 200)
+        room = self.client.get('/api/rooms/floor-map/').data['floors'][0]['rooms'][1]
+        self.assertEqual(room['status'], 'booked')
+        self.assertEqual(room['current_guest'], {'name': 'guest', 'booking_id': self.booking.id})
+
+    def test_guests_are_refused(self):
+        self.client.force_authenticate(user=self.guest)
+        self.assertEqual(self.client.get('/api/rooms/floor-map/').status_code, 403)
+
+
+class BenchmarkAvailabilityTest(TestCase):
+    """Test cases for the benchmark_availability command"""
+
+    def test_seeded_bookings_hold_their_nights(self):
+        out = StringIO()
+        call_command('benchmark_availability', searches=5, seed_rooms=3, seed_bookings=30, stdout=out)
+
+        held = sum(
+            (check_out - check_in).days
+            for check_in, check_out in Booking.objects.filter(
+                status__in=BLOCKING_STATUSES
+            ).values_list('check_in_date', 'check_out_date')
+        )
+        self.assertGreater(held, 0)
+        self.assertEqual(RoomNight.objects.count(), held)
+        self.assertIn('Index results match the database', out.getvalue())